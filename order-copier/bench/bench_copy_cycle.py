@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# MT5 Pending Order Copier System - Copy Cycle Benchmark
+# This script times full OrderManager cycles against the simulated broker over a scenario matrix
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+# Add the order-copier directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_manager import OrderManager
+from order_tracker import OrderTracker
+from simulated_broker import SimulatedBroker
+
+SOURCE_LOGIN = 1000
+FIRST_TARGET_LOGIN = 2001
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD', 'XAUUSD']
+ORDER_TYPES = [
+    SimulatedBroker.ORDER_TYPE_BUY_LIMIT, SimulatedBroker.ORDER_TYPE_SELL_LIMIT,
+    SimulatedBroker.ORDER_TYPE_BUY_STOP, SimulatedBroker.ORDER_TYPE_SELL_STOP
+]
+
+PRESETS = {
+    'quick': {'targets': [1, 5], 'orders': [10, 100], 'change_rates': [0.0, 0.1], 'cycles': 3},
+    'full': {'targets': [1, 10, 50], 'orders': [10, 500, 5000], 'change_rates': [0.0, 0.01, 0.1], 'cycles': 3}
+}
+
+class TimedBackend:
+    """Wraps a backend and accumulates wall time spent inside its API functions"""
+
+    def __init__(self, backend):
+        self._backend = backend
+        self.io_seconds = 0.0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._backend, name)
+        if not callable(attribute) or name.startswith('_'):
+            return attribute
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self.io_seconds += time.perf_counter() - started
+        return timed
+
+class PlanningTimer:
+    """Wraps ReconciliationPlanner.plan and accumulates the CPU time spent planning"""
+
+    def __init__(self, planner):
+        self.plan_function = planner.plan
+        self.cpu_seconds = 0.0
+        planner.plan = self.plan
+
+    def plan(self, *args, **kwargs):
+        started = time.process_time()
+        try:
+            return self.plan_function(*args, **kwargs)
+        finally:
+            self.cpu_seconds += time.process_time() - started
+
+def build_scenario(targets: int, orders: int, latency: Dict[str, float], seed: int,
+                   skip_unchanged: bool) -> Tuple[SimulatedBroker, Dict[str, Any]]:
+    """Create a broker with one source account holding the given orders and empty target accounts"""
+    rng = random.Random(seed)
+    broker = SimulatedBroker(latency=latency, seed=seed)
+    for symbol in SYMBOLS:
+        broker.add_symbol(symbol, digits=3 if symbol.endswith('JPY') else 5)
+
+    broker.add_account(SOURCE_LOGIN, 'source')
+    for _ in range(orders):
+        add_random_order(broker, rng)
+
+    target_terminals = {}
+    for index in range(targets):
+        login = FIRST_TARGET_LOGIN + index
+        broker.add_account(login, 'target')
+        target_terminals[f"Target{index + 1}"] = {
+            'MT5_ACCOUNT': login,
+            'MT5_PASSWORD': 'target',
+            'MT5_SERVER': 'Simulated-Server',
+            'lot_multiplier': 1.0 + (index % 3) * 0.5,
+            'min_lot_size': 0.01,
+            'max_lot_size': 100.0,
+            'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT', 'BUY_STOP', 'SELL_STOP'],
+            'symbol_mapping': {},
+            'orphan_management': {
+                'kill_orphaned_orders': True,
+                'kill_orphaned_positions': True,
+                'max_orphan_checks': 1
+            }
+        }
+
+    config = {
+        'SOURCE_TERMINAL': {'MT5_ACCOUNT': SOURCE_LOGIN, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+        'TARGET_TERMINALS': target_terminals,
+        # Like the in-memory tracker, no placement journal - cycles are timed without disk I/O
+        'PERFORMANCE_CONFIG': {'skip_unchanged_terminals': skip_unchanged, 'placement_journal_dir': None}
+    }
+    return broker, config
+
+def add_random_order(broker: SimulatedBroker, rng: random.Random) -> int:
+    """Place a random pending order on the source account"""
+    symbol = rng.choice(SYMBOLS)
+    digits = broker.symbols[symbol].digits
+    price = round(rng.uniform(1.0, 2.0), digits)
+    return broker.add_pending_order(
+        SOURCE_LOGIN, symbol, rng.choice(ORDER_TYPES), round(rng.uniform(0.01, 2.0), 2), price,
+        sl=round(price * 0.99, digits), tp=round(price * 1.01, digits)
+    )
+
+def apply_changes(broker: SimulatedBroker, rng: random.Random, change_rate: float) -> int:
+    """Change a fraction of the source orders: mostly price moves, plus some removals and new orders"""
+    source_orders = broker.accounts[SOURCE_LOGIN]['orders']
+    changes = int(round(len(source_orders) * change_rate))
+    if changes == 0:
+        return 0
+
+    tickets = rng.sample(list(source_orders), min(changes, len(source_orders)))
+    replaced = len(tickets) // 4
+    for ticket in tickets[:replaced]:
+        broker.remove_pending_order(SOURCE_LOGIN, ticket)
+        add_random_order(broker, rng)
+    for ticket in tickets[replaced:]:
+        order = source_orders[ticket]
+        digits = broker.symbols[order['symbol']].digits
+        broker.update_pending_order(SOURCE_LOGIN, ticket, price_open=round(order['price_open'] * 1.001, digits))
+    return len(tickets)
+
+def run_cycle(manager: OrderManager, broker: SimulatedBroker, timed_backend: TimedBackend,
+              planning_timer: PlanningTimer) -> Dict[str, Any]:
+    """Run one process_all_terminals cycle and collect its measurements"""
+    for key in manager.stats:
+        manager.stats[key] = 0
+    broker.reset_call_counts()
+    timed_backend.io_seconds = 0.0
+    planning_timer.cpu_seconds = 0.0
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    success = manager.process_all_terminals()
+    cpu_seconds = time.process_time() - cpu_started
+    wall_seconds = time.perf_counter() - wall_started
+
+    return {
+        'success': success,
+        'wall_seconds': wall_seconds,
+        'cpu_seconds': cpu_seconds,
+        'planning_cpu_seconds': planning_timer.cpu_seconds,
+        'io_wall_seconds': timed_backend.io_seconds,
+        'broker_calls': sum(broker.call_counts.values()),
+        'broker_calls_by_function': dict(broker.call_counts),
+        'stats': manager.stats.copy()
+    }
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Mean, median, min and max of a series"""
+    return {
+        'mean': statistics.mean(values),
+        'median': statistics.median(values),
+        'min': min(values),
+        'max': max(values)
+    }
+
+def run_scenario(targets: int, orders: int, change_rate: float, cycles: int, latency: Dict[str, float],
+                 seed: int, skip_unchanged: bool, measure_memory: bool, logger: logging.Logger) -> Dict[str, Any]:
+    """Warm up with the initial copy, then time cycles with the given source change rate"""
+    broker, config = build_scenario(targets, orders, latency, seed, skip_unchanged)
+    timed_backend = TimedBackend(broker)
+    manager = OrderManager(config, logger, tracker=OrderTracker(state_file=None, logger=logger), backend=timed_backend)
+    planning_timer = PlanningTimer(manager.planner)
+    rng = random.Random(seed + 1)
+
+    warmup = run_cycle(manager, broker, timed_backend, planning_timer)
+
+    measured = []
+    for _ in range(cycles):
+        changes = apply_changes(broker, rng, change_rate)
+        cycle = run_cycle(manager, broker, timed_backend, planning_timer)
+        cycle['source_changes'] = changes
+        measured.append(cycle)
+
+    peak_memory = None
+    if measure_memory:
+        # Separate cycle so tracemalloc overhead does not distort the timings
+        apply_changes(broker, rng, change_rate)
+        tracemalloc.start()
+        run_cycle(manager, broker, timed_backend, planning_timer)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    manager.cleanup()
+
+    return {
+        'targets': targets,
+        'orders': orders,
+        'change_rate': change_rate,
+        'cycles': cycles,
+        'all_successful': warmup['success'] and all(cycle['success'] for cycle in measured),
+        'warmup_wall_seconds': warmup['wall_seconds'],
+        'wall_seconds': summarize([cycle['wall_seconds'] for cycle in measured]),
+        'cpu_seconds': summarize([cycle['cpu_seconds'] for cycle in measured]),
+        'planning_cpu_seconds': summarize([cycle['planning_cpu_seconds'] for cycle in measured]),
+        'io_wall_seconds': summarize([cycle['io_wall_seconds'] for cycle in measured]),
+        'broker_calls_per_cycle': statistics.mean(cycle['broker_calls'] for cycle in measured),
+        'broker_calls_by_function': measured[-1]['broker_calls_by_function'],
+        'actions_last_cycle': measured[-1]['stats'],
+        'peak_memory_bytes': peak_memory
+    }
+
+def scenario_key(result: Dict[str, Any]) -> Tuple[int, int, float]:
+    return result['targets'], result['orders'], result['change_rate']
+
+def compare_results(results: List[Dict[str, Any]], baseline_file: str, threshold: float) -> bool:
+    """Print wall time ratios against a previous run - returns False when a scenario regressed"""
+    with open(baseline_file, 'r') as f:
+        baseline = {scenario_key(result): result for result in json.load(f)['results']}
+
+    regressions = 0
+    print(f"\nComparison with {baseline_file} (threshold {threshold:.2f}x)")
+    for result in results:
+        previous = baseline.get(scenario_key(result))
+        if previous is None:
+            continue
+
+        ratio = result['wall_seconds']['median'] / max(previous['wall_seconds']['median'], 1e-9)
+        calls_delta = result['broker_calls_per_cycle'] - previous['broker_calls_per_cycle']
+        flag = "REGRESSION" if ratio > threshold else "ok"
+        if ratio > threshold:
+            regressions += 1
+        print(f"  targets={result['targets']:>3} orders={result['orders']:>5} change={result['change_rate']:<5} "
+              f"wall x{ratio:.2f}  calls {calls_delta:+.0f}  {flag}")
+
+    return regressions == 0
+
+def get_commit() -> Optional[str]:
+    """Current git commit, if available"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def parse_list(value: str, cast) -> List[Any]:
+    return [cast(item) for item in value.split(',') if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full copy cycles against the simulated broker")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick', help="Scenario matrix to run")
+    parser.add_argument('--targets', help="Comma-separated target terminal counts (overrides preset)")
+    parser.add_argument('--orders', help="Comma-separated source order counts (overrides preset)")
+    parser.add_argument('--change-rates', help="Comma-separated fractions of source orders changed per cycle")
+    parser.add_argument('--cycles', type=int, help="Measured cycles per scenario")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Simulated latency of every broker call")
+    parser.add_argument('--order-send-latency-ms', type=float, help="Simulated latency of order_send")
+    parser.add_argument('--no-skip', action='store_true', help="Disable skipping of unchanged terminals")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the peak memory measurement")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Compare against a previous JSON result file")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Wall time ratio counted as a regression")
+    args = parser.parse_args()
+
+    preset = PRESETS[args.preset]
+    targets = parse_list(args.targets, int) if args.targets else preset['targets']
+    orders = parse_list(args.orders, int) if args.orders else preset['orders']
+    change_rates = parse_list(args.change_rates, float) if args.change_rates else preset['change_rates']
+    cycles = args.cycles or preset['cycles']
+
+    latency = {'default': args.latency_ms / 1000.0}
+    if args.order_send_latency_ms is not None:
+        latency['order_send'] = args.order_send_latency_ms / 1000.0
+
+    # Keep the copier quiet - logging would dominate the measurements
+    logger = logging.getLogger('MT5_Copier_Bench')
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.ERROR)
+    logger.propagate = False
+
+    results = []
+    print(f"{'targets':>7} {'orders':>6} {'change':>6} {'wall ms':>9} {'plan ms':>8} {'io ms':>8} {'calls':>7} {'peak KiB':>9}")
+    for target_count in targets:
+        for order_count in orders:
+            for change_rate in change_rates:
+                result = run_scenario(target_count, order_count, change_rate, cycles, latency, args.seed,
+                                      not args.no_skip, not args.no_memory, logger)
+                results.append(result)
+                peak = f"{result['peak_memory_bytes'] / 1024:.0f}" if result['peak_memory_bytes'] is not None else "-"
+                print(f"{target_count:>7} {order_count:>6} {change_rate:>6} "
+                      f"{result['wall_seconds']['median'] * 1000:>9.2f} "
+                      f"{result['planning_cpu_seconds']['median'] * 1000:>8.2f} "
+                      f"{result['io_wall_seconds']['median'] * 1000:>8.2f} "
+                      f"{result['broker_calls_per_cycle']:>7.0f} {peak:>9}")
+
+    report = {
+        'meta': {
+            'commit': get_commit(),
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'latency': latency,
+            'skip_unchanged_terminals': not args.no_skip,
+            'seed': args.seed
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare and not compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# MT5 Pending Order Copier System - Record Memory Benchmark
+# This script compares the memory and time of converting and tracking orders as dictionaries and as slotted records
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+from typing import Dict, List, Any, Callable, Tuple
+
+# Add the order-copier directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_tracker import OrderTracker
+from records import OrderRecord
+from simulated_broker import TradeOrder, SimulatedBroker
+from utils import convert_mt5_time, get_order_type_name, get_current_timestamp
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'USDCAD', 'XAUUSD']
+
+def build_orders(count: int, seed: int) -> List[TradeOrder]:
+    """Create MT5-shaped pending orders"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    return [
+        TradeOrder(ticket=100000 + i, time_setup=now - rng.randint(0, 86400), time_expiration=0,
+                   type=rng.choice([2, 3, 4, 5]), type_time=0, state=SimulatedBroker.ORDER_STATE_PLACED,
+                   volume_initial=round(rng.uniform(0.01, 5.0), 2), volume_current=1.0,
+                   price_open=round(rng.uniform(1.0, 2.0), 5), sl=0.0, tp=0.0, symbol=rng.choice(SYMBOLS),
+                   comment='', magic=0, position_id=0)
+        for i in range(count)
+    ]
+
+def dict_layout_cycle(orders: List[TradeOrder]) -> Tuple[Any, Any]:
+    """Connector and tracker work of one cycle with the previous dictionary layout"""
+    converted = [{
+        'ticket': order.ticket,
+        'time_setup': convert_mt5_time(order.time_setup),
+        'time_expiration': convert_mt5_time(order.time_expiration) if order.time_expiration > 0 else None,
+        'type': order.type,
+        'type_name': get_order_type_name(order.type),
+        'type_time': order.type_time,
+        'state': order.state,
+        'volume_initial': order.volume_initial,
+        'volume_current': order.volume_current,
+        'price_open': order.price_open,
+        'sl': order.sl,
+        'tp': order.tp,
+        'symbol': order.symbol,
+        'comment': order.comment,
+        'magic': order.magic,
+        'position_id': order.position_id
+    } for order in orders]
+
+    tracked = {}
+    for order in converted:
+        tracked[str(order['ticket'])] = {
+            'ticket': order['ticket'],
+            'symbol': order['symbol'],
+            'type_name': order['type_name'],
+            'volume': order['volume_initial'],
+            'price_open': order['price_open'],
+            'sl': order['sl'],
+            'tp': order['tp'],
+            'time_setup': str(order['time_setup']),
+            'time_expiration': str(order['time_expiration']) if order['time_expiration'] else None,
+            'last_seen': get_current_timestamp()
+        }
+    return converted, tracked
+
+def record_layout_cycle(orders: List[TradeOrder], tracker: OrderTracker) -> Tuple[Any, Any]:
+    """Connector and tracker work of one cycle with slotted records"""
+    converted = [OrderRecord.from_mt5(order) for order in orders]
+    tracker.update_source_orders(converted)
+    return converted, tracker.state['source_orders']
+
+def measure(cycle: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    """Measure the memory retained by one cycle's results, its peak and the median cycle time"""
+    tracemalloc.start()
+    result = cycle()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cycle()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {'retained_bytes': retained, 'peak_bytes': peak, 'median_seconds': timings[len(timings) // 2]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare dictionary and slotted record memory per cycle")
+    parser.add_argument('--orders', type=int, default=10000, help="Number of pending orders")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed cycles per layout")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('MT5_Copier_Bench')
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.ERROR)
+    logger.propagate = False
+
+    orders = build_orders(args.orders, args.seed)
+    results = {
+        'dict': measure(lambda: dict_layout_cycle(orders), args.repeats),
+        # A fresh tracker per cycle, so each traced cycle stores all records instead of finding them unchanged
+        'records': measure(lambda: record_layout_cycle(orders, OrderTracker(state_file=None, logger=logger)),
+                           args.repeats)
+    }
+
+    print(f"{args.orders} orders")
+    print(f"{'layout':>8} {'retained KiB':>13} {'peak KiB':>9} {'cycle ms':>9}")
+    for layout, result in results.items():
+        print(f"{layout:>8} {result['retained_bytes'] / 1024:>13.0f} {result['peak_bytes'] / 1024:>9.0f} "
+              f"{result['median_seconds'] * 1000:>9.2f}")
+    ratio = results['dict']['retained_bytes'] / max(results['records']['retained_bytes'], 1)
+    print(f"\nRecords retain {ratio:.1f}x less memory than dictionaries")
+
+if __name__ == "__main__":
+    main()
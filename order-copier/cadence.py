@@ -0,0 +1,66 @@
+# MT5 Pending Order Copier System - Adaptive Cadence
+# This module picks the delay between iterations from recent source activity and market hours
+
+import logging
+from typing import Dict, Optional, Any, Callable
+
+from utils import setup_logging, is_market_hours
+
+class AdaptiveCadence:
+    """Shortens the interval after source changes and backs off while the book is quiet
+
+    A change resets the interval to min_seconds; every quiet iteration multiplies it by
+    backoff_factor, up to max_seconds. Outside market hours the interval is
+    closed_market_seconds, and the first iteration after the market opens runs at min_seconds.
+    """
+
+    def __init__(self, min_seconds: float = 1, max_seconds: float = 30, backoff_factor: float = 2.0,
+                 closed_market_seconds: float = 600, logger: Optional[logging.Logger] = None,
+                 market_open: Callable[[], bool] = is_market_hours):
+        self.logger = logger or setup_logging()
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.backoff_factor = backoff_factor
+        self.closed_market_seconds = closed_market_seconds
+        self.market_open = market_open
+        self.current_seconds = min_seconds
+        self.market_was_open = True
+        self.stats = {
+            'intervals': 0,
+            'changes': 0,
+            'backoffs': 0,
+            'closed_market_intervals': 0
+        }
+
+    def next_interval(self, changed: bool) -> float:
+        """Get the delay before the next iteration, given whether the last one saw a source change"""
+        self.stats['intervals'] += 1
+
+        if not self.market_open():
+            if self.market_was_open:
+                self.logger.info(f"Market closed, polling every {self.closed_market_seconds}s")
+            self.market_was_open = False
+            self.stats['closed_market_intervals'] += 1
+            self.current_seconds = self.min_seconds
+            return self.closed_market_seconds
+
+        if not self.market_was_open:
+            self.logger.info("Market open, resuming adaptive polling")
+            self.market_was_open = True
+        elif changed:
+            self.stats['changes'] += 1
+            self.current_seconds = self.min_seconds
+        else:
+            backed_off = min(self.max_seconds, self.current_seconds * self.backoff_factor)
+            if backed_off > self.current_seconds:
+                self.stats['backoffs'] += 1
+            self.current_seconds = backed_off
+
+        return self.current_seconds
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get interval counters and the current interval"""
+        stats = self.stats.copy()
+        stats['current_interval_seconds'] = self.current_seconds
+        stats['market_open'] = self.market_was_open
+        return stats
@@ -0,0 +1,219 @@
+# MT5 Pending Order Copier System - MT5 Call Supervisor
+# This module runs MetaTrader5 API calls in a supervised worker process with a deadline per call
+
+import time
+import signal
+import logging
+import importlib
+import multiprocessing
+from collections import deque
+from types import SimpleNamespace
+from typing import Dict, Optional, Any, Callable
+
+from utils import setup_logging, format_error_message
+
+# Call classes, each with its own deadline
+CALL_CONNECT = 'connect'
+CALL_FETCH = 'fetch'
+CALL_TRADE = 'trade'
+
+CONNECT_CALLS = frozenset({'initialize', 'login', 'shutdown'})
+TRADE_CALLS = frozenset({'order_send', 'order_check'})
+
+def get_call_class(call_name: str) -> str:
+    """Get the deadline class of a MetaTrader5 API function"""
+    if call_name in CONNECT_CALLS:
+        return CALL_CONNECT
+    if call_name in TRADE_CALLS:
+        return CALL_TRADE
+    return CALL_FETCH
+
+class MT5CallTimeout(Exception):
+    """An MT5 call did not return before its deadline"""
+
+    def __init__(self, terminal_name: Optional[str], call_name: str, timeout_seconds: float):
+        super().__init__(f"MT5 call {call_name} on {terminal_name or 'unknown terminal'} "
+                         f"timed out after {timeout_seconds}s")
+        self.terminal_name = terminal_name
+        self.call_name = call_name
+        self.timeout_seconds = timeout_seconds
+
+def _portable(value):
+    """Turn MT5 result records into plain objects that can be sent between processes"""
+    if hasattr(value, '_asdict'):
+        return SimpleNamespace(**{key: _portable(item) for key, item in value._asdict().items()})
+    if isinstance(value, tuple):
+        return tuple(_portable(item) for item in value)
+    return value
+
+def _call_worker_main(conn, mt5_module: Optional[str], backend=None) -> None:
+    """Call worker entry point - owns the MT5 session and runs the calls it receives"""
+    # The parent process handles Ctrl+C and stops the worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    api = backend if backend is not None else importlib.import_module(mt5_module or 'MetaTrader5')
+    constants = {name: getattr(api, name) for name in dir(api) if name.isupper()}
+    conn.send(('ready', constants))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        if message[0] == 'stop':
+            break
+
+        _, call_name, args, kwargs = message
+        try:
+            conn.send(('ok', _portable(getattr(api, call_name)(*args, **kwargs))))
+        except Exception as e:
+            conn.send(('error', format_error_message(e)))
+
+class SupervisedMT5:
+    """MetaTrader5 API whose calls run in a worker process under a deadline per call class
+
+    Functions are forwarded to the worker and constants are read from it once at start. A call
+    that misses its deadline (connect, fetch or trade) raises MT5CallTimeout; the hung worker is
+    killed and a new one started, so a stuck terminal costs one bounded timeout. The new worker
+    has no session, so on_restart is called to make the caller reconnect. Every timeout is
+    recorded with the terminal and call name.
+    """
+
+    def __init__(self, timeouts: Dict[str, float], logger: Optional[logging.Logger] = None,
+                 mt5_module: Optional[str] = None, backend=None, start_method: Optional[str] = None,
+                 on_restart: Optional[Callable[[], None]] = None):
+        self.logger = logger or setup_logging()
+        self.timeouts = timeouts
+        # Name of a module implementing the MetaTrader5 API, or an API object, to run in the worker
+        self.mt5_module = mt5_module
+        self.backend = backend
+        self.on_restart = on_restart
+        self.context = multiprocessing.get_context(start_method)
+        self.process = None
+        self.conn = None
+        self.constants = {}
+        self.terminal_name = None  # Terminal the current session belongs to, for timeout records
+        self.timeout_records = deque(maxlen=100)
+        self.stats = {
+            'calls': 0,
+            'timeouts': 0,
+            'restarts': 0,
+            'timeouts_by_class': {CALL_CONNECT: 0, CALL_FETCH: 0, CALL_TRADE: 0}
+        }
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the call worker is alive"""
+        return self.process is not None and self.process.is_alive()
+
+    def start(self) -> bool:
+        """Start the call worker and read the API constants from it"""
+        self._kill()
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_call_worker_main,
+            args=(child_conn, self.mt5_module, self.backend),
+            name="mt5-call-worker",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self.process, self.conn = process, parent_conn
+
+        try:
+            if parent_conn.poll(self.timeouts.get(CALL_CONNECT, 90)):
+                _, self.constants = parent_conn.recv()
+                return True
+        except (EOFError, OSError) as e:
+            self.logger.error(f"MT5 call worker failed to start: {format_error_message(e)}")
+
+        self._kill()
+        return False
+
+    def stop(self) -> None:
+        """Stop the call worker"""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(('stop',))
+            self.process.join(5)
+        except (EOFError, OSError, BrokenPipeError):
+            pass
+        self._kill()
+
+    def _kill(self) -> None:
+        """Terminate the call worker and forget it"""
+        process, conn = self.process, self.conn
+        self.process, self.conn = None, None
+        if process is None:
+            return
+        if process.is_alive():
+            process.terminate()
+            process.join(1)
+            if process.is_alive():
+                process.kill()
+                process.join(1)
+        conn.close()
+
+    def _restart(self) -> None:
+        """Replace a hung or dead call worker; the new worker starts without a session"""
+        self._kill()
+        self.stats['restarts'] += 1
+        self.start()
+        if self.on_restart:
+            self.on_restart()
+
+    def call(self, call_name: str, *args, **kwargs):
+        """Run one MetaTrader5 function in the call worker under its class deadline"""
+        if not self.is_running and not self.start():
+            raise ConnectionError("MT5 call worker is not running")
+
+        call_class = get_call_class(call_name)
+        timeout = self.timeouts.get(call_class)
+        self.stats['calls'] += 1
+        try:
+            self.conn.send(('call', call_name, args, kwargs))
+            if self.conn.poll(timeout):
+                status, value = self.conn.recv()
+                if status == 'error':
+                    raise RuntimeError(value)
+                return value
+        except (EOFError, OSError) as e:
+            self.logger.error(f"MT5 call worker lost during {call_name}: {format_error_message(e)}")
+            self._restart()
+            raise ConnectionError(f"MT5 call worker lost during {call_name}")
+
+        self.stats['timeouts'] += 1
+        self.stats['timeouts_by_class'][call_class] += 1
+        self.timeout_records.append({
+            'terminal': self.terminal_name,
+            'call': call_name,
+            'call_class': call_class,
+            'timeout_seconds': timeout,
+            'at': time.time()
+        })
+        self.logger.error(f"MT5 call {call_name} on {self.terminal_name} timed out after {timeout}s, "
+                          f"restarting call worker")
+        self._restart()
+        raise MT5CallTimeout(self.terminal_name, call_name, timeout)
+
+    def __getattr__(self, name: str):
+        """Forward MetaTrader5 functions and constants to the call worker"""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name.isupper():
+            if not self.constants and not self.is_running:
+                self.start()
+            try:
+                return self.constants[name]
+            except KeyError:
+                raise AttributeError(name) from None
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get call, timeout and restart counters with the recent timeouts"""
+        stats = self.stats.copy()
+        stats['timeouts_by_class'] = self.stats['timeouts_by_class'].copy()
+        stats['recent_timeouts'] = list(self.timeout_records)
+        return stats
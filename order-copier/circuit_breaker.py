@@ -0,0 +1,102 @@
+# MT5 Pending Order Copier System - Circuit Breakers
+# This module keeps unreachable target terminals out of the cycle until they are worth retrying
+
+import time
+import logging
+from typing import Dict, Optional, Any
+
+from utils import setup_logging
+
+# Breaker states
+STATE_CLOSED = 'closed'        # Terminal is processed every cycle
+STATE_OPEN = 'open'            # Terminal is skipped until the cooldown ends
+STATE_HALF_OPEN = 'half_open'  # One trial cycle decides between closed and open
+
+class CircuitBreakers:
+    """Per-terminal circuit breakers
+
+    A terminal that could not be reached in failure_threshold consecutive cycles is opened
+    and skipped for cooldown_seconds. The first cycle after the cooldown is a half-open
+    trial: success closes the breaker, failure opens it again with twice the cooldown, up to
+    max_cooldown_seconds. Only reachability counts - orders rejected by a live terminal do
+    not trip the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 60,
+                 max_cooldown_seconds: float = 900, logger: Optional[logging.Logger] = None,
+                 clock=time.monotonic):
+        self.logger = logger or setup_logging()
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max(max_cooldown_seconds, cooldown_seconds)
+        self.clock = clock
+        self.breakers = {}  # terminal_name -> breaker state
+
+    def _breaker(self, terminal_name: str) -> Dict[str, Any]:
+        """Get the breaker of a terminal, creating a closed one on first use"""
+        return self.breakers.setdefault(terminal_name, {
+            'state': STATE_CLOSED,
+            'consecutive_failures': 0,
+            'cooldown_seconds': self.cooldown_seconds,
+            'open_until': None,
+            'trips': 0,
+            'skipped_cycles': 0,
+            'last_error': None
+        })
+
+    def allow(self, terminal_name: str) -> bool:
+        """Check if the terminal should be processed this cycle; moves an open breaker past its cooldown to half-open"""
+        breaker = self._breaker(terminal_name)
+        if breaker['state'] != STATE_OPEN:
+            return True
+
+        if self.clock() >= breaker['open_until']:
+            breaker['state'] = STATE_HALF_OPEN
+            self.logger.info(f"Circuit breaker for {terminal_name} half-open, trying the terminal again")
+            return True
+
+        breaker['skipped_cycles'] += 1
+        return False
+
+    def record_success(self, terminal_name: str) -> None:
+        """Close the terminal's breaker after it was reached"""
+        breaker = self._breaker(terminal_name)
+        if breaker['state'] != STATE_CLOSED:
+            self.logger.info(f"Circuit breaker for {terminal_name} closed, terminal is reachable again")
+        breaker['state'] = STATE_CLOSED
+        breaker['consecutive_failures'] = 0
+        breaker['cooldown_seconds'] = self.cooldown_seconds
+        breaker['open_until'] = None
+
+    def record_failure(self, terminal_name: str, error: Optional[str] = None) -> None:
+        """Count a cycle in which the terminal could not be reached, opening the breaker when due"""
+        breaker = self._breaker(terminal_name)
+        breaker['consecutive_failures'] += 1
+        breaker['last_error'] = error
+
+        if breaker['state'] == STATE_HALF_OPEN:
+            # Failed trial - back off further before the next one
+            breaker['cooldown_seconds'] = min(breaker['cooldown_seconds'] * 2, self.max_cooldown_seconds)
+        elif breaker['consecutive_failures'] < self.failure_threshold:
+            return
+
+        breaker['state'] = STATE_OPEN
+        breaker['open_until'] = self.clock() + breaker['cooldown_seconds']
+        breaker['trips'] += 1
+        self.logger.warning(f"Circuit breaker for {terminal_name} open after {breaker['consecutive_failures']} failed cycles, "
+                            f"skipping the terminal for {breaker['cooldown_seconds']}s")
+
+    def get_state(self, terminal_name: str) -> str:
+        """Get the breaker state of a terminal"""
+        return self._breaker(terminal_name)['state']
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Get state, failure and skip counters per terminal"""
+        now = self.clock()
+        statistics = {}
+        for terminal_name, breaker in self.breakers.items():
+            stats = breaker.copy()
+            del stats['open_until']
+            stats['retry_in_seconds'] = max(0.0, breaker['open_until'] - now) if breaker['state'] == STATE_OPEN else 0.0
+            statistics[terminal_name] = stats
+        return statistics
@@ -3,6 +3,8 @@
 
 import os
 
+from scheduler import CronTrigger
+
 # Source Terminal Configuration
 SOURCE_TERMINAL = {
     'MT5_ACCOUNT': 123456789,
@@ -52,7 +54,10 @@ TARGET_TERMINALS = {
     #     'max_pending_orders': {
     #         'enabled': True,
     #         'max_orders': 30
-    #     }
+    #     },
+    #     'filter_target_records': False,  # Only retrieve copies on mapped symbols from this terminal
+    #     'schedule': {'timeframe': 'H1', 'offset_seconds': 60},  # Own trigger in scheduled mode: timeframe, {'interval_seconds': 300} or {'cron': '*/15 8-17 * * 1-5'}
+    #     'priority': 1  # Lower runs first when jobs are due together
     # },
     'terminal_2': {
         'MT5_ACCOUNT': 987654321,
@@ -91,7 +96,8 @@ TARGET_TERMINALS = {
         'max_pending_orders': {
             'enabled': True,
             'max_orders': 30
-        }
+        },
+        'filter_target_records': False  # Only retrieve copies on mapped symbols from this terminal
     },
     'terminal_3': {
         'MT5_ACCOUNT': 111222333,
@@ -130,7 +136,8 @@ TARGET_TERMINALS = {
         'max_pending_orders': {
             'enabled': True,
             'max_orders': 30
-        }
+        },
+        'filter_target_records': False  # Only retrieve copies on mapped symbols from this terminal
     }
 }
 
@@ -148,6 +155,34 @@ ENABLE_CONTINUOUS_MODE = False    # Set to True for continuous operation with de
 CONTINUOUS_DELAY_SECONDS = 500     # Delay in seconds between continuous iterations
 CONTINUOUS_MAX_RUNTIME_HOURS = 0 # Maximum runtime in hours (0 = unlimited)
 
+# Task Schedule Configuration (continuous mode)
+# Runs new-order copying, SL/TP sync, orphan sweeps and the statistics dump on their own timers
+# instead of running everything every CONTINUOUS_DELAY_SECONDS
+TASK_SCHEDULE_CONFIG = {
+    'enabled': False,              # Use separate timers for the tasks below
+    'copy_seconds': 5,             # New-order copying and order modifications
+    'sltp_seconds': 5,             # Position SL/TP synchronization
+    'orphan_seconds': None,        # Orphan sweeps (None = shortest orphan_check_interval of the target terminals)
+    'statistics_seconds': 300      # Statistics dump
+}
+
+# Watcher Mode Configuration (takes precedence over the other modes when enabled)
+ENABLE_WATCHER_MODE = False       # Set to True to run a cycle as soon as the source orders/positions change
+WATCHER_POLL_SECONDS = 0.5        # Delay in seconds between polls of the source change signature
+WATCHER_FULL_CYCLE_SECONDS = 60   # Run a full cycle at least this often even when the source is unchanged
+WATCHER_HASH_CHECK_SECONDS = 0    # Hash the full source lists every poll (0), or at most this often while the order/position counts are unchanged - delays detection of edits
+
+# Adaptive Cadence Configuration (continuous and watcher mode)
+# Replaces CONTINUOUS_DELAY_SECONDS / WATCHER_POLL_SECONDS with an interval that drops to min_seconds
+# after a source change and backs off while the source is quiet
+ADAPTIVE_CADENCE_CONFIG = {
+    'enabled': False,              # Adapt the delay between iterations to source activity and market hours
+    'min_seconds': 1,              # Delay right after a source change
+    'max_seconds': 30,             # Longest delay while the market is open and the source is quiet
+    'backoff_factor': 2.0,         # Multiply the delay by this after every quiet iteration
+    'closed_market_seconds': 600   # Delay outside forex market hours (Friday 17:00 to Sunday 17:00 local time)
+}
+
 # =============================================================================
 # LOGGING CONFIGURATION
 # =============================================================================
@@ -162,11 +197,36 @@ LOGGING_CONFIG = {
 
 # System Configuration
 SYSTEM_CONFIG = {
-    'connection_timeout': 90,      # seconds
+    'connection_timeout': 90,      # seconds - deadline for MT5 initialize/login/shutdown calls
+    'fetch_timeout': 30,           # seconds - deadline for MT5 calls reading orders, positions and account data
+    'trade_timeout': 30,           # seconds - deadline for MT5 order_send calls
+    'supervise_mt5_calls': True,   # Run MT5 calls in a worker process that is killed and restarted when a call hangs
     'max_retries': 5,
     'retry_delay': 5,              # seconds
     'log_level': 'INFO',           # DEBUG, INFO, WARNING, ERROR (deprecated - use LOGGING_CONFIG)
-    'log_file': 'mt5_copier.log'   # (deprecated - use LOGGING_CONFIG)
+    'log_file': 'mt5_copier.log',  # (deprecated - use LOGGING_CONFIG)
+    'circuit_breaker_enabled': True,             # Skip target terminals that keep failing to connect
+    'circuit_breaker_failure_threshold': 3,      # Consecutive failed cycles before a terminal is skipped
+    'circuit_breaker_cooldown_seconds': 60,      # Skip time before the terminal is tried again
+    'circuit_breaker_max_cooldown_seconds': 900  # Cooldown doubles after each failed retry, up to this
+}
+
+# Performance Configuration
+PERFORMANCE_CONFIG = {
+    'parallel_terminals': False,   # Process each target terminal in its own worker process
+    'persistent_sessions': True,   # Keep terminal sessions open between cycles (one per process - needs parallel_terminals to keep target sessions)
+    'cache_symbol_info': True,     # Cache symbol information per terminal
+    'cache_duration_seconds': 300, # Symbol cache time-to-live in seconds
+    'worker_timeout_seconds': 120, # Maximum time to wait for a worker to finish one cycle
+    'skip_unchanged_terminals': True,    # Skip terminals when neither source nor target changed
+    'full_check_interval_seconds': 300,  # Force a full check of skipped terminals this often
+    'tracker_backend': 'json',           # Tracker state storage: 'json' or 'sqlite' (order_tracker_state.db)
+    'tracker_journal': True,             # JSON backend: append changes to an event journal between snapshots
+    'journal_compact_events': 1000,      # Rewrite the state snapshot after this many journal events
+    'placement_journal_dir': 'placement_journal',  # Directory of the order placement journals, relative to the tracker state file (None to disable)
+    'background_state_writer': True,     # Write tracker state on a background thread instead of at the end of each cycle
+    'state_writer_debounce_seconds': 1.0, # Collect state changes this long before writing them
+    'vectorized_planning_min_orders': 200 # Compare orders with NumPy from this many target orders (None to disable)
 }
 
 # Configuration Loading Function
@@ -185,8 +245,15 @@ def load_config(config_path=None):
         'ENABLE_CONTINUOUS_MODE': ENABLE_CONTINUOUS_MODE,
         'CONTINUOUS_DELAY_SECONDS': CONTINUOUS_DELAY_SECONDS,
         'CONTINUOUS_MAX_RUNTIME_HOURS': CONTINUOUS_MAX_RUNTIME_HOURS,
+        'TASK_SCHEDULE_CONFIG': TASK_SCHEDULE_CONFIG,
+        'ENABLE_WATCHER_MODE': ENABLE_WATCHER_MODE,
+        'WATCHER_POLL_SECONDS': WATCHER_POLL_SECONDS,
+        'WATCHER_FULL_CYCLE_SECONDS': WATCHER_FULL_CYCLE_SECONDS,
+        'WATCHER_HASH_CHECK_SECONDS': WATCHER_HASH_CHECK_SECONDS,
+        'ADAPTIVE_CADENCE_CONFIG': ADAPTIVE_CADENCE_CONFIG,
         'LOGGING_CONFIG': LOGGING_CONFIG,
-        'SYSTEM_CONFIG': SYSTEM_CONFIG
+        'SYSTEM_CONFIG': SYSTEM_CONFIG,
+        'PERFORMANCE_CONFIG': PERFORMANCE_CONFIG
     }
 
 # Validation Functions
@@ -204,8 +271,15 @@ def validate_config(config=None):
         enable_continuous_mode = config.get('ENABLE_CONTINUOUS_MODE', True)
         continuous_delay_seconds = config.get('CONTINUOUS_DELAY_SECONDS', 5)
         continuous_max_runtime_hours = config.get('CONTINUOUS_MAX_RUNTIME_HOURS', 0)
+        task_schedule_config = config.get('TASK_SCHEDULE_CONFIG', {})
+        enable_watcher_mode = config.get('ENABLE_WATCHER_MODE', False)
+        watcher_poll_seconds = config.get('WATCHER_POLL_SECONDS', 0.5)
+        watcher_full_cycle_seconds = config.get('WATCHER_FULL_CYCLE_SECONDS', 60)
+        watcher_hash_check_seconds = config.get('WATCHER_HASH_CHECK_SECONDS', 0)
+        adaptive_cadence_config = config.get('ADAPTIVE_CADENCE_CONFIG', {})
         logging_config = config.get('LOGGING_CONFIG', {})
         system_config = config.get('SYSTEM_CONFIG', {})
+        performance_config = config.get('PERFORMANCE_CONFIG', {})
     else:
         source_terminal = SOURCE_TERMINAL
         target_terminals = TARGET_TERMINALS
@@ -215,8 +289,15 @@ def validate_config(config=None):
         enable_continuous_mode = ENABLE_CONTINUOUS_MODE
         continuous_delay_seconds = CONTINUOUS_DELAY_SECONDS
         continuous_max_runtime_hours = CONTINUOUS_MAX_RUNTIME_HOURS
+        task_schedule_config = TASK_SCHEDULE_CONFIG
+        enable_watcher_mode = ENABLE_WATCHER_MODE
+        watcher_poll_seconds = WATCHER_POLL_SECONDS
+        watcher_full_cycle_seconds = WATCHER_FULL_CYCLE_SECONDS
+        watcher_hash_check_seconds = WATCHER_HASH_CHECK_SECONDS
+        adaptive_cadence_config = ADAPTIVE_CADENCE_CONFIG
         logging_config = LOGGING_CONFIG
         system_config = SYSTEM_CONFIG
+        performance_config = PERFORMANCE_CONFIG
 
     # Validate source terminal
     if not source_terminal.get('MT5_ACCOUNT'):
@@ -232,6 +313,8 @@ def validate_config(config=None):
     if not target_terminals:
         errors.append("At least one target terminal must be configured")
     
+    valid_timeframes = ['M1', 'M5', 'M10', 'M15', 'M30', 'H1', 'H4', 'D1']
+    
     for terminal_name, terminal_config in target_terminals.items():
         # Required fields
         required_fields = ['MT5_ACCOUNT', 'MT5_PASSWORD', 'MT5_SERVER', 'MT5_TERMINAL_PATH']
@@ -279,6 +362,35 @@ def validate_config(config=None):
             max_orders = max_orders_config.get('max_orders')
             if not isinstance(max_orders, int) or max_orders <= 0:
                 errors.append(f"Terminal {terminal_name}: max_orders must be a positive integer when enabled")
+        
+        # Target record filtering validation
+        if not isinstance(terminal_config.get('filter_target_records', False), bool):
+            errors.append(f"Terminal {terminal_name}: filter_target_records must be a boolean")
+        
+        # Own schedule validation (scheduled mode)
+        schedule = terminal_config.get('schedule')
+        if schedule is not None:
+            triggers = [key for key in ('timeframe', 'interval_seconds', 'cron') if key in schedule] if isinstance(schedule, dict) else []
+            if len(triggers) != 1:
+                errors.append(f"Terminal {terminal_name}: schedule must set exactly one of timeframe, interval_seconds or cron")
+            elif 'timeframe' in schedule:
+                if schedule['timeframe'] not in valid_timeframes:
+                    errors.append(f"Terminal {terminal_name}: schedule timeframe must be one of: {', '.join(valid_timeframes)}")
+                offset = schedule.get('offset_seconds', 0)
+                if not isinstance(offset, int) or offset < 0:
+                    errors.append(f"Terminal {terminal_name}: schedule offset_seconds must be a non-negative integer")
+            elif 'interval_seconds' in schedule:
+                interval = schedule['interval_seconds']
+                if not isinstance(interval, (int, float)) or interval <= 0:
+                    errors.append(f"Terminal {terminal_name}: schedule interval_seconds must be a positive number")
+            else:
+                try:
+                    CronTrigger(schedule['cron'])
+                except (ValueError, AttributeError) as e:
+                    errors.append(f"Terminal {terminal_name}: schedule cron is invalid: {e}")
+        
+        if not isinstance(terminal_config.get('priority', 0), int):
+            errors.append(f"Terminal {terminal_name}: priority must be an integer")
     
     # Validate scheduling configuration
     if not isinstance(enable_scheduling, bool):
@@ -286,7 +398,6 @@ def validate_config(config=None):
     
     if enable_scheduling:
         # Validate schedule timeframe
-        valid_timeframes = ['M1', 'M5', 'M10', 'M15', 'M30', 'H1', 'H4', 'D1']
         if schedule_timeframe not in valid_timeframes:
             errors.append(f"SCHEDULE_TIMEFRAME must be one of: {', '.join(valid_timeframes)}")
         
@@ -307,6 +418,48 @@ def validate_config(config=None):
         if not isinstance(continuous_max_runtime_hours, (int, float)) or continuous_max_runtime_hours < 0:
             errors.append("CONTINUOUS_MAX_RUNTIME_HOURS must be a non-negative number")
     
+    # Validate task schedule configuration
+    if not isinstance(task_schedule_config.get('enabled', False), bool):
+        errors.append("TASK_SCHEDULE_CONFIG enabled must be a boolean")
+    
+    for key in ('copy_seconds', 'sltp_seconds', 'orphan_seconds', 'statistics_seconds'):
+        value = task_schedule_config.get(key)  # None uses the default interval
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0):
+            errors.append(f"TASK_SCHEDULE_CONFIG {key} must be a positive number or None")
+    
+    # Validate watcher mode configuration
+    if not isinstance(enable_watcher_mode, bool):
+        errors.append("ENABLE_WATCHER_MODE must be a boolean")
+    
+    if enable_watcher_mode:
+        if not isinstance(watcher_poll_seconds, (int, float)) or watcher_poll_seconds <= 0:
+            errors.append("WATCHER_POLL_SECONDS must be a positive number")
+        
+        if not isinstance(watcher_full_cycle_seconds, (int, float)) or watcher_full_cycle_seconds <= 0:
+            errors.append("WATCHER_FULL_CYCLE_SECONDS must be a positive number")
+        
+        if not isinstance(watcher_hash_check_seconds, (int, float)) or watcher_hash_check_seconds < 0:
+            errors.append("WATCHER_HASH_CHECK_SECONDS must be a non-negative number")
+    
+    # Validate adaptive cadence configuration
+    if not isinstance(adaptive_cadence_config.get('enabled', False), bool):
+        errors.append("ADAPTIVE_CADENCE_CONFIG enabled must be a boolean")
+    
+    cadence_min = adaptive_cadence_config.get('min_seconds', 1)
+    cadence_max = adaptive_cadence_config.get('max_seconds', 30)
+    if not isinstance(cadence_min, (int, float)) or cadence_min <= 0:
+        errors.append("ADAPTIVE_CADENCE_CONFIG min_seconds must be a positive number")
+    elif not isinstance(cadence_max, (int, float)) or cadence_max < cadence_min:
+        errors.append("ADAPTIVE_CADENCE_CONFIG max_seconds must be a number not less than min_seconds")
+    
+    backoff_factor = adaptive_cadence_config.get('backoff_factor', 2.0)
+    if not isinstance(backoff_factor, (int, float)) or backoff_factor < 1:
+        errors.append("ADAPTIVE_CADENCE_CONFIG backoff_factor must be a number of at least 1")
+    
+    closed_market_seconds = adaptive_cadence_config.get('closed_market_seconds', 600)
+    if not isinstance(closed_market_seconds, (int, float)) or closed_market_seconds <= 0:
+        errors.append("ADAPTIVE_CADENCE_CONFIG closed_market_seconds must be a positive number")
+    
     # Note: When both execution modes are disabled, system runs once and exits
     
     # Validate logging config
@@ -329,6 +482,14 @@ def validate_config(config=None):
     timeout = system_config.get('connection_timeout', 30)
     if not isinstance(timeout, int) or timeout <= 0:
         errors.append("System connection_timeout must be a positive integer")
+    
+    for key in ('fetch_timeout', 'trade_timeout'):
+        call_timeout = system_config.get(key, 30)
+        if not isinstance(call_timeout, (int, float)) or call_timeout <= 0:
+            errors.append(f"System {key} must be a positive number")
+    
+    if not isinstance(system_config.get('supervise_mt5_calls', True), bool):
+        errors.append("System supervise_mt5_calls must be a boolean")
 
     retries = system_config.get('max_retries', 3)
     if not isinstance(retries, int) or retries < 0:
@@ -338,6 +499,81 @@ def validate_config(config=None):
     if not isinstance(delay, (int, float)) or delay < 0:
         errors.append("System retry_delay must be a non-negative number")
     
+    if not isinstance(system_config.get('circuit_breaker_enabled', True), bool):
+        errors.append("System circuit_breaker_enabled must be a boolean")
+    
+    failure_threshold = system_config.get('circuit_breaker_failure_threshold', 3)
+    if not isinstance(failure_threshold, int) or failure_threshold <= 0:
+        errors.append("System circuit_breaker_failure_threshold must be a positive integer")
+    
+    cooldown = system_config.get('circuit_breaker_cooldown_seconds', 60)
+    if not isinstance(cooldown, (int, float)) or cooldown <= 0:
+        errors.append("System circuit_breaker_cooldown_seconds must be a positive number")
+    
+    max_cooldown = system_config.get('circuit_breaker_max_cooldown_seconds', 900)
+    if not isinstance(max_cooldown, (int, float)) or max_cooldown <= 0:
+        errors.append("System circuit_breaker_max_cooldown_seconds must be a positive number")
+    elif isinstance(cooldown, (int, float)) and max_cooldown < cooldown:
+        errors.append("System circuit_breaker_max_cooldown_seconds must not be less than circuit_breaker_cooldown_seconds")
+    
+    # Validate performance config
+    parallel_terminals = performance_config.get('parallel_terminals', False)
+    if not isinstance(parallel_terminals, bool):
+        errors.append("PERFORMANCE_CONFIG parallel_terminals must be a boolean")
+    
+    persistent_sessions = performance_config.get('persistent_sessions', True)
+    if not isinstance(persistent_sessions, bool):
+        errors.append("PERFORMANCE_CONFIG persistent_sessions must be a boolean")
+    
+    cache_symbol_info = performance_config.get('cache_symbol_info', True)
+    if not isinstance(cache_symbol_info, bool):
+        errors.append("PERFORMANCE_CONFIG cache_symbol_info must be a boolean")
+    
+    cache_duration = performance_config.get('cache_duration_seconds', 300)
+    if not isinstance(cache_duration, (int, float)) or cache_duration < 0:
+        errors.append("PERFORMANCE_CONFIG cache_duration_seconds must be a non-negative number")
+    
+    worker_timeout = performance_config.get('worker_timeout_seconds', 120)
+    if not isinstance(worker_timeout, (int, float)) or worker_timeout <= 0:
+        errors.append("PERFORMANCE_CONFIG worker_timeout_seconds must be a positive number")
+    
+    skip_unchanged = performance_config.get('skip_unchanged_terminals', True)
+    if not isinstance(skip_unchanged, bool):
+        errors.append("PERFORMANCE_CONFIG skip_unchanged_terminals must be a boolean")
+    
+    full_check_interval = performance_config.get('full_check_interval_seconds', 300)
+    if not isinstance(full_check_interval, (int, float)) or full_check_interval < 0:
+        errors.append("PERFORMANCE_CONFIG full_check_interval_seconds must be a non-negative number")
+    
+    tracker_backend = performance_config.get('tracker_backend', 'json')
+    if tracker_backend not in ('json', 'sqlite'):
+        errors.append("PERFORMANCE_CONFIG tracker_backend must be 'json' or 'sqlite'")
+    
+    tracker_journal = performance_config.get('tracker_journal', True)
+    if not isinstance(tracker_journal, bool):
+        errors.append("PERFORMANCE_CONFIG tracker_journal must be a boolean")
+    
+    compact_events = performance_config.get('journal_compact_events', 1000)
+    if not isinstance(compact_events, int) or isinstance(compact_events, bool) or compact_events <= 0:
+        errors.append("PERFORMANCE_CONFIG journal_compact_events must be a positive integer")
+    
+    placement_journal_dir = performance_config.get('placement_journal_dir', 'placement_journal')
+    if placement_journal_dir is not None and not isinstance(placement_journal_dir, str):
+        errors.append("PERFORMANCE_CONFIG placement_journal_dir must be a directory path or None")
+    
+    background_state_writer = performance_config.get('background_state_writer', True)
+    if not isinstance(background_state_writer, bool):
+        errors.append("PERFORMANCE_CONFIG background_state_writer must be a boolean")
+    
+    debounce_seconds = performance_config.get('state_writer_debounce_seconds', 1.0)
+    if not isinstance(debounce_seconds, (int, float)) or debounce_seconds < 0:
+        errors.append("PERFORMANCE_CONFIG state_writer_debounce_seconds must be a non-negative number")
+    
+    vectorize_min_orders = performance_config.get('vectorized_planning_min_orders', 200)
+    if vectorize_min_orders is not None and (not isinstance(vectorize_min_orders, int)
+                                             or isinstance(vectorize_min_orders, bool) or vectorize_min_orders < 0):
+        errors.append("PERFORMANCE_CONFIG vectorized_planning_min_orders must be a non-negative integer or None")
+    
     return len(errors) == 0, errors
 
 def get_terminal_config(terminal_name):
@@ -364,6 +600,10 @@ def get_schedule_offset_seconds():
     """Get schedule offset in seconds"""
     return SCHEDULE_OFFSET_SECONDS
 
+def is_watcher_mode_enabled():
+    """Check if watcher mode is enabled"""
+    return ENABLE_WATCHER_MODE
+
 def get_continuous_delay_seconds():
     """Get continuous mode delay in seconds"""
     return CONTINUOUS_DELAY_SECONDS
\ No newline at end of file
@@ -63,7 +63,15 @@ TARGET_TERMINALS = {
         'max_pending_orders': {
             'enabled': True,
             'max_orders': 50                                       # Maximum number of pending orders
-        }
+        },
+        
+        # Only retrieve copies on mapped symbols (accounts shared with manual trading or other EAs)
+        # When enabled, only mapped symbols are copied - list identity mappings such as 'EURUSD': 'EURUSD' too
+        'filter_target_records': False,
+        
+        # Own reconciliation schedule in scheduled mode (omit to follow SCHEDULE_TIMEFRAME)
+        # 'schedule': {'timeframe': 'H1', 'offset_seconds': 60},  # Or {'interval_seconds': 300} or {'cron': '*/15 8-17 * * 1-5'}
+        'priority': 1                                              # Lower runs first when jobs are due together
     },
     
     # Example Terminal 2 - Aggressive Copy
@@ -169,6 +177,30 @@ SCHEDULE_OFFSET_SECONDS = 60                                       # Offset from
 CONTINUOUS_DELAY_SECONDS = 5                                       # Delay between iterations
 CONTINUOUS_MAX_RUNTIME_HOURS = 0                                   # 0 = unlimited runtime
 
+# Task timers (continuous mode) - copying, SL/TP sync, orphan sweeps and statistics on separate intervals
+TASK_SCHEDULE_CONFIG = {
+    'enabled': False,                                             # Use separate timers instead of CONTINUOUS_DELAY_SECONDS
+    'copy_seconds': 5,                                            # New-order copying and order modifications
+    'sltp_seconds': 5,                                            # Position SL/TP synchronization
+    'orphan_seconds': None,                                       # Orphan sweeps (None = shortest orphan_check_interval)
+    'statistics_seconds': 300                                     # Statistics dump
+}
+
+# Watcher mode parameters (takes precedence over the other modes when enabled)
+ENABLE_WATCHER_MODE = False                                        # Run a cycle as soon as the source orders/positions change
+WATCHER_POLL_SECONDS = 0.5                                         # Delay between polls of the source change signature
+WATCHER_FULL_CYCLE_SECONDS = 60                                    # Full cycle at least this often when the source is unchanged
+WATCHER_HASH_CHECK_SECONDS = 0                                     # 0 = hash the full source lists every poll; higher values delay detection of edits
+
+# Adaptive cadence (continuous and watcher mode) - replaces the fixed delay/poll interval when enabled
+ADAPTIVE_CADENCE_CONFIG = {
+    'enabled': False,                                             # Adapt the delay to source activity and market hours
+    'min_seconds': 1,                                             # Delay right after a source change
+    'max_seconds': 30,                                            # Longest delay while the source is quiet
+    'backoff_factor': 2.0,                                        # Delay multiplier per quiet iteration
+    'closed_market_seconds': 600                                  # Delay outside forex market hours
+}
+
 # =============================================================================
 # LOGGING CONFIGURATION
 # =============================================================================
@@ -188,8 +220,16 @@ SYSTEM_CONFIG = {
     'connection_retry_attempts': 3,                               # Number of connection retry attempts
     'connection_retry_delay': 5,                                  # Delay between retry attempts in seconds
     'order_operation_timeout': 30,                               # Timeout for order operations in seconds
+    'connection_timeout': 90,                                    # Deadline for MT5 initialize/login/shutdown calls in seconds
+    'fetch_timeout': 30,                                         # Deadline for MT5 calls reading orders, positions and account data
+    'trade_timeout': 30,                                         # Deadline for MT5 order_send calls in seconds
+    'supervise_mt5_calls': True,                                 # Kill and restart the MT5 call worker when a call hangs
     'price_tolerance': 1e-5,                                     # Price comparison tolerance
-    'volume_tolerance': 1e-6                                     # Volume comparison tolerance
+    'volume_tolerance': 1e-6,                                    # Volume comparison tolerance
+    'circuit_breaker_enabled': True,                             # Skip target terminals that keep failing to connect
+    'circuit_breaker_failure_threshold': 3,                      # Consecutive failed cycles before a terminal is skipped
+    'circuit_breaker_cooldown_seconds': 60,                      # Skip time before the terminal is tried again
+    'circuit_breaker_max_cooldown_seconds': 900                  # Cooldown doubles after each failed retry, up to this
 }
 
 # =============================================================================
@@ -213,8 +253,19 @@ SYMBOL_FILTERS = {
 PERFORMANCE_CONFIG = {
     'batch_size': 10,                                            # Number of orders to process in batch
     'parallel_terminals': False,                                 # Process terminals in parallel (experimental)
+    'persistent_sessions': True,                                 # Keep terminal sessions open between cycles (target sessions only with parallel_terminals)
+    'worker_timeout_seconds': 120,                               # Maximum time to wait for a terminal worker per cycle
     'cache_symbol_info': True,                                   # Cache symbol information
-    'cache_duration_seconds': 300                                # Cache duration in seconds
+    'cache_duration_seconds': 300,                               # Cache duration in seconds
+    'skip_unchanged_terminals': True,                            # Skip terminals when nothing changed since the last cycle
+    'full_check_interval_seconds': 300,                          # Force a full check of skipped terminals this often
+    'tracker_backend': 'json',                                   # Tracker state storage: 'json' or 'sqlite' (order_tracker_state.db)
+    'tracker_journal': True,                                     # JSON backend: append changes to an event journal between snapshots
+    'journal_compact_events': 1000,                              # Rewrite the state snapshot after this many journal events
+    'placement_journal_dir': 'placement_journal',                # Directory of the order placement journals, relative to the tracker state file (None to disable)
+    'background_state_writer': True,                             # Write tracker state on a background thread instead of at the end of each cycle
+    'state_writer_debounce_seconds': 1.0,                        # Collect state changes this long before writing them
+    'vectorized_planning_min_orders': 200                        # Compare orders with NumPy from this many target orders (None to disable)
 }
 
 # =============================================================================
@@ -0,0 +1,114 @@
+# MT5 Pending Order Copier System - State Fingerprints
+# This module detects unchanged source and target state so idle terminals can be skipped
+
+import time
+import hashlib
+from typing import Dict, List, Optional, Any, Tuple
+
+# Fields that influence reconciliation - prices, profit and timestamps that move on their own are left out
+ORDER_FINGERPRINT_FIELDS = ('ticket', 'magic', 'symbol', 'type', 'volume_initial', 'price_open', 'sl', 'tp', 'time_expiration')
+POSITION_FINGERPRINT_FIELDS = ('ticket', 'magic', 'symbol', 'type', 'volume', 'sl', 'tp')
+
+# Fields of raw MT5 records hashed by the source watcher between cycles
+ORDER_SIGNATURE_FIELDS = ('ticket', 'price_open', 'volume_initial', 'sl', 'tp', 'time_expiration')
+POSITION_SIGNATURE_FIELDS = ('ticket', 'volume', 'sl', 'tp')
+
+def compute_fingerprint(orders: List[Dict[str, Any]], positions: List[Dict[str, Any]]) -> str:
+    """Hash the reconciliation-relevant fields of a set of orders and positions"""
+    digest = hashlib.blake2b(digest_size=16)
+    for fields, records in ((ORDER_FINGERPRINT_FIELDS, orders), (POSITION_FINGERPRINT_FIELDS, positions)):
+        for record in sorted(records, key=lambda r: r['ticket']):
+            digest.update(repr(tuple(record.get(field) for field in fields)).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+def compute_change_signature(orders, positions) -> Tuple[int, int, str]:
+    """Count and hash raw MT5 orders and positions without converting them to records"""
+    digest = hashlib.blake2b(digest_size=16)
+    for fields, records in ((ORDER_SIGNATURE_FIELDS, orders), (POSITION_SIGNATURE_FIELDS, positions)):
+        for record in sorted(records, key=lambda r: r.ticket):
+            digest.update(repr(tuple(getattr(record, field) for field in fields)).encode())
+        digest.update(b'|')
+    return len(orders), len(positions), digest.hexdigest()
+
+class TerminalFingerprints:
+    """Remembers the source and target state each terminal was last reconciled in
+
+    A terminal is recorded only after a cycle that planned no actions, i.e. when the target
+    is known to match the source. While the source fingerprint is unchanged and the forced
+    full check is not yet due, the terminal can be skipped.
+    """
+
+    def __init__(self, full_check_interval_seconds: float = 300, clock=time.monotonic):
+        self.full_check_interval_seconds = full_check_interval_seconds
+        self.clock = clock
+        self.entries = {}  # terminal_name -> reconciled state
+        self.stats = {
+            'skipped': 0,
+            'forced_checks': 0,
+            'probe_mismatches': 0,
+            'target_drift': 0
+        }
+
+    def is_unchanged(self, terminal_name: str, source_fingerprint: str) -> bool:
+        """Check if the terminal was reconciled against this source state and no full check is due"""
+        entry = self.entries.get(terminal_name)
+        if entry is None or entry['source'] != source_fingerprint:
+            return False
+
+        if self.clock() - entry['checked_at'] >= self.full_check_interval_seconds:
+            self.stats['forced_checks'] += 1
+            return False
+
+        return True
+
+    def matches_totals(self, terminal_name: str, orders_total: int, positions_total: int) -> bool:
+        """Compare live order/position counts with those recorded for the terminal"""
+        entry = self.entries.get(terminal_name)
+        if entry is None:
+            return False
+
+        if (orders_total, positions_total) != (entry['orders_total'], entry['positions_total']):
+            self.stats['probe_mismatches'] += 1
+            return False
+
+        return True
+
+    def record_skip(self) -> None:
+        """Count a skipped terminal"""
+        self.stats['skipped'] += 1
+
+    def record(self, terminal_name: str, source_fingerprint: str,
+               target_orders: List[Dict[str, Any]], target_positions: List[Dict[str, Any]],
+               totals: Optional[Tuple[int, int]] = None) -> None:
+        """Store the state of a terminal that is in sync with the source
+
+        totals are the account-wide order/position counts the probe compares against; they default
+        to the number of target records, which differs when only part of the account was retrieved.
+        """
+        target_fingerprint = compute_fingerprint(target_orders, target_positions)
+        previous = self.entries.get(terminal_name)
+        if previous and previous['source'] == source_fingerprint and previous['target'] != target_fingerprint:
+            # The target changed while the source did not - e.g. manual edits on the target
+            self.stats['target_drift'] += 1
+
+        self.entries[terminal_name] = {
+            'source': source_fingerprint,
+            'target': target_fingerprint,
+            'orders_total': totals[0] if totals else len(target_orders),
+            'positions_total': totals[1] if totals else len(target_positions),
+            'checked_at': self.clock()
+        }
+
+    def invalidate(self, terminal_name: Optional[str] = None) -> None:
+        """Forget one terminal, or all terminals when none is given"""
+        if terminal_name is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(terminal_name, None)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get skip counters and the number of terminals currently in sync"""
+        stats = self.stats.copy()
+        stats['terminals_in_sync'] = len(self.entries)
+        return stats
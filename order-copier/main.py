@@ -15,12 +15,18 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import load_config, validate_config
 from order_manager import OrderManager
-from scheduling_utils import calculate_next_execution_time, get_time_until_next_execution
+from source_watcher import SourceWatcher
+from cadence import AdaptiveCadence
+from reconciliation import TASK_COPY, TASK_SLTP, TASK_ORPHANS, ALL_TASKS
+from scheduler import DeadlineScheduler, JobScheduler, build_terminal_jobs
 from utils import (
     setup_logging, format_error_message, get_current_timestamp,
     ensure_directory_exists
 )
 
+# Task run on its own timer next to the reconciliation tasks
+TASK_STATISTICS = 'statistics'
+
 class MT5OrderCopierApp:
     """Main application class for MT5 Order Copier"""
     
@@ -32,6 +38,9 @@ class MT5OrderCopierApp:
         self.running = False
         self.shutdown_requested = False
         
+        # Monotonic deadlines for all run modes - stop() wakes a waiting loop immediately
+        self.scheduler = DeadlineScheduler()
+        
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -81,9 +90,13 @@ class MT5OrderCopierApp:
             # Get execution configuration (Claude-style)
             enable_scheduling = self.config.get('ENABLE_SCHEDULING', False)
             enable_continuous_mode = self.config.get('ENABLE_CONTINUOUS_MODE', True)
+            enable_watcher_mode = self.config.get('ENABLE_WATCHER_MODE', False)
             
             # Determine execution mode based on configuration
-            if enable_continuous_mode and enable_scheduling:
+            if enable_watcher_mode:
+                # Watcher mode reacts to source changes - it replaces the fixed delay and the schedule
+                return self._run_watcher_mode()
+            elif enable_continuous_mode and enable_scheduling:
                 # Both enabled - prioritize continuous mode as per plan
                 self.logger.info("Both scheduling and continuous mode enabled - running in continuous mode")
                 return self._run_continuous_mode()
@@ -128,38 +141,48 @@ class MT5OrderCopierApp:
         try:
             schedule_timeframe = self.config.get('SCHEDULE_TIMEFRAME', 'M5')
             schedule_offset_seconds = self.config.get('SCHEDULE_OFFSET_SECONDS', 60)
+            target_terminals = self.config.get('TARGET_TERMINALS', {})
             
             self.logger.info(f"Running in scheduled mode - timeframe: {schedule_timeframe}, offset: {schedule_offset_seconds}s")
             
+            # Terminals with their own 'schedule' run as separate jobs; the rest share the global timeframe
+            job_scheduler = JobScheduler(self.scheduler)
+            for job in build_terminal_jobs(target_terminals, schedule_timeframe, schedule_offset_seconds):
+                job_scheduler.add(job)
+                self.logger.info(f"Scheduled {job.name} ({job.trigger.describe()}, priority {job.priority}) "
+                                 f"for {', '.join(job.terminals)}")
+            
             iteration_count = 0
             
             while self.running and not self.shutdown_requested:
+                next_job = job_scheduler.peek()
+                if next_job is None:
+                    self.logger.warning("No target terminals to schedule")
+                    break
+                
+                self.logger.info(f"Iteration {iteration_count + 1} - Next execution at: "
+                                 f"{next_job.next_run.strftime('%Y-%m-%d %H:%M:%S')} ({next_job.name})")
+                
+                # Wait for the earliest job (returns early on shutdown); jobs due together run in one cycle
+                due_jobs = job_scheduler.wait_for_due()
+                if due_jobs is None:
+                    break
+                
+                iteration_count += 1
                 try:
-                    iteration_count += 1
-                    
-                    # Calculate next execution time
-                    next_execution_time = calculate_next_execution_time(schedule_timeframe, schedule_offset_seconds)
-                    wait_seconds = get_time_until_next_execution(schedule_timeframe, schedule_offset_seconds)
-                    
-                    self.logger.info(f"Iteration {iteration_count} - Next execution at: {next_execution_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                    self.logger.info(f"Waiting {wait_seconds:.1f} seconds until next execution")
-                    
-                    # Wait until next execution time
-                    if wait_seconds > 0 and self.running and not self.shutdown_requested:
-                        self._wait_for_next_iteration(wait_seconds)
-                    
-                    # Check if we should still run after waiting
-                    if not self.running or self.shutdown_requested:
-                        break
-                    
-                    # Process all terminals
+                    # Process the due terminals, higher priority jobs first
+                    terminals = [terminal_name for job in due_jobs for terminal_name in job.terminals]
                     start_time = time.time()
-                    self.logger.info(f"Starting scheduled execution {iteration_count}")
-                    success = self.order_manager.process_all_terminals()
+                    self.logger.info(f"Starting scheduled execution {iteration_count} "
+                                     f"({', '.join(job.name for job in due_jobs)})")
+                    success = self.order_manager.process_all_terminals(
+                        terminals=None if len(terminals) == len(target_terminals) else terminals
+                    )
                     end_time = time.time()
                     
                     processing_time = end_time - start_time
-                    self.logger.info(f"Scheduled execution {iteration_count} completed in {processing_time:.2f}s")
+                    self.logger.info(f"Scheduled execution {iteration_count} completed in {processing_time:.2f}s "
+                                     f"(started {self.scheduler.stats['last_lateness_seconds']:.3f}s late)")
                     
                     if not success:
                         self.logger.warning(f"Scheduled execution {iteration_count} completed with errors")
@@ -171,8 +194,19 @@ class MT5OrderCopierApp:
                     if self.running and not self.shutdown_requested:
                         self.logger.info("Waiting 30 seconds before retry due to error")
                         self._wait_for_next_iteration(30)
+                
+                # Run times passed while the jobs were still running are skipped
+                skipped_before = self.scheduler.stats['skipped_ticks']
+                job_scheduler.reschedule(due_jobs)
+                skipped = self.scheduler.stats['skipped_ticks'] - skipped_before
+                if skipped:
+                    self.logger.warning(f"Previous execution overran, skipped {skipped} scheduled executions")
             
             self.logger.info(f"Scheduled execution completed after {iteration_count} iterations")
+            self._log_scheduler_statistics()
+            for job_name, job_stats in job_scheduler.get_statistics().items():
+                self.logger.info(f"{job_name} ({', '.join(job_stats['terminals'])}): {job_stats['runs']} runs, "
+                                 f"{job_stats['skipped']} skipped")
             return 0
             
         except Exception as e:
@@ -181,19 +215,33 @@ class MT5OrderCopierApp:
     
     def _run_continuous_mode(self) -> int:
         """Run the order copying process continuously with Claude-style parameters"""
+        if self.config.get('TASK_SCHEDULE_CONFIG', {}).get('enabled', False):
+            return self._run_task_schedule_mode()
+        
         try:
             delay_seconds = self.config.get('CONTINUOUS_DELAY_SECONDS', 5)
             max_runtime_hours = self.config.get('CONTINUOUS_MAX_RUNTIME_HOURS', 0)  # 0 = unlimited
             
-            self.logger.info(f"Running in continuous mode - delay: {delay_seconds}s")
+            cadence = self._create_cadence()
+            
+            if cadence:
+                self.logger.info(f"Running in continuous mode - adaptive delay: {cadence.min_seconds}-{cadence.max_seconds}s")
+            else:
+                self.logger.info(f"Running in continuous mode - delay: {delay_seconds}s")
             if max_runtime_hours > 0:
                 self.logger.info(f"Maximum runtime: {max_runtime_hours} hours")
             
             start_time = datetime.now()
             iteration_count = 0
             
+            # Iterations start every delay_seconds measured from the first start, not from the end of the last cycle
+            deadline = self.scheduler.clock()
+            
             while self.running and not self.shutdown_requested:
                 try:
+                    if not self.scheduler.wait_until(deadline):
+                        break
+                    
                     iteration_count += 1
                     
                     # Check runtime limit
@@ -214,9 +262,10 @@ class MT5OrderCopierApp:
                     if not success:
                         self.logger.warning(f"Continuous iteration {iteration_count} completed with errors")
                     
-                    # Delay before next iteration (but no delay between terminals)
-                    if self.running and not self.shutdown_requested:
-                        self._wait_for_next_iteration(delay_seconds)
+                    # Next iteration on the fixed grid (but no delay between terminals)
+                    if cadence:
+                        delay_seconds = cadence.next_interval(self.order_manager.source_changed)
+                    deadline = self.scheduler.next_deadline(deadline, delay_seconds)
                     
                 except Exception as e:
                     self.logger.error(f"Error in continuous iteration {iteration_count}: {format_error_message(e)}")
@@ -226,21 +275,191 @@ class MT5OrderCopierApp:
                         error_delay = min(delay_seconds * 2, 30)
                         self.logger.info(f"Waiting {error_delay} seconds before retry due to error")
                         self._wait_for_next_iteration(error_delay)
+                        deadline = self.scheduler.clock()
             
             runtime = datetime.now() - start_time
             self.logger.info(f"Continuous execution completed after {iteration_count} iterations in {runtime}")
+            self._log_scheduler_statistics(cadence)
             return 0
             
         except Exception as e:
             self.logger.error(f"Error in continuous execution mode: {format_error_message(e)}")
             return 1
     
-    def _wait_for_next_iteration(self, interval_seconds: int) -> None:
-        """Wait for the next iteration with graceful shutdown support"""
-        sleep_time = 0
-        while sleep_time < interval_seconds and self.running and not self.shutdown_requested:
-            time.sleep(min(1, interval_seconds - sleep_time))
-            sleep_time += 1
+    def _run_task_schedule_mode(self) -> int:
+        """Run copying, SL/TP sync, orphan sweeps and statistics continuously on independent timers"""
+        try:
+            intervals = self._get_task_intervals()
+            max_runtime_hours = self.config.get('CONTINUOUS_MAX_RUNTIME_HOURS', 0)  # 0 = unlimited
+            
+            self.logger.info("Running in continuous mode with task timers - " +
+                             ", ".join(f"{task}: {interval}s" for task, interval in intervals.items()))
+            if max_runtime_hours > 0:
+                self.logger.info(f"Maximum runtime: {max_runtime_hours} hours")
+            
+            start_time = datetime.now()
+            started = self.scheduler.clock()
+            deadlines = {task: started for task in intervals}
+            deadlines[TASK_STATISTICS] = started + intervals[TASK_STATISTICS]
+            runs = {task: 0 for task in intervals}
+            
+            while self.running and not self.shutdown_requested:
+                try:
+                    if not self.scheduler.wait_until(min(deadlines.values())):
+                        break
+                    
+                    # Check runtime limit
+                    if max_runtime_hours > 0 and datetime.now() - start_time > timedelta(hours=max_runtime_hours):
+                        self.logger.info(f"Reached maximum runtime ({max_runtime_hours} hours), stopping")
+                        break
+                    
+                    now = self.scheduler.clock()
+                    due = [task for task, deadline in deadlines.items() if deadline <= now]
+                    
+                    # Due reconciliation tasks share one source snapshot and the open sessions
+                    cycle_tasks = [task for task in due if task in ALL_TASKS]
+                    if cycle_tasks:
+                        start_iteration_time = time.time()
+                        success = self.order_manager.process_all_terminals(cycle_tasks)
+                        processing_time = time.time() - start_iteration_time
+                        self.logger.debug(f"Tasks {', '.join(cycle_tasks)} completed in {processing_time:.2f}s")
+                        
+                        if not success:
+                            self.logger.warning(f"Tasks {', '.join(cycle_tasks)} completed with errors")
+                    
+                    if TASK_STATISTICS in due:
+                        self.order_manager.log_statistics()
+                    
+                    for task in due:
+                        runs[task] += 1
+                        deadlines[task] = self.scheduler.next_deadline(deadlines[task], intervals[task])
+                    
+                except Exception as e:
+                    self.logger.error(f"Error in task schedule: {format_error_message(e)}")
+                    
+                    # Wait before retrying and restart all timers afterwards
+                    if self.running and not self.shutdown_requested:
+                        error_delay = min(intervals[TASK_COPY] * 2, 30)
+                        self.logger.info(f"Waiting {error_delay} seconds before retry due to error")
+                        self._wait_for_next_iteration(error_delay)
+                        deadlines = {task: max(deadline, self.scheduler.clock()) for task, deadline in deadlines.items()}
+            
+            runtime = datetime.now() - start_time
+            self.logger.info(f"Task schedule completed in {runtime} - " +
+                             ", ".join(f"{task}: {count} runs" for task, count in runs.items()))
+            self._log_scheduler_statistics()
+            return 0
+            
+        except Exception as e:
+            self.logger.error(f"Error in task schedule mode: {format_error_message(e)}")
+            return 1
+    
+    def _get_task_intervals(self) -> Dict[str, float]:
+        """Get the interval of each task, orphan sweeps defaulting to the shortest orphan_check_interval"""
+        task_config = self.config.get('TASK_SCHEDULE_CONFIG', {})
+        delay_seconds = self.config.get('CONTINUOUS_DELAY_SECONDS', 5)
+        copy_seconds = task_config.get('copy_seconds') or delay_seconds
+        
+        orphan_seconds = task_config.get('orphan_seconds')
+        if orphan_seconds is None:
+            # Each terminal is still swept only when its own interval has passed
+            check_intervals = [terminal_config.get('orphan_management', {}).get('orphan_check_interval')
+                               for terminal_config in self.config.get('TARGET_TERMINALS', {}).values()]
+            check_intervals = [interval for interval in check_intervals if interval]
+            orphan_seconds = min(check_intervals) if check_intervals else copy_seconds
+        
+        return {
+            TASK_COPY: copy_seconds,
+            TASK_SLTP: task_config.get('sltp_seconds') or copy_seconds,
+            TASK_ORPHANS: orphan_seconds,
+            TASK_STATISTICS: task_config.get('statistics_seconds') or 300
+        }
+    
+    def _run_watcher_mode(self) -> int:
+        """Poll the source for changes and run the order copying process only when it changed"""
+        try:
+            poll_seconds = self.config.get('WATCHER_POLL_SECONDS', 0.5)
+            full_cycle_seconds = self.config.get('WATCHER_FULL_CYCLE_SECONDS', 60)
+            hash_check_seconds = self.config.get('WATCHER_HASH_CHECK_SECONDS', 0)
+            
+            cadence = self._create_cadence()
+            
+            if cadence:
+                self.logger.info(f"Running in watcher mode - adaptive poll: {cadence.min_seconds}-{cadence.max_seconds}s, "
+                                 f"full cycle every {full_cycle_seconds}s")
+            else:
+                self.logger.info(f"Running in watcher mode - poll: {poll_seconds}s, full cycle every {full_cycle_seconds}s")
+            
+            watcher = SourceWatcher(self.order_manager, self.logger, full_cycle_seconds,
+                                    hash_check_interval_seconds=hash_check_seconds)
+            start_time = datetime.now()
+            deadline = self.scheduler.clock()
+            
+            while self.running and not self.shutdown_requested:
+                try:
+                    if not self.scheduler.wait_until(deadline):
+                        break
+                    
+                    if watcher.step():
+                        self.logger.debug(f"Watcher cycle {watcher.stats['cycles']} completed in "
+                                          f"{watcher.stats['last_cycle_seconds']:.2f}s")
+                    
+                    # Polls missed while a cycle ran are skipped, not made up
+                    if cadence:
+                        poll_seconds = cadence.next_interval(watcher.last_changed)
+                    deadline = self.scheduler.next_deadline(deadline, poll_seconds)
+                    
+                except Exception as e:
+                    self.logger.error(f"Error in watcher poll {watcher.stats['polls']}: {format_error_message(e)}")
+                    
+                    # Wait before retrying (error recovery is slower than polling)
+                    if self.running and not self.shutdown_requested:
+                        error_delay = min(max(poll_seconds * 10, 5), 30)
+                        self.logger.info(f"Waiting {error_delay} seconds before retry due to error")
+                        self._wait_for_next_iteration(error_delay)
+                        deadline = self.scheduler.clock()
+            
+            stats = watcher.get_statistics()
+            runtime = datetime.now() - start_time
+            self.logger.info(f"Watcher mode completed after {stats['polls']} polls and {stats['cycles']} cycles "
+                             f"({stats['changes_detected']} source changes, {stats['forced_cycles']} periodic) in {runtime}")
+            self._log_scheduler_statistics(cadence)
+            return 0
+            
+        except Exception as e:
+            self.logger.error(f"Error in watcher execution mode: {format_error_message(e)}")
+            return 1
+    
+    def _create_cadence(self) -> Optional[AdaptiveCadence]:
+        """Create the adaptive cadence controller when it is enabled"""
+        cadence_config = self.config.get('ADAPTIVE_CADENCE_CONFIG', {})
+        if not cadence_config.get('enabled', False):
+            return None
+        
+        return AdaptiveCadence(
+            min_seconds=cadence_config.get('min_seconds', 1),
+            max_seconds=cadence_config.get('max_seconds', 30),
+            backoff_factor=cadence_config.get('backoff_factor', 2.0),
+            closed_market_seconds=cadence_config.get('closed_market_seconds', 600),
+            logger=self.logger
+        )
+    
+    def _wait_for_next_iteration(self, interval_seconds: float) -> None:
+        """Wait for the next iteration with graceful shutdown support (returns as soon as shutdown is requested)"""
+        if self.running and not self.shutdown_requested:
+            self.scheduler.sleep(interval_seconds)
+    
+    def _log_scheduler_statistics(self, cadence: Optional[AdaptiveCadence] = None) -> None:
+        """Log how many ticks fired, were skipped and how late they were"""
+        stats = self.scheduler.get_statistics()
+        self.logger.info(f"Scheduler: {stats['ticks']} ticks, {stats['skipped_ticks']} skipped, "
+                         f"lateness avg {stats['average_lateness_seconds'] * 1000:.1f} ms, "
+                         f"max {stats['max_lateness_seconds'] * 1000:.1f} ms")
+        
+        if cadence:
+            cadence_stats = cadence.get_statistics()
+            self.logger.info(f"Adaptive cadence: {cadence_stats['changes']} changes, {cadence_stats['backoffs']} backoffs, "
+                             f"{cadence_stats['closed_market_intervals']} closed-market intervals")
     
     def _load_configuration(self) -> bool:
         """Load and validate configuration"""
@@ -331,6 +550,7 @@ class MT5OrderCopierApp:
         
         self.shutdown_requested = True
         self.running = False
+        self.scheduler.stop()
     
     def _cleanup(self) -> None:
         """Clean up resources"""
@@ -368,6 +588,7 @@ def print_usage():
     print("  once         - Run once and exit")
     print("  scheduled    - Run on a schedule with intervals")
     print("  continuous   - Run continuously with minimal delay")
+    print("  watcher      - Poll the source and run as soon as it changes")
 
 def main() -> int:
     """Main entry point"""
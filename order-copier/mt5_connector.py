@@ -1,45 +1,82 @@
 # MT5 Pending Order Copier System - MT5 Connection Handler
 # This module handles all MT5 terminal connections and basic operations
 
-import MetaTrader5 as mt5
 import time
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Set
 from datetime import datetime
 
 from utils import (
-    setup_logging, retry_operation, format_error_message,
-    get_order_type_name, convert_mt5_time, validate_file_path
+    setup_logging, retry_operation, format_error_message, validate_file_path
 )
+from records import OrderRecord, PositionRecord
+from source_snapshot import SourceSnapshot
+from fingerprints import compute_change_signature
+from symbol_cache import SymbolInfoCache
+from call_supervisor import SupervisedMT5
+
+try:
+    import MetaTrader5 as mt5
+except ImportError:
+    # Windows-only package - elsewhere a backend such as SimulatedBroker must be supplied
+    mt5 = None
+
+# Trade retcodes suggesting the request was built from an out-of-date order/position record
+STALE_RECORD_RETCODES = {
+    10013,  # TRADE_RETCODE_INVALID - invalid request
+    10014,  # TRADE_RETCODE_INVALID_VOLUME - e.g. position partially closed
+    10030,  # TRADE_RETCODE_INVALID_FILL - filling mode changed
+    10036   # TRADE_RETCODE_POSITION_CLOSED
+}
 
 class MT5Connector:
     """Handles MT5 terminal connections and operations"""
     
-    def __init__(self, logger: Optional[logging.Logger] = None):
+    def __init__(self, logger: Optional[logging.Logger] = None, symbol_cache_ttl: float = 300, backend=None):
         self.logger = logger or setup_logging()
+        # Object implementing the MetaTrader5 API; None uses the MetaTrader5 package
+        self.backend = backend
         self.is_connected = False
         self.current_terminal = None
         self.connection_timeout = 30
         self.max_retries = 3
         self.retry_delay = 5
+        
+        # Symbol metadata caches, one per terminal (0 disables caching)
+        self.symbol_cache_ttl = symbol_cache_ttl
+        self.symbol_caches = {}
+    
+    @property
+    def mt5(self):
+        """MetaTrader5 API in use - the injected backend, or the MetaTrader5 package"""
+        return self.backend if self.backend is not None else mt5
     
     def connect(self, terminal_config: Dict[str, Any], terminal_name: str = "Unknown") -> bool:
         """Connect to MT5 terminal with given configuration"""
         try:
             self.logger.info(f"Attempting to connect to terminal: {terminal_name}")
             
+            if self.mt5 is None:
+                self.logger.error("MetaTrader5 package is not installed and no backend was supplied")
+                return False
+            
             # Validate terminal path
             terminal_path = terminal_config.get('MT5_TERMINAL_PATH')
             if terminal_path and not validate_file_path(terminal_path):
                 self.logger.warning(f"Terminal executable not found: {terminal_path}")
             
-            # Initialize MT5 connection
+            # Timeouts of a supervised backend are recorded against this terminal
+            if isinstance(self.backend, SupervisedMT5):
+                self.backend.terminal_name = terminal_name
+            
+            # Initialize MT5 connection (timeout in milliseconds, passed on to the terminal)
+            init_kwargs = {'timeout': terminal_config['timeout']} if terminal_config.get('timeout') else {}
             if terminal_path:
-                if not mt5.initialize(path=terminal_path):
+                if not self.mt5.initialize(path=terminal_path, **init_kwargs):
                     self.logger.error(f"Failed to initialize MT5 with path: {terminal_path}")
                     return False
             else:
-                if not mt5.initialize():
+                if not self.mt5.initialize(**init_kwargs):
                     self.logger.error("Failed to initialize MT5")
                     return False
             
@@ -48,18 +85,18 @@ class MT5Connector:
             password = terminal_config['MT5_PASSWORD']
             server = terminal_config['MT5_SERVER']
             
-            login_result = mt5.login(account, password, server)
+            login_result = self.mt5.login(account, password, server)
             if not login_result:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 self.logger.error(f"Failed to login to account {account} on {server}: {error_code}")
-                mt5.shutdown()
+                self.mt5.shutdown()
                 return False
             
             # Verify connection
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info is None:
                 self.logger.error("Failed to get account info after login")
-                mt5.shutdown()
+                self.mt5.shutdown()
                 return False
             
             self.is_connected = True
@@ -80,7 +117,7 @@ class MT5Connector:
         try:
             if self.is_connected:
                 self.logger.info(f"Disconnecting from terminal: {self.current_terminal}")
-                mt5.shutdown()
+                self.mt5.shutdown()
                 self.is_connected = False
                 self.current_terminal = None
                 self.logger.info("Successfully disconnected from MT5")
@@ -89,46 +126,99 @@ class MT5Connector:
             self.logger.error(f"Error during disconnect: {format_error_message(e)}")
             return False
     
-    def get_pending_orders(self) -> List[Dict[str, Any]]:
-        """Retrieve all pending orders from connected terminal"""
+    def get_pending_orders(self, group: Optional[str] = None, magics: Optional[Set[int]] = None) -> List[OrderRecord]:
+        """Retrieve pending orders from connected terminal
+        
+        group is passed to orders_get so the terminal only returns matching symbols; with magics,
+        orders with other magic numbers are dropped before they are converted to records.
+        """
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            # Get all pending orders
-            orders = mt5.orders_get()
+            orders = self.mt5.orders_get(group=group) if group else self.mt5.orders_get()
             if orders is None:
                 self.logger.warning("No pending orders found or failed to retrieve orders")
                 return []
             
-            order_list = []
-            for order in orders:
-                order_dict = {
-                    'ticket': order.ticket,
-                    'time_setup': convert_mt5_time(order.time_setup),
-                    'time_expiration': convert_mt5_time(order.time_expiration) if order.time_expiration > 0 else None,
-                    'type': order.type,
-                    'type_name': get_order_type_name(order.type),
-                    'state': order.state,
-                    'volume_initial': order.volume_initial,
-                    'volume_current': order.volume_current,
-                    'price_open': order.price_open,
-                    'sl': order.sl,
-                    'tp': order.tp,
-                    'symbol': order.symbol,
-                    'comment': order.comment,
-                    'magic': order.magic,
-                    'position_id': order.position_id
-                }
-                order_list.append(order_dict)
+            if magics is not None:
+                order_list = [self._convert_order(order) for order in orders if order.magic in magics]
+            else:
+                order_list = [self._convert_order(order) for order in orders]
             
             self.logger.info(f"Retrieved {len(order_list)} pending orders")
+            if len(order_list) != len(orders):
+                self.logger.debug(f"Skipped {len(orders) - len(order_list)} pending orders with other magic numbers")
             return order_list
             
         except Exception as e:
             self.logger.error(f"Error retrieving pending orders: {format_error_message(e)}")
             raise
     
+    def _convert_order(self, order) -> OrderRecord:
+        """Convert an MT5 order record to an OrderRecord"""
+        return OrderRecord.from_mt5(order)
+    
+    def _convert_position(self, position) -> PositionRecord:
+        """Convert an MT5 position record to a PositionRecord"""
+        return PositionRecord.from_mt5(position)
+    
+    def _fetch_order(self, ticket: int) -> Optional[Dict[str, Any]]:
+        """Query a single pending order by ticket"""
+        orders = self.mt5.orders_get(ticket=ticket)
+        return self._convert_order(orders[0]) if orders else None
+    
+    def _fetch_position(self, ticket: int) -> Optional[Dict[str, Any]]:
+        """Query a single position by ticket"""
+        positions = self.mt5.positions_get(ticket=ticket)
+        return self._convert_position(positions[0]) if positions else None
+    
+    def find_copies(self, symbol: str, magic: int) -> Optional[List[Dict[str, Any]]]:
+        """Find pending orders and positions with a magic number, querying only one symbol
+        
+        Returns None when the query itself fails, so callers can fall back to a full scan.
+        """
+        if not self.is_connected:
+            raise ConnectionError("Not connected to MT5 terminal")
+        
+        copies = []
+        for query, convert in ((self.mt5.orders_get, self._convert_order), (self.mt5.positions_get, self._convert_position)):
+            records = query(symbol=symbol)
+            if records is None:
+                # None with a success code just means there are no records
+                error = self.mt5.last_error()
+                if not error or error[0] != 1:
+                    self.logger.warning(f"Failed to query {symbol} orders/positions: {error}")
+                    return None
+                records = ()
+            copies.extend(convert(record) for record in records if record.magic == magic)
+        return copies
+    
+    def _send_with_record(self, record: Optional[Dict[str, Any]], fetch_record, build_request):
+        """Send a trade request built from a record, querying the broker only when needed
+        
+        A record passed in by the caller (from the same cycle's get_pending_orders/get_positions)
+        saves one round trip. If the broker rejects the request with a retcode that suggests the
+        record is out of date, the record is re-queried and the request is sent once more.
+        Returns (record, result); record is None when the order/position no longer exists.
+        """
+        supplied = record is not None
+        if not supplied:
+            record = fetch_record()
+            if record is None:
+                return None, None
+        
+        result = self.mt5.order_send(build_request(record))
+        
+        if supplied and result is not None and result.retcode in STALE_RECORD_RETCODES:
+            self.logger.warning(f"Request rejected with retcode {result.retcode}, refreshing record and retrying")
+            record = fetch_record()
+            if record is None:
+                return None, None
+            result = self.mt5.order_send(build_request(record))
+        
+        return record, result
+    
     def place_order(self, order_request: Dict[str, Any]) -> Tuple[bool, Optional[int], str]:
         """Place a new pending order"""
         if not self.is_connected:
@@ -137,14 +227,14 @@ class MT5Connector:
         try:
             # Prepare order request
             request = {
-                "action": mt5.TRADE_ACTION_PENDING,
+                "action": self.mt5.TRADE_ACTION_PENDING,
                 "symbol": order_request['symbol'],
                 "volume": order_request['volume'],
                 "type": order_request['type'],
                 "price": order_request['price'],
                 "magic": order_request.get('magic', 0),
                 "comment": order_request.get('comment', "Copied order"),
-                "type_time": mt5.ORDER_TIME_GTC,  # Good till cancelled
+                "type_time": self.mt5.ORDER_TIME_GTC,  # Good till cancelled
                 "type_filling": self.get_symbol_filling_mode(order_request['symbol'])
             }
             
@@ -157,20 +247,22 @@ class MT5Connector:
             
             if 'expiration' in order_request and order_request['expiration']:
                 request['expiration'] = int(order_request['expiration'].timestamp())
-                request['type_time'] = mt5.ORDER_TIME_SPECIFIED
+                request['type_time'] = self.mt5.ORDER_TIME_SPECIFIED
             
             # Send order
-            result = mt5.order_send(request)
+            result = self.mt5.order_send(request)
             
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 error_msg = f"Failed to send order: {error_code}"
                 self.logger.error(error_msg)
                 return False, None, error_msg
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Order failed with retcode: {result.retcode}, comment: {result.comment}"
                 self.logger.error(error_msg)
+                # Symbol settings may have changed (e.g. filling mode) - refresh on next use
+                self.invalidate_symbol(order_request['symbol'])
                 return False, None, error_msg
             
             self.logger.info(f"Order placed successfully - Ticket: {result.order}")
@@ -181,57 +273,56 @@ class MT5Connector:
             self.logger.error(error_msg)
             return False, None, error_msg
     
-    def modify_order(self, ticket: int, modifications: Dict[str, Any]) -> Tuple[bool, str]:
-        """Modify an existing pending order"""
+    def modify_order(self, ticket: int, modifications: Dict[str, Any],
+                     order: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """Modify an existing pending order (pass the order record to skip re-querying it)"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
-        try:
-            # Get current order info
-            orders = mt5.orders_get(ticket=ticket)
-            if not orders:
-                error_msg = f"Order {ticket} not found"
-                self.logger.error(error_msg)
-                return False, error_msg
-            
-            current_order = orders[0]
-            
-            # Prepare modification request
+        def build_request(current_order: Dict[str, Any]) -> Dict[str, Any]:
             request = {
-                "action": mt5.TRADE_ACTION_MODIFY,
+                "action": self.mt5.TRADE_ACTION_MODIFY,
                 "order": ticket,
-                "symbol": current_order.symbol,
-                "volume": modifications.get('volume', current_order.volume_initial),
-                "price": modifications.get('price', current_order.price_open),
-                "sl": modifications.get('sl', current_order.sl),
-                "tp": modifications.get('tp', current_order.tp),
-                "type_time": current_order.type_time,
-                "type_filling": self.get_symbol_filling_mode(current_order.symbol)
+                "symbol": current_order['symbol'],
+                "volume": modifications.get('volume', current_order['volume_initial']),
+                "price": modifications.get('price', current_order['price_open']),
+                "sl": modifications.get('sl', current_order['sl']),
+                "tp": modifications.get('tp', current_order['tp']),
+                "type_time": current_order.get('type_time', self.mt5.ORDER_TIME_GTC),
+                "type_filling": self.get_symbol_filling_mode(current_order['symbol'])
             }
             
             # Handle expiration time
             if 'expiration' in modifications:
                 if modifications['expiration']:
                     request['expiration'] = int(modifications['expiration'].timestamp())
-                    request['type_time'] = mt5.ORDER_TIME_SPECIFIED
+                    request['type_time'] = self.mt5.ORDER_TIME_SPECIFIED
                 else:
-                    request['type_time'] = mt5.ORDER_TIME_GTC
-            elif current_order.time_expiration > 0:
-                request['expiration'] = current_order.time_expiration
-                request['type_time'] = mt5.ORDER_TIME_SPECIFIED
+                    request['type_time'] = self.mt5.ORDER_TIME_GTC
+            elif current_order.get('time_expiration'):
+                request['expiration'] = int(current_order['time_expiration'].timestamp())
+                request['type_time'] = self.mt5.ORDER_TIME_SPECIFIED
             
-            # Send modification
-            result = mt5.order_send(request)
+            return request
+        
+        try:
+            current_order, result = self._send_with_record(order, lambda: self._fetch_order(ticket), build_request)
+            
+            if current_order is None:
+                error_msg = f"Order {ticket} not found"
+                self.logger.error(error_msg)
+                return False, error_msg
             
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 error_msg = f"Failed to modify order {ticket}: {error_code}"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Order modification failed with retcode: {result.retcode}, comment: {result.comment}"
                 self.logger.error(error_msg)
+                self.invalidate_symbol(current_order['symbol'])
                 return False, error_msg
             
             self.logger.info(f"Order {ticket} modified successfully")
@@ -242,36 +333,33 @@ class MT5Connector:
             self.logger.error(error_msg)
             return False, error_msg
     
-    def cancel_order(self, ticket: int) -> Tuple[bool, str]:
-        """Cancel a pending order"""
+    def cancel_order(self, ticket: int, order: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """Cancel a pending order (pass the order record to skip re-querying it)"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
+        def build_request(current_order: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "action": self.mt5.TRADE_ACTION_REMOVE,
+                "order": ticket,
+                "type_filling": self.get_symbol_filling_mode(current_order['symbol'])
+            }
+        
         try:
-            # Get order info to determine symbol for filling mode
-            order_info = mt5.orders_get(ticket=ticket)
-            if not order_info:
+            current_order, result = self._send_with_record(order, lambda: self._fetch_order(ticket), build_request)
+            
+            if current_order is None:
                 error_msg = f"Order {ticket} not found for cancellation"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            # Prepare cancellation request
-            request = {
-                "action": mt5.TRADE_ACTION_REMOVE,
-                "order": ticket,
-                "type_filling": self.get_symbol_filling_mode(order_info[0].symbol)
-            }
-            
-            # Send cancellation
-            result = mt5.order_send(request)
-            
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 error_msg = f"Failed to cancel order {ticket}: {error_code}"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Order cancellation failed with retcode: {result.retcode}, comment: {result.comment}"
                 self.logger.error(error_msg)
                 return False, error_msg
@@ -290,7 +378,7 @@ class MT5Connector:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._lookup_symbol(symbol)
             if symbol_info is None:
                 self.logger.warning(f"Symbol {symbol} not found")
                 return None
@@ -311,30 +399,64 @@ class MT5Connector:
             self.logger.error(f"Error getting symbol info for {symbol}: {format_error_message(e)}")
             return None
     
+    def _get_symbol_cache(self) -> Optional[SymbolInfoCache]:
+        """Get the symbol cache of the current terminal"""
+        if self.symbol_cache_ttl <= 0:
+            return None
+        
+        cache = self.symbol_caches.get(self.current_terminal)
+        if cache is None:
+            cache = SymbolInfoCache(ttl_seconds=self.symbol_cache_ttl)
+            self.symbol_caches[self.current_terminal] = cache
+        return cache
+    
+    def _lookup_symbol(self, symbol: str):
+        """Get raw MT5 symbol information, served from the terminal's cache when possible"""
+        cache = self._get_symbol_cache()
+        if cache is not None:
+            found, symbol_info = cache.get(symbol)
+            if found:
+                return symbol_info
+        
+        symbol_info = self.mt5.symbol_info(symbol)
+        if cache is not None:
+            cache.put(symbol, symbol_info)
+        return symbol_info
+    
+    def invalidate_symbol(self, symbol: Optional[str] = None) -> None:
+        """Drop cached symbol information for the current terminal"""
+        cache = self.symbol_caches.get(self.current_terminal)
+        if cache is not None:
+            cache.invalidate(symbol)
+    
+    def get_symbol_cache_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Get symbol cache hit/miss counters per terminal"""
+        return {terminal_name: cache.get_statistics() for terminal_name, cache in self.symbol_caches.items()}
+    
     def get_symbol_filling_mode(self, symbol: str) -> int:
         """Dynamically determine the appropriate filling mode for a symbol"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = self._lookup_symbol(symbol)
             if symbol_info is None:
                 self.logger.warning(f"Could not retrieve symbol info for {symbol}, using default ORDER_FILLING_RETURN")
-                return mt5.ORDER_FILLING_RETURN
+                return self.mt5.ORDER_FILLING_RETURN
             
             filling_mode = symbol_info.filling_mode
             
             # Priority: FOK > IOC > RETURN
             if filling_mode & 2:  # ORDER_FILLING_FOK supported
-                return mt5.ORDER_FILLING_FOK
+                return self.mt5.ORDER_FILLING_FOK
             elif filling_mode & 1:  # ORDER_FILLING_IOC supported  
-                return mt5.ORDER_FILLING_IOC
+                return self.mt5.ORDER_FILLING_IOC
             else:  # Default to RETURN
-                return mt5.ORDER_FILLING_RETURN
+                return self.mt5.ORDER_FILLING_RETURN
                 
         except Exception as e:
             self.logger.error(f"Error determining filling mode for {symbol}: {format_error_message(e)}")
-            return mt5.ORDER_FILLING_RETURN
+            return self.mt5.ORDER_FILLING_RETURN
     
     def get_account_info(self) -> Optional[Dict[str, Any]]:
         """Get current account information"""
@@ -342,7 +464,7 @@ class MT5Connector:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info is None:
                 self.logger.error("Failed to get account info")
                 return None
@@ -381,6 +503,44 @@ class MT5Connector:
             self.logger.error(f"Error getting account info: {format_error_message(e)}")
             return None
     
+    def get_totals(self) -> Optional[Tuple[int, int]]:
+        """Get the number of pending orders and open positions without fetching them"""
+        if not self.is_connected:
+            raise ConnectionError("Not connected to MT5 terminal")
+        
+        try:
+            orders_total = self.mt5.orders_total()
+            positions_total = self.mt5.positions_total()
+            if orders_total is None or positions_total is None:
+                return None
+            
+            return orders_total, positions_total
+            
+        except Exception as e:
+            self.logger.error(f"Error getting order/position totals: {format_error_message(e)}")
+            return None
+    
+    def get_change_signature(self) -> Optional[Tuple[int, int, str]]:
+        """Get the order/position counts and a hash of tickets, prices, volumes and SL/TP
+        
+        The raw MT5 records are hashed as returned, so polling the signature costs two API calls
+        and no record conversion.
+        """
+        if not self.is_connected:
+            raise ConnectionError("Not connected to MT5 terminal")
+        
+        try:
+            orders = self.mt5.orders_get()
+            positions = self.mt5.positions_get()
+            if orders is None or positions is None:
+                return None
+            
+            return compute_change_signature(orders, positions)
+            
+        except Exception as e:
+            self.logger.error(f"Error getting change signature: {format_error_message(e)}")
+            return None
+    
     def check_connection(self) -> bool:
         """Check if connection is still active"""
         try:
@@ -388,7 +548,7 @@ class MT5Connector:
                 return False
             
             # Try to get account info as a connection test
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             return account_info is not None
             
         except Exception:
@@ -400,7 +560,7 @@ class MT5Connector:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            terminal_info = mt5.terminal_info()
+            terminal_info = self.mt5.terminal_info()
             if terminal_info is None:
                 return None
             
@@ -435,82 +595,78 @@ class MT5Connector:
         """Context manager entry"""
         return self
     
-    def get_positions(self) -> List[Dict[str, Any]]:
-        """Retrieve all active positions from connected terminal"""
+    def get_positions(self, group: Optional[str] = None, magics: Optional[Set[int]] = None) -> List[PositionRecord]:
+        """Retrieve active positions from connected terminal (group and magics filter like get_pending_orders)"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
         try:
-            # Get all positions
-            positions = mt5.positions_get()
+            positions = self.mt5.positions_get(group=group) if group else self.mt5.positions_get()
             if positions is None:
                 self.logger.warning("No positions found or failed to retrieve positions")
                 return []
             
-            position_list = []
-            for position in positions:
-                position_dict = {
-                    'ticket': position.ticket,
-                    'time': convert_mt5_time(position.time),
-                    'time_update': convert_mt5_time(position.time_update),
-                    'type': position.type,
-                    'type_name': 'BUY' if position.type == 0 else 'SELL',
-                    'volume': position.volume,
-                    'price_open': position.price_open,
-                    'price_current': position.price_current,
-                    'sl': position.sl,
-                    'tp': position.tp,
-                    'symbol': position.symbol,
-                    'comment': position.comment,
-                    'magic': position.magic,
-                    'identifier': position.identifier,
-                    'profit': position.profit,
-                    'swap': position.swap
-                }
-                position_list.append(position_dict)
+            if magics is not None:
+                position_list = [self._convert_position(position) for position in positions if position.magic in magics]
+            else:
+                position_list = [self._convert_position(position) for position in positions]
             
             self.logger.info(f"Retrieved {len(position_list)} active positions")
+            if len(position_list) != len(positions):
+                self.logger.debug(f"Skipped {len(positions) - len(position_list)} positions with other magic numbers")
             return position_list
             
         except Exception as e:
             self.logger.error(f"Error retrieving positions: {format_error_message(e)}")
             raise
     
-    def modify_position(self, ticket: int, sl: float = None, tp: float = None) -> Tuple[bool, str]:
-        """Modify position TP/SL using TRADE_ACTION_SLTP"""
+    def capture_snapshot(self) -> SourceSnapshot:
+        """Capture pending orders, positions and account state from the connected terminal"""
+        if not self.is_connected:
+            raise ConnectionError("Not connected to MT5 terminal")
+        
+        # Stamp once so orders and positions share the same capture time
+        captured_at = datetime.now()
+        
+        orders = self.get_pending_orders()
+        positions = self.get_positions()
+        account_info = self.get_account_info()
+        
+        snapshot = SourceSnapshot(orders, positions, account_info, captured_at, self.current_terminal or "Unknown")
+        self.logger.info(f"Captured {snapshot.summary()}")
+        return snapshot
+    
+    def modify_position(self, ticket: int, sl: float = None, tp: float = None,
+                        position: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """Modify position TP/SL using TRADE_ACTION_SLTP (pass the position record to skip re-querying it)"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
+        def build_request(current_position: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "action": self.mt5.TRADE_ACTION_SLTP,
+                "position": ticket,
+                "symbol": current_position['symbol'],
+                "sl": sl if sl is not None else current_position['sl'],
+                "tp": tp if tp is not None else current_position['tp'],
+                "type_filling": self.get_symbol_filling_mode(current_position['symbol'])
+            }
+        
         try:
-            # Get current position info
-            positions = mt5.positions_get(ticket=ticket)
-            if not positions:
+            current_position, result = self._send_with_record(position, lambda: self._fetch_position(ticket), build_request)
+            
+            if current_position is None:
                 error_msg = f"Position {ticket} not found"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            current_position = positions[0]
-            
-            # Prepare modification request
-            request = {
-                "action": mt5.TRADE_ACTION_SLTP,
-                "position": ticket,
-                "symbol": current_position.symbol,
-                "sl": sl if sl is not None else current_position.sl,
-                "tp": tp if tp is not None else current_position.tp,
-                "type_filling": self.get_symbol_filling_mode(current_position.symbol)
-            }
-            
-            # Send modification
-            result = mt5.order_send(request)
-            
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 error_msg = f"Failed to modify position {ticket}: {error_code}"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Position modification failed with retcode: {result.retcode}, comment: {result.comment}"
                 self.logger.error(error_msg)
                 return False, error_msg
@@ -523,50 +679,46 @@ class MT5Connector:
             self.logger.error(error_msg)
             return False, error_msg
     
-    def close_position(self, ticket: int) -> Tuple[bool, str]:
-        """Close a position by ticket number"""
+    def close_position(self, ticket: int, position: Optional[Dict[str, Any]] = None) -> Tuple[bool, str]:
+        """Close a position by ticket number (pass the position record to skip re-querying it)"""
         if not self.is_connected:
             raise ConnectionError("Not connected to MT5 terminal")
         
-        try:
-            # Get current position info
-            positions = mt5.positions_get(ticket=ticket)
-            if not positions:
-                error_msg = f"Position {ticket} not found"
-                self.logger.error(error_msg)
-                return False, error_msg
-            
-            position = positions[0]
-            
+        def build_request(current_position: Dict[str, Any]) -> Dict[str, Any]:
             # Determine opposite order type for closing
-            if position.type == 0:  # BUY position
-                order_type = mt5.ORDER_TYPE_SELL
+            if current_position['type'] == 0:  # BUY position
+                order_type = self.mt5.ORDER_TYPE_SELL
             else:  # SELL position
-                order_type = mt5.ORDER_TYPE_BUY
+                order_type = self.mt5.ORDER_TYPE_BUY
             
-            # Prepare close request
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
+            return {
+                "action": self.mt5.TRADE_ACTION_DEAL,
                 "position": ticket,
-                "symbol": position.symbol,
-                "volume": position.volume,
+                "symbol": current_position['symbol'],
+                "volume": current_position['volume'],
                 "type": order_type,
-                "type_filling": self.get_symbol_filling_mode(position.symbol),
+                "type_filling": self.get_symbol_filling_mode(current_position['symbol']),
                 "comment": "Orphaned position closure"
             }
+        
+        try:
+            current_position, result = self._send_with_record(position, lambda: self._fetch_position(ticket), build_request)
             
-            # Send close order
-            result = mt5.order_send(request)
+            if current_position is None:
+                error_msg = f"Position {ticket} not found"
+                self.logger.error(error_msg)
+                return False, error_msg
             
             if result is None:
-                error_code = mt5.last_error()
+                error_code = self.mt5.last_error()
                 error_msg = f"Failed to close position {ticket}: {error_code}"
                 self.logger.error(error_msg)
                 return False, error_msg
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
+            if result.retcode != self.mt5.TRADE_RETCODE_DONE:
                 error_msg = f"Position closure failed with retcode: {result.retcode}, comment: {result.comment}"
                 self.logger.error(error_msg)
+                self.invalidate_symbol(current_position['symbol'])
                 return False, error_msg
             
             self.logger.info(f"Position {ticket} closed successfully")
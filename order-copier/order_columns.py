@@ -0,0 +1,82 @@
+# MT5 Pending Order Copier System - Columnar Order Snapshots
+# This module stores pending orders as NumPy structured arrays for vectorized reconciliation
+
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional - the planner falls back to comparing orders one pair at a time
+    np = None
+
+# Columns compared between a source order and its copy
+ORDER_COLUMNS = [
+    ('ticket', 'i8'),
+    ('magic', 'i8'),
+    ('price_open', 'f8'),
+    ('volume_initial', 'f8'),
+    ('sl', 'f8'),
+    ('tp', 'f8'),
+    ('expiration', 'i8')
+]
+
+NO_EXPIRATION = -1
+
+def numpy_available() -> bool:
+    """Check if NumPy can be imported"""
+    return np is not None
+
+def _expiration_code(value: Any) -> int:
+    """Encode an expiration as an integer: seconds since the epoch, NO_EXPIRATION for None"""
+    if value is None:
+        return NO_EXPIRATION
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+def build_order_columns(orders: List[Dict[str, Any]]):
+    """Copy the compared fields of a list of orders into a structured array (row i = orders[i])"""
+    return np.array([
+        (order['ticket'], order.get('magic', 0), order['price_open'], order['volume_initial'],
+         order.get('sl', 0), order.get('tp', 0), _expiration_code(order.get('time_expiration')))
+        for order in orders
+    ], dtype=ORDER_COLUMNS)
+
+def match_rows(source, target_magics):
+    """Find the source row of each target magic number, -1 where there is none"""
+    if len(source) == 0:
+        return np.full(len(target_magics), -1, dtype=np.intp)
+
+    order = np.argsort(source['ticket'], kind='stable')
+    sorted_tickets = source['ticket'][order]
+    positions = np.minimum(np.searchsorted(sorted_tickets, target_magics), len(sorted_tickets) - 1)
+    return np.where(sorted_tickets[positions] == target_magics, order[positions], -1)
+
+def orders_needing_update(source, target, multiplier: float, min_lot: float, max_lot: float,
+                          tolerance: float, source_rows=None):
+    """Flag the target orders whose source order changed
+
+    Expected lots (calculate_lot_size) and the price, volume, SL/TP and expiration comparisons
+    of ReconciliationPlanner.order_needs_update are computed for all matched pairs at once.
+    Returns a boolean array aligned with target; unmatched target orders are False.
+    """
+    if source_rows is None:
+        source_rows = match_rows(source, target['magic'])
+    matched = source_rows >= 0
+    needs_update = np.zeros(len(target), dtype=bool)
+    if not matched.any():
+        return needs_update
+
+    pairs = source[source_rows[matched]]
+    copies = target[matched]
+    expected_lots = np.round(np.maximum(min_lot, np.minimum(max_lot, pairs['volume_initial'] * multiplier)), 2)
+
+    changed = np.abs(pairs['price_open'] - copies['price_open']) > tolerance
+    changed |= np.abs(expected_lots - copies['volume_initial']) > tolerance
+    changed |= np.abs(pairs['sl'] - copies['sl']) > tolerance
+    changed |= np.abs(pairs['tp'] - copies['tp']) > tolerance
+    changed |= pairs['expiration'] != copies['expiration']
+
+    needs_update[matched] = changed
+    return needs_update
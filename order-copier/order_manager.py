@@ -1,32 +1,129 @@
 # MT5 Pending Order Copier System - Order Management Core
 # This module handles order copying, synchronization, and management logic
 
+import os
+import time
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Set, Iterable, FrozenSet
 from datetime import datetime
 
 from mt5_connector import MT5Connector
 from order_tracker import OrderTracker
+from source_snapshot import SourceSnapshot
+from terminal_workers import TerminalWorkerPool
+from session_manager import SessionManager
+from fingerprints import TerminalFingerprints
+from placement_journal import PlacementJournal
+from state_writer import StateWriter
+from circuit_breaker import CircuitBreakers
+from call_supervisor import SupervisedMT5, CALL_CONNECT, CALL_FETCH, CALL_TRADE
+from reconciliation import (
+    ReconciliationPlanner, ReconciliationPlan,
+    ACTION_CREATE, ACTION_MODIFY, ACTION_CANCEL, ACTION_CLOSE, ACTION_SLTP,
+    TASK_ORPHANS, TASK_ACTIONS, ALL_TASKS
+)
 from utils import (
     setup_logging, format_error_message, calculate_lot_size,
-    validate_lot_size, is_valid_order_type, get_order_type_code,
-    validate_symbol_mapping, safe_float_compare, create_order_summary,
-    format_price, get_current_timestamp
+    validate_lot_size, get_order_type_code, create_order_summary,
+    format_price, get_current_timestamp, build_symbol_group
 )
 
+# Outcomes of the pre-skip totals probe
+PROBE_UNCHANGED = 'unchanged'      # Terminal can be skipped
+PROBE_CHANGED = 'changed'          # Terminal needs a full check
+PROBE_UNREACHABLE = 'unreachable'  # Terminal could not be connected to
+
 class OrderManager:
     """Manages order copying, synchronization, and lifecycle"""
     
-    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None):
+    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None,
+                 tracker: Optional[OrderTracker] = None, backend=None):
         self.logger = logger or setup_logging()
         self.config = config
         self.source_config = config['SOURCE_TERMINAL']
         self.target_configs = config['TARGET_TERMINALS']
         self.system_config = config.get('SYSTEM_CONFIG', {})
+        self.performance_config = config.get('PERFORMANCE_CONFIG', {})
+        
+        # MT5 calls run in a supervised worker process with a deadline per call class, unless an
+        # in-process backend (e.g. SimulatedBroker) is supplied
+        self.call_supervisor = None
+        if backend is None and self.system_config.get('supervise_mt5_calls', True):
+            self.call_supervisor = SupervisedMT5({
+                CALL_CONNECT: self.system_config.get('connection_timeout', 90),
+                CALL_FETCH: self.system_config.get('fetch_timeout', 30),
+                CALL_TRADE: self.system_config.get('trade_timeout', 30)
+            }, self.logger, mt5_module=self.performance_config.get('mt5_module'))
+            backend = self.call_supervisor
         
         # Initialize components
-        self.connector = MT5Connector(logger=self.logger)
-        self.tracker = OrderTracker(logger=self.logger)
+        symbol_cache_ttl = 0
+        if self.performance_config.get('cache_symbol_info', True):
+            symbol_cache_ttl = self.performance_config.get('cache_duration_seconds', 300)
+        self.connector = MT5Connector(logger=self.logger, symbol_cache_ttl=symbol_cache_ttl, backend=backend)
+        if tracker is None:
+            if self.performance_config.get('tracker_backend', 'json') == 'sqlite':
+                tracker = OrderTracker(state_file="order_tracker_state.db", logger=self.logger, backend='sqlite')
+            else:
+                tracker = OrderTracker(logger=self.logger,
+                                       journal=self.performance_config.get('tracker_journal', True),
+                                       compact_every_events=self.performance_config.get('journal_compact_events', 1000))
+        self.tracker = tracker
+        
+        # Tracker state is written by a background thread so cycles never wait for disk
+        self.state_writer = None
+        if self.performance_config.get('background_state_writer', True):
+            self.state_writer = StateWriter(self.tracker, self.logger,
+                                            self.performance_config.get('state_writer_debounce_seconds', 1.0))
+        self.sessions = SessionManager(self.connector, self.logger,
+                                       persistent=self.performance_config.get('persistent_sessions', True))
+        if self.call_supervisor:
+            # A replaced call worker has no session - reconnect on the next acquire
+            self.call_supervisor.on_restart = self.sessions.close_all
+        self.planner = ReconciliationPlanner(
+            self.logger, vectorize_min_orders=self.performance_config.get('vectorized_planning_min_orders', 200)
+        )
+        
+        # Terminals left in sync with an unchanged source are skipped until a full check is due
+        self.fingerprints = None
+        if self.performance_config.get('skip_unchanged_terminals', True):
+            self.fingerprints = TerminalFingerprints(self.performance_config.get('full_check_interval_seconds', 300))
+        
+        # Placement intents are journaled so a crash between order_send and the next scan cannot duplicate a copy
+        self.placements = None
+        placement_journal_dir = self._placement_journal_dir()
+        if placement_journal_dir:
+            self.placements = PlacementJournal(placement_journal_dir, self.logger)
+        
+        # Worker processes are started on the first cycle when parallel mode is enabled
+        self.worker_pool = None
+        if self.performance_config.get('parallel_terminals', False):
+            # Workers keep their state in memory, so they are given the resolved absolute journal directory
+            worker_config = dict(config)
+            worker_config['PERFORMANCE_CONFIG'] = dict(self.performance_config, placement_journal_dir=placement_journal_dir)
+            self.worker_pool = TerminalWorkerPool(worker_config, self.logger, backend=backend)
+        
+        # Results of the most recent cycle, per terminal
+        self.last_cycle_results = {}
+        
+        # Terminals that could not be reached are skipped until their breaker's cooldown ends
+        self.breakers = None
+        if self.system_config.get('circuit_breaker_enabled', True):
+            self.breakers = CircuitBreakers(
+                failure_threshold=self.system_config.get('circuit_breaker_failure_threshold', 3),
+                cooldown_seconds=self.system_config.get('circuit_breaker_cooldown_seconds', 60),
+                max_cooldown_seconds=self.system_config.get('circuit_breaker_max_cooldown_seconds', 900),
+                logger=self.logger
+            )
+        self.terminal_reachable = {}  # terminal_name -> whether the terminal was reached in the current cycle
+        
+        # Whether the last cycle found the source changed since the cycle before (drives the adaptive cadence)
+        self.last_source_fingerprint = None
+        self.source_changed = False
+        
+        # Orphan sweeps run at most every orphan_check_interval seconds per terminal
+        self.clock = time.monotonic
+        self.next_orphan_sweep = {}  # terminal_name -> monotonic time the next sweep is due
         
         # Statistics
         self.stats = {
@@ -35,57 +132,78 @@ class OrderManager:
             'orders_cancelled': 0,
             'positions_updated': 0,
             'errors': 0,
-            'terminals_processed': 0
+            'terminals_processed': 0,
+            'terminals_skipped': 0,
+            'terminals_circuit_open': 0
         }
     
-    def process_all_terminals(self) -> bool:
-        """Main processing function - handles all terminals sequentially"""
+    def _placement_journal_dir(self) -> Optional[str]:
+        """Get the absolute placement journal directory; relative paths are resolved next to the tracker state file"""
+        directory = self.performance_config.get('placement_journal_dir', 'placement_journal')
+        if not directory or os.path.isabs(directory):
+            return directory
+        if not self.tracker.state_file:
+            # An in-memory tracker has nowhere durable to keep its journals
+            return None
+        return os.path.abspath(os.path.join(os.path.dirname(self.tracker.state_file), directory))
+    
+    def process_all_terminals(self, tasks: Optional[Iterable[str]] = None,
+                              terminals: Optional[Iterable[str]] = None) -> bool:
+        """Main processing function - handles all target terminals
+        
+        tasks limits the cycle to some of TASK_COPY, TASK_SLTP and TASK_ORPHANS; the source snapshot,
+        sessions and plan are shared by all of them. terminals limits the cycle to some target terminals,
+        processed in the given order. Statistics are logged after cycles running all tasks only.
+        """
+        full_cycle = tasks is None
+        tasks = ALL_TASKS if tasks is None else frozenset(tasks)
+        target_configs = self._select_terminals(terminals)
         try:
-            self.logger.info("Starting order copying process for all terminals")
+            if terminals is None:
+                self.logger.info("Starting order copying process for all terminals")
+            else:
+                self.logger.info(f"Starting order copying process for {', '.join(target_configs)}")
             
-            # Step 1: Get source orders and positions
-            source_orders = self._get_source_orders()
-            if source_orders is None:
-                self.logger.error("Failed to retrieve source orders")
+            # Step 1: Capture source orders and positions in a single session
+            snapshot = self._get_source_snapshot()
+            if snapshot is None:
+                self.logger.error("Failed to retrieve source snapshot")
                 return False
             
-            source_positions = self._get_source_positions()
-            if source_positions is None:
-                self.logger.error("Failed to retrieve source positions")
-                return False
+            source_orders = snapshot.orders
+            source_positions = snapshot.positions
+            
+            self.source_changed = snapshot.fingerprint != self.last_source_fingerprint
+            self.last_source_fingerprint = snapshot.fingerprint
             
             # Update tracker with source data
             self.tracker.update_source_orders(source_orders)
             self.tracker.update_source_positions(source_positions)
             
-            # Step 2: Process each target terminal
-            terminals_with_errors = []
-            terminals_processed_successfully = 0
-            
-            for terminal_name, terminal_config in self.target_configs.items():
-                try:
-                    self.logger.info(f"Processing terminal: {terminal_name}")
-                    
-                    if self._process_terminal(terminal_name, terminal_config, source_orders, source_positions):
-                        terminals_processed_successfully += 1
-                        self.stats['terminals_processed'] += 1
-                        self.logger.info(f"Successfully processed terminal: {terminal_name}")
-                    else:
-                        self.logger.error(f"Failed to process terminal: {terminal_name}")
-                        terminals_with_errors.append(terminal_name)
-                    
-                except Exception as e:
-                    self.logger.error(f"Exception processing terminal {terminal_name}: {format_error_message(e)}")
-                    terminals_with_errors.append(terminal_name)
+            # Step 2: Process each target terminal whose circuit breaker is not open
+            open_terminals = self._open_circuit_terminals(target_configs)
+            reachable_configs = {terminal_name: terminal_config for terminal_name, terminal_config in target_configs.items()
+                                 if terminal_name not in open_terminals}
+            if self.worker_pool:
+                terminals_with_errors = self._process_terminals_parallel(snapshot, tasks, reachable_configs)
+            else:
+                terminals_with_errors = self._process_terminals_sequential(source_orders, source_positions,
+                                                                           snapshot.fingerprint, tasks, reachable_configs)
+            self._record_terminal_health(reachable_configs)
+            terminals_with_errors = open_terminals + terminals_with_errors
+            
+            terminals_processed_successfully = len(target_configs) - len(terminals_with_errors)
             
-            # Step 3: Save tracking state
-            if not self.tracker.save_state():
+            # Step 3: Save tracking state (queued for the background writer when enabled)
+            saved = self.state_writer.request_save() if self.state_writer else self.tracker.save_state()
+            if not saved:
                 self.logger.warning("Failed to save tracking state")
             
             # Step 4: Log final statistics and determine overall success
-            self._log_statistics()
+            if full_cycle:
+                self.log_statistics()
             
-            total_terminals = len(self.target_configs)
+            total_terminals = len(target_configs)
             success = len(terminals_with_errors) == 0
             
             if success:
@@ -109,97 +227,235 @@ class OrderManager:
             self.logger.error(f"Critical error in process_all_terminals: {format_error_message(e)}")
             return False
     
-    def _get_source_orders(self) -> Optional[List[Dict[str, Any]]]:
-        """Retrieve orders from source terminal"""
-        try:
-            self.logger.info("Connecting to source terminal")
+    def _select_terminals(self, terminals: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the configs of the given target terminals in their given order (all when None)"""
+        if terminals is None:
+            return self.target_configs
+        
+        selected = {}
+        for terminal_name in terminals:
+            if terminal_name in self.target_configs:
+                selected[terminal_name] = self.target_configs[terminal_name]
+            else:
+                self.logger.warning(f"Unknown target terminal {terminal_name}, skipping")
+        return selected
+    
+    def _open_circuit_terminals(self, target_configs: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Get the terminals whose circuit breaker is open and record them as failed for this cycle"""
+        if not self.breakers:
+            return []
+        
+        open_terminals = [terminal_name for terminal_name in target_configs if not self.breakers.allow(terminal_name)]
+        for terminal_name in open_terminals:
+            self.logger.warning(f"Circuit breaker open for {terminal_name}, skipping terminal")
+            self.stats['terminals_circuit_open'] += 1
+            self.last_cycle_results[terminal_name] = {'terminal': terminal_name, 'success': False,
+                                                      'error': "Circuit breaker open"}
+        return open_terminals
+    
+    def _record_terminal_health(self, target_configs: Dict[str, Dict[str, Any]]) -> None:
+        """Feed whether each processed terminal was reached into its circuit breaker"""
+        for terminal_name in target_configs:
+            reachable = self.terminal_reachable.pop(terminal_name, None)
+            if not self.breakers or reachable is None:
+                continue
+            if reachable:
+                self.breakers.record_success(terminal_name)
+            else:
+                self.breakers.record_failure(terminal_name, self.last_cycle_results.get(terminal_name, {}).get('error'))
+    
+    def _process_terminals_sequential(self, source_orders: List[Dict[str, Any]],
+                                      source_positions: List[Dict[str, Any]],
+                                      source_fingerprint: Optional[str] = None,
+                                      tasks: FrozenSet[str] = ALL_TASKS,
+                                      target_configs: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+        """Process target terminals one after another in this process"""
+        target_configs = self.target_configs if target_configs is None else target_configs
+        terminals_with_errors = []
+        
+        for terminal_name, terminal_config in target_configs.items():
+            timeouts_before = self.call_supervisor.stats['timeouts'] if self.call_supervisor else 0
+            try:
+                self.logger.info(f"Processing terminal: {terminal_name}")
+                
+                if self._process_terminal(terminal_name, terminal_config, source_orders, source_positions,
+                                          source_fingerprint, self._terminal_tasks(terminal_name, terminal_config, tasks)):
+                    self.stats['terminals_processed'] += 1
+                    self.last_cycle_results[terminal_name] = {'terminal': terminal_name, 'success': True, 'error': None}
+                    self.logger.info(f"Successfully processed terminal: {terminal_name}")
+                else:
+                    self.logger.error(f"Failed to process terminal: {terminal_name}")
+                    self.last_cycle_results[terminal_name] = {'terminal': terminal_name, 'success': False, 'error': None}
+                    terminals_with_errors.append(terminal_name)
+                
+            except Exception as e:
+                self.logger.error(f"Exception processing terminal {terminal_name}: {format_error_message(e)}")
+                self.terminal_reachable[terminal_name] = False
+                self.last_cycle_results[terminal_name] = {'terminal': terminal_name, 'success': False,
+                                                          'error': format_error_message(e)}
+                terminals_with_errors.append(terminal_name)
+            
+            # A timed-out MT5 call means the terminal hung, even if the rest of its cycle went on
+            if self.call_supervisor and self.call_supervisor.stats['timeouts'] > timeouts_before:
+                self.terminal_reachable[terminal_name] = False
+        
+        return terminals_with_errors
+    
+    def _process_terminals_parallel(self, snapshot: SourceSnapshot, tasks: FrozenSet[str] = ALL_TASKS,
+                                    target_configs: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+        """Process target terminals concurrently in their worker processes"""
+        target_configs = self.target_configs if target_configs is None else target_configs
+        if not self.worker_pool.is_running and not self.worker_pool.start():
+            self.logger.error("Failed to start terminal worker processes")
+            return list(target_configs.keys())
+        
+        # Hash once here so workers receive the fingerprint with the snapshot
+        snapshot.fingerprint
+        terminal_tasks = {terminal_name: self._terminal_tasks(terminal_name, terminal_config, tasks)
+                          for terminal_name, terminal_config in target_configs.items()}
+        results = self.worker_pool.process_cycle(snapshot, self.tracker.state['orphan_checks'], terminal_tasks,
+                                                 list(target_configs))
+        terminals_with_errors = []
+        
+        for terminal_name in target_configs:
+            result = results.get(terminal_name)
+            if result is None:
+                result = {'terminal': terminal_name, 'success': False, 'error': "No result from worker", 'reachable': False}
+            self.terminal_reachable[terminal_name] = result.get('reachable')
+            
+            # Merge the worker's statistics and tracked state into this process
+            for key, value in result.get('stats', {}).items():
+                if key in self.stats:
+                    self.stats[key] += value
+            
+            if result.get('state'):
+                self.tracker.apply_terminal_state(terminal_name, result['state'])
             
-            if not self.connector.connect(self.source_config, "Source"):
+            self.last_cycle_results[terminal_name] = {key: result.get(key) for key in ('terminal', 'success', 'error', 'stats', 'sessions', 'symbol_cache', 'call_supervisor')}
+            
+            if result['success']:
+                self.stats['terminals_processed'] += 1
+                self.logger.info(f"Successfully processed terminal: {terminal_name}")
+            else:
+                error = f": {result['error']}" if result.get('error') else ""
+                self.logger.error(f"Failed to process terminal: {terminal_name}{error}")
+                terminals_with_errors.append(terminal_name)
+        
+        return terminals_with_errors
+    
+    def _get_source_snapshot(self) -> Optional[SourceSnapshot]:
+        """Capture orders, positions and account state from the source terminal in one session"""
+        try:
+            if not self.sessions.acquire(self.source_config, "Source"):
                 self.logger.error("Failed to connect to source terminal")
                 return None
             
-            # Get pending orders
-            orders = self.connector.get_pending_orders()
-            self.logger.info(f"Retrieved {len(orders)} orders from source terminal")
+            snapshot = self.connector.capture_snapshot()
+            self.logger.info(f"Retrieved {snapshot.order_count} orders and {snapshot.position_count} positions from source terminal")
             
-            # Disconnect from source
-            self.connector.disconnect()
+            self.sessions.release("Source")
             
-            return orders
+            return snapshot
             
         except Exception as e:
-            self.logger.error(f"Error getting source orders: {format_error_message(e)}")
-            self.connector.disconnect()
+            self.logger.error(f"Error capturing source snapshot: {format_error_message(e)}")
+            self.sessions.invalidate("Source")
             return None
     
-    def _get_source_positions(self) -> Optional[List[Dict[str, Any]]]:
-        """Retrieve positions from source terminal"""
+    def get_source_totals(self) -> Optional[Tuple[int, int]]:
+        """Poll the source terminal's order/position counts in its session"""
         try:
-            self.logger.info("Connecting to source terminal for positions")
-            
-            if not self.connector.connect(self.source_config, "Source"):
+            if not self.sessions.acquire(self.source_config, "Source"):
                 self.logger.error("Failed to connect to source terminal")
                 return None
             
-            # Get positions
-            positions = self.connector.get_positions()
-            self.logger.info(f"Retrieved {len(positions)} positions from source terminal")
-            
-            # Disconnect from source
-            self.connector.disconnect()
-            
-            return positions
+            totals = self.connector.get_totals()
+            self.sessions.release("Source")
+            return totals
+        
+        except Exception as e:
+            self.logger.error(f"Error polling source totals: {format_error_message(e)}")
+            self.sessions.invalidate("Source")
+            return None
+    
+    def get_source_signature(self) -> Optional[Tuple[int, int, str]]:
+        """Poll the source terminal's change signature (order/position counts and hash) in its session"""
+        try:
+            if not self.sessions.acquire(self.source_config, "Source"):
+                self.logger.error("Failed to connect to source terminal")
+                return None
             
+            signature = self.connector.get_change_signature()
+            self.sessions.release("Source")
+            return signature
+        
         except Exception as e:
-            self.logger.error(f"Error getting source positions: {format_error_message(e)}")
-            self.connector.disconnect()
+            self.logger.error(f"Error polling source change signature: {format_error_message(e)}")
+            self.sessions.invalidate("Source")
             return None
     
     def _process_terminal(self, terminal_name: str, terminal_config: Dict[str, Any], 
-                        source_orders: List[Dict[str, Any]], source_positions: List[Dict[str, Any]]) -> bool:
-        """Process a single target terminal"""
+                        source_orders: List[Dict[str, Any]], source_positions: List[Dict[str, Any]],
+                        source_fingerprint: Optional[str] = None, tasks: FrozenSet[str] = ALL_TASKS) -> bool:
+        """Process a single target terminal (only the actions of the given tasks are executed)"""
         try:
-            # Connect to target terminal
-            if not self.connector.connect(terminal_config, terminal_name):
+            # Skip terminals already in sync with this source state
+            probe = PROBE_CHANGED
+            if source_fingerprint is not None:
+                probe = self._probe_terminal(terminal_name, terminal_config, source_fingerprint)
+            if probe == PROBE_UNCHANGED:
+                self.fingerprints.record_skip()
+                self.stats['terminals_skipped'] += 1
+                self.logger.info(f"No source or target changes for {terminal_name}, skipping")
+                return True
+            
+            # Connect to target terminal (reuses a live session when available; a failed probe already tried)
+            if probe == PROBE_UNREACHABLE or not self.sessions.acquire(terminal_config, terminal_name):
                 self.logger.error(f"Failed to connect to {terminal_name}")
+                self.terminal_reachable[terminal_name] = False
                 return False
+            self.terminal_reachable[terminal_name] = True
+            
+            # Settle placements left in flight by a crash or a failed order_send
+            if self.placements:
+                self._recover_placements(terminal_name)
             
-            # Get current target orders and positions
-            target_orders = self.connector.get_pending_orders()
+            # Get current target orders and positions (only copies on mapped symbols when filtering)
+            group, magics = self._target_filter(terminal_name, terminal_config, source_orders, source_positions)
+            target_orders = self.connector.get_pending_orders(group, magics)
             self.logger.info(f"Retrieved {len(target_orders)} orders from {terminal_name}")
             
-            target_positions = self.connector.get_positions()
+            target_positions = self.connector.get_positions(group, magics)
             self.logger.info(f"Retrieved {len(target_positions)} positions from {terminal_name}")
             
             # Update tracker with target data
             self.tracker.update_target_orders(terminal_name, target_orders)
             self.tracker.update_target_positions(terminal_name, target_positions)
             
-            # Process orders - continue with all steps regardless of individual failures
-            failed_steps = []
-            
-            # Step 1: Copy new orders
-            if not self._copy_new_orders(terminal_name, terminal_config, source_orders, target_orders):
-                failed_steps.append("copy_new_orders")
-            
-            # Step 2: Update modified orders
-            if not self._update_modified_orders(terminal_name, terminal_config, source_orders, target_orders):
-                failed_steps.append("update_modified_orders")
+            # Build the action plan in a single pass over source and target state
+            plan = self.planner.plan(
+                terminal_name, terminal_config,
+                source_orders, source_positions, target_orders, target_positions,
+                orphan_check_count=lambda ticket: self.tracker.get_orphan_check_count(terminal_name, ticket)
+            )
+            self.logger.info(f"Reconciliation plan for {terminal_name}: {plan.summary()}")
             
-            # Step 3: Handle orphaned orders
-            if not self._handle_orphaned_orders(terminal_name, terminal_config, target_orders):
-                failed_steps.append("handle_orphaned_orders")
+            # Execute the plan - continue with all actions regardless of individual failures
+            failed_steps = self._execute_plan(terminal_name, terminal_config, plan, tasks)
             
-            # Step 4: Handle orphaned positions
-            if not self._handle_orphaned_positions(terminal_name, terminal_config, target_positions):
-                failed_steps.append("handle_orphaned_positions")
+            if self.placements:
+                self.placements.retain(terminal_name, (order['ticket'] for order in source_orders))
             
-            # Step 5: Synchronize positions
-            if not self._synchronize_positions(terminal_name, source_positions, target_positions):
-                failed_steps.append("synchronize_positions")
+            # Remember the state only when nothing was changed or is pending on the target
+            if self.fingerprints and source_fingerprint is not None:
+                if len(plan) == 0 and not plan.orphaned_orders and not plan.orphaned_positions and not failed_steps:
+                    # Filtered lists do not count the whole account - record the totals the probe will see
+                    totals = self.connector.get_totals() if magics is not None else None
+                    self.fingerprints.record(terminal_name, source_fingerprint, target_orders, target_positions, totals)
+                else:
+                    self.fingerprints.invalidate(terminal_name)
             
-            # Disconnect from target terminal
-            self.connector.disconnect()
+            self.sessions.release(terminal_name)
             
             # Determine overall success and log results
             success = len(failed_steps) == 0
@@ -213,79 +469,153 @@ class OrderManager:
             
         except Exception as e:
             self.logger.error(f"Error processing terminal {terminal_name}: {format_error_message(e)}")
-            self.connector.disconnect()
+            self.terminal_reachable[terminal_name] = False
+            self.sessions.invalidate(terminal_name)
+            if self.fingerprints:
+                self.fingerprints.invalidate(terminal_name)
             return False
     
-    def _synchronize_positions(self, terminal_name: str, source_positions: List[Dict[str, Any]], 
-                             target_positions: List[Dict[str, Any]]) -> bool:
-        """Synchronize positions between source and target terminals"""
-        try:
-            self.logger.info(f"Synchronizing positions for {terminal_name}")
-            
-            # Create mapping of source positions by magic number (source ticket)
-            source_pos_map = {pos['magic']: pos for pos in source_positions}
-            
-            # Check each target position for updates needed
-            failed_position_updates = []
-            successful_position_updates = 0
-            
-            for target_pos in target_positions:
-                magic_number = target_pos.get('magic')
-                
-                # Find corresponding source position
-                if magic_number in source_pos_map:
-                    source_pos = source_pos_map[magic_number]
-                    
-                    # Check if position needs update
-                    if self._position_needs_update(source_pos, target_pos):
-                        if self._update_single_position(target_pos, source_pos):
-                            self.stats['positions_updated'] += 1
-                            successful_position_updates += 1
-                            self.logger.info(f"Updated position {target_pos['ticket']} on {terminal_name}")
-                        else:
-                            self.logger.error(f"Failed to update position {target_pos['ticket']} on {terminal_name}")
-                            failed_position_updates.append(target_pos['ticket'])
-            
-            if failed_position_updates:
-                self.logger.warning(f"Failed to update {len(failed_position_updates)} positions on {terminal_name}. "
-                                  f"Failed position updates: {', '.join(map(str, failed_position_updates))}. "
-                                  f"Successfully updated: {successful_position_updates} positions.")
-            elif successful_position_updates > 0:
-                self.logger.info(f"Successfully updated all {successful_position_updates} positions on {terminal_name}")
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error synchronizing positions for {terminal_name}: {format_error_message(e)}")
-            return False
+    def _recover_placements(self, terminal_name: str) -> None:
+        """Look up in-flight placements on the target and record whether they were placed"""
+        for entry in self.placements.in_flight(terminal_name):
+            source_ticket = entry['source_ticket']
+            target_ticket = self._find_existing_copy(terminal_name, entry['symbol'], source_ticket)
+            self.placements.resolve(terminal_name, source_ticket, target_ticket)
+            if target_ticket is not None:
+                self.logger.info(f"In-flight copy of order {source_ticket} found on {terminal_name} as {target_ticket}")
+            else:
+                self.logger.info(f"In-flight copy of order {source_ticket} not found on {terminal_name}, it will be copied again")
     
-    def _position_needs_update(self, source_pos: Dict[str, Any], target_pos: Dict[str, Any]) -> bool:
-        """Check if a position needs to be updated based on source position"""
-        try:
-            # Check Stop Loss
-            source_sl = source_pos.get('sl', 0.0)
-            target_sl = target_pos.get('sl', 0.0)
-            
-            # Check Take Profit
-            source_tp = source_pos.get('tp', 0.0)
-            target_tp = target_pos.get('tp', 0.0)
-            
-            # Compare with small tolerance for floating point precision
-            tolerance = 1e-5
-            
-            sl_different = abs(source_sl - target_sl) > tolerance
-            tp_different = abs(source_tp - target_tp) > tolerance
-            
-            if sl_different or tp_different:
-                self.logger.debug(f"Position {target_pos['ticket']} needs update: "
-                                f"SL {target_sl} -> {source_sl}, TP {target_tp} -> {source_tp}")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            self.logger.error(f"Error checking if position needs update: {format_error_message(e)}")
-            return False
+    def _target_filter(self, terminal_name: str, terminal_config: Dict[str, Any],
+                       source_orders: List[Dict[str, Any]],
+                       source_positions: List[Dict[str, Any]]) -> Tuple[Optional[str], Optional[Set[int]]]:
+        """Get the symbol group and magic numbers that target retrieval is limited to, (None, None) for everything
+        
+        The magic numbers are the source tickets plus those of copies tracked on the terminal, so
+        copies whose source order is gone are still retrieved and handled as orphans.
+        """
+        if not terminal_config.get('filter_target_records', False):
+            return None, None
+        
+        symbol_mapping = terminal_config.get('symbol_mapping', {})
+        group = build_symbol_group(symbol_mapping.values()) if symbol_mapping else None
+        
+        magics = {order['ticket'] for order in source_orders}
+        magics.update(position['ticket'] for position in source_positions)
+        magics |= self.tracker.get_tracked_magics(terminal_name)
+        magics.discard(0)  # Manual trades
+        return group, magics
+    
+    def _terminal_tasks(self, terminal_name: str, terminal_config: Dict[str, Any],
+                        tasks: FrozenSet[str]) -> FrozenSet[str]:
+        """Drop the orphan sweep from a terminal's tasks until its orphan_check_interval has passed
+        
+        Sweep times stay on a fixed grid from the first sweep, so a sweep timer that fires a little
+        late never pushes the next sweep back by a whole interval.
+        """
+        if TASK_ORPHANS not in tasks:
+            return tasks
+        
+        interval = terminal_config.get('orphan_management', {}).get('orphan_check_interval', 0)
+        now = self.clock()
+        due_at = self.next_orphan_sweep.get(terminal_name)
+        if due_at is not None and now < due_at:
+            return tasks - {TASK_ORPHANS}
+        
+        if interval > 0:
+            if due_at is None:
+                due_at = now
+            self.next_orphan_sweep[terminal_name] = due_at + (int((now - due_at) // interval) + 1) * interval
+        return tasks
+    
+    def _find_existing_copy(self, terminal_name: str, symbol: str, source_ticket: int) -> Optional[int]:
+        """Find the ticket of a target order or position copied from a source ticket"""
+        copies = self.connector.find_copies(symbol, source_ticket)
+        if copies is None:
+            self.logger.warning(f"Targeted lookup failed on {terminal_name}, scanning all orders and positions")
+            copies = [record for record in self.connector.get_pending_orders() + self.connector.get_positions()
+                      if record['magic'] == source_ticket]
+        return copies[0]['ticket'] if copies else None
+    
+    def _probe_terminal(self, terminal_name: str, terminal_config: Dict[str, Any], source_fingerprint: str) -> str:
+        """Check if a terminal can be skipped because neither source nor target changed (PROBE_* outcome)"""
+        if not self.fingerprints or not self.fingerprints.is_unchanged(terminal_name, source_fingerprint):
+            return PROBE_CHANGED
+        
+        # Always probe the totals, even at the cost of a login - a copy cancelled by hand must not wait for the full check
+        if not self.sessions.acquire(terminal_config, terminal_name):
+            # Its state is unknown until the next successful full check
+            self.fingerprints.invalidate(terminal_name)
+            return PROBE_UNREACHABLE
+        
+        totals = self.connector.get_totals()
+        self.sessions.release(terminal_name)
+        
+        if totals is None or not self.fingerprints.matches_totals(terminal_name, *totals):
+            self.logger.info(f"Order/position totals changed on {terminal_name}, running full check")
+            return PROBE_CHANGED
+        
+        return PROBE_UNCHANGED
+    
+    def _execute_plan(self, terminal_name: str, terminal_config: Dict[str, Any], plan: ReconciliationPlan,
+                      tasks: FrozenSet[str] = ALL_TASKS) -> List[str]:
+        """Execute the actions of the given tasks in a plan and return the names of steps that raised errors"""
+        failed_steps = []
+        kinds = {kind for task in tasks for kind in TASK_ACTIONS[task]}
+        
+        # Orphan check counters advance for every orphan seen by an orphan sweep
+        if TASK_ORPHANS in tasks:
+            max_checks = terminal_config.get('orphan_management', {}).get('max_orphan_checks', 3)
+            for orphan in plan.orphaned_orders + plan.orphaned_positions:
+                ticket = orphan['ticket']
+                check_count = self.tracker.increment_orphan_check(terminal_name, ticket)
+                if check_count < max_checks:
+                    self.logger.info(f"Orphan {ticket} on {terminal_name} check count: {check_count}/{max_checks}")
+        
+        # Latency-critical copies, modifications and SL/TP updates go before orphan housekeeping
+        steps = [
+            (ACTION_CREATE, "copy_new_orders", 'orders_copied',
+             lambda action: self._copy_single_order(terminal_name, terminal_config, action.source, action.target_symbol)),
+            (ACTION_MODIFY, "update_modified_orders", 'orders_updated',
+             lambda action: self._update_single_order(terminal_name, terminal_config, action.source, action.target)),
+            (ACTION_SLTP, "synchronize_positions", 'positions_updated',
+             lambda action: self._update_single_position(action.target, action.source)),
+            (ACTION_CANCEL, "handle_orphaned_orders", 'orders_cancelled',
+             lambda action: self._cancel_orphaned_order(terminal_name, action.target, action.target)),
+            (ACTION_CLOSE, "handle_orphaned_positions", 'positions_updated',  # Reusing this stat for closed positions
+             lambda action: self._close_orphaned_position(terminal_name, action.target, action.target))
+        ]
+        
+        for kind, step_name, stat_key, execute in steps:
+            actions = plan.get(kind)
+            if not actions or kind not in kinds:
+                continue
+            
+            try:
+                failed_tickets = []
+                for action in actions:
+                    if execute(action):
+                        self.stats[stat_key] += 1
+                        if kind in (ACTION_CANCEL, ACTION_CLOSE):
+                            # Reset check counter after successful cancellation/closure
+                            self.tracker.reset_orphan_check(terminal_name, action.ticket)
+                    else:
+                        failed_tickets.append(action.ticket)
+                
+                if failed_tickets:
+                    self.logger.warning(f"{step_name} on {terminal_name}: {len(failed_tickets)} of {len(actions)} actions failed. "
+                                      f"Failed tickets: {', '.join(map(str, failed_tickets))}")
+                else:
+                    self.logger.info(f"{step_name} on {terminal_name}: all {len(actions)} actions succeeded")
+                
+            except Exception as e:
+                self.logger.error(f"Error in {step_name} on {terminal_name}: {format_error_message(e)}")
+                failed_steps.append(step_name)
+        
+        # Clean up orphan checks for orders and positions that no longer exist
+        self.tracker.cleanup_orphan_checks(terminal_name, plan.active_tickets)
+        
+        return failed_steps
     
     def _update_single_position(self, target_pos: Dict[str, Any], source_pos: Dict[str, Any]) -> bool:
         """Update a single position's SL/TP based on source position"""
@@ -300,13 +630,14 @@ class OrderManager:
             
             self.logger.info(f"Updating position {ticket} with SL: {modifications['sl']}, TP: {modifications['tp']}")
             
-            # Use the connector to modify the position
-            success = self.connector.modify_position(ticket, modifications)
+            # Pass the record from this cycle so the connector does not query it again
+            success, message = self.connector.modify_position(ticket, sl=modifications['sl'], tp=modifications['tp'],
+                                                              position=target_pos)
             
             if success:
                 self.logger.info(f"Successfully updated position {ticket}")
             else:
-                self.logger.error(f"Failed to update position {ticket}")
+                self.logger.error(f"Failed to update position {ticket}: {message}")
             
             return success
             
@@ -314,70 +645,10 @@ class OrderManager:
             self.logger.error(f"Error updating position {target_pos.get('ticket', 'unknown')}: {format_error_message(e)}")
             return False
     
-    def _copy_new_orders(self, terminal_name: str, terminal_config: Dict[str, Any],
-                        source_orders: List[Dict[str, Any]], target_orders: List[Dict[str, Any]]) -> bool:
-        """Copy new orders from source to target terminal"""
-        try:
-            # Get existing magic numbers (source tickets) on target
-            existing_magics = {order['magic'] for order in target_orders}
-            
-            # Find new source orders to copy
-            new_orders = []
-            for source_order in source_orders:
-                source_ticket = source_order['ticket']
-                if source_ticket not in existing_magics:
-                    new_orders.append(source_order)
-            
-            if not new_orders:
-                self.logger.info(f"No new orders to copy to {terminal_name}")
-                return True
-            
-            self.logger.info(f"Found {len(new_orders)} new orders to copy to {terminal_name}")
-            
-            # Check terminal constraints
-            if not self._check_terminal_constraints(terminal_name, terminal_config, len(target_orders), len(new_orders)):
-                return True  # Not an error, just constraint violation
-            
-            # Copy each new order
-            failed_orders = []
-            successful_orders = 0
-            
-            for source_order in new_orders:
-                if self._copy_single_order(terminal_name, terminal_config, source_order):
-                    self.stats['orders_copied'] += 1
-                    successful_orders += 1
-                else:
-                    self.logger.error(f"Failed to copy order {source_order['ticket']} to {terminal_name}")
-                    failed_orders.append(source_order['ticket'])
-            
-            if failed_orders:
-                self.logger.warning(f"Failed to copy {len(failed_orders)} out of {len(new_orders)} orders to {terminal_name}. "
-                                  f"Failed orders: {', '.join(map(str, failed_orders))}. "
-                                  f"Successfully copied: {successful_orders} orders.")
-            else:
-                self.logger.info(f"Successfully copied all {successful_orders} new orders to {terminal_name}")
-            
-            # Return True if at least some orders were processed successfully, or if there were no orders to copy
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error copying new orders to {terminal_name}: {format_error_message(e)}")
-            return False
-    
     def _copy_single_order(self, terminal_name: str, terminal_config: Dict[str, Any],
-                          source_order: Dict[str, Any]) -> bool:
-        """Copy a single order to target terminal"""
+                          source_order: Dict[str, Any], target_symbol: str) -> bool:
+        """Copy a single order to target terminal (type filter and symbol mapping are applied by the planner)"""
         try:
-            # Check order type filter
-            allowed_types = terminal_config.get('allowed_order_types', [])
-            if not is_valid_order_type(source_order['type_name'], allowed_types):
-                self.logger.info(f"Order type {source_order['type_name']} not allowed on {terminal_name}")
-                return True  # Not an error, just filtered out
-            
-            # Map symbol
-            symbol_mapping = terminal_config.get('symbol_mapping', {})
-            target_symbol = validate_symbol_mapping(source_order['symbol'], symbol_mapping)
-            
             # Check symbol availability
             symbol_info = self.connector.get_symbol_info(target_symbol)
             if symbol_info is None:
@@ -417,10 +688,23 @@ class OrderManager:
             if source_order['time_expiration']:
                 order_request['expiration'] = source_order['time_expiration']
             
+            if self.placements:
+                # A copy placed earlier may have been filled and no longer show up as a pending order
+                if self.placements.get(terminal_name, source_order['ticket']) is not None:
+                    existing_ticket = self._find_existing_copy(terminal_name, target_symbol, source_order['ticket'])
+                    if existing_ticket is not None:
+                        self.placements.record_duplicate_prevented()
+                        self.logger.info(f"Order {source_order['ticket']} already copied to {terminal_name} as {existing_ticket}, skipping")
+                        return True
+                
+                self.placements.record_intent(terminal_name, source_order['ticket'], target_symbol)
+            
             # Place order
             success, ticket, message = self.connector.place_order(order_request)
             
             if success:
+                if self.placements:
+                    self.placements.record_placed(terminal_name, source_order['ticket'], ticket)
                 self.logger.info(f"Successfully copied order {source_order['ticket']} to {terminal_name} as {ticket}")
                 return True
             else:
@@ -431,103 +715,6 @@ class OrderManager:
             self.logger.error(f"Error copying single order: {format_error_message(e)}")
             return False
     
-    def _update_modified_orders(self, terminal_name: str, terminal_config: Dict[str, Any],
-                               source_orders: List[Dict[str, Any]], target_orders: List[Dict[str, Any]]) -> bool:
-        """Update modified orders on target terminal"""
-        try:
-            # Create lookup dictionaries
-            source_dict = {order['ticket']: order for order in source_orders}
-            target_by_magic = {}
-            
-            for target_order in target_orders:
-                magic = target_order['magic']
-                if magic not in target_by_magic:
-                    target_by_magic[magic] = []
-                target_by_magic[magic].append(target_order)
-            
-            # Find orders that need updates
-            updates_needed = []
-            
-            for source_ticket, source_order in source_dict.items():
-                if source_ticket in target_by_magic:
-                    target_orders_list = target_by_magic[source_ticket]
-                    
-                    for target_order in target_orders_list:
-                        if self._order_needs_update(source_order, target_order, terminal_config):
-                            updates_needed.append((source_order, target_order))
-            
-            if not updates_needed:
-                self.logger.info(f"No order updates needed for {terminal_name}")
-                return True
-            
-            self.logger.info(f"Found {len(updates_needed)} orders to update on {terminal_name}")
-            
-            # Apply updates
-            failed_updates = []
-            successful_updates = 0
-            
-            for source_order, target_order in updates_needed:
-                if self._update_single_order(terminal_name, terminal_config, source_order, target_order):
-                    self.stats['orders_updated'] += 1
-                    successful_updates += 1
-                else:
-                    self.logger.error(f"Failed to update order {target_order['ticket']} on {terminal_name}")
-                    failed_updates.append(target_order['ticket'])
-            
-            if failed_updates:
-                self.logger.warning(f"Failed to update {len(failed_updates)} out of {len(updates_needed)} orders on {terminal_name}. "
-                                  f"Failed updates: {', '.join(map(str, failed_updates))}. "
-                                  f"Successfully updated: {successful_updates} orders.")
-            else:
-                self.logger.info(f"Successfully updated all {successful_updates} orders on {terminal_name}")
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error updating modified orders on {terminal_name}: {format_error_message(e)}")
-            return False
-    
-    def _order_needs_update(self, source_order: Dict[str, Any], target_order: Dict[str, Any],
-                           terminal_config: Dict[str, Any]) -> bool:
-        """Check if target order needs to be updated based on source order changes"""
-        # Calculate expected target values
-        multiplier = terminal_config.get('lot_multiplier', 1.0)
-        min_lot = terminal_config.get('min_lot_size', 0.01)
-        max_lot = terminal_config.get('max_lot_size', 100.0)
-        
-        expected_lot = calculate_lot_size(source_order['volume_initial'], multiplier, min_lot, max_lot)
-        
-        # Check for differences
-        tolerance = 1e-5
-        
-        # Price difference
-        if not safe_float_compare(source_order['price_open'], target_order['price_open'], tolerance):
-            return True
-        
-        # Volume difference
-        if not safe_float_compare(expected_lot, target_order['volume_initial'], tolerance):
-            return True
-        
-        # Stop loss difference
-        source_sl = source_order.get('sl', 0)
-        target_sl = target_order.get('sl', 0)
-        if not safe_float_compare(source_sl, target_sl, tolerance):
-            return True
-        
-        # Take profit difference
-        source_tp = source_order.get('tp', 0)
-        target_tp = target_order.get('tp', 0)
-        if not safe_float_compare(source_tp, target_tp, tolerance):
-            return True
-        
-        # Expiration time difference
-        source_exp = source_order.get('time_expiration')
-        target_exp = target_order.get('time_expiration')
-        if str(source_exp) != str(target_exp):
-            return True
-        
-        return False
-    
     def _update_single_order(self, terminal_name: str, terminal_config: Dict[str, Any],
                             source_order: Dict[str, Any], target_order: Dict[str, Any]) -> bool:
         """Update a single order on target terminal"""
@@ -567,7 +754,7 @@ class OrderManager:
             modifications['expiration'] = source_order.get('time_expiration')
             
             # Apply modification
-            success, message = self.connector.modify_order(target_order['ticket'], modifications)
+            success, message = self.connector.modify_order(target_order['ticket'], modifications, order=target_order)
             
             if success:
                 self.logger.info(f"Successfully updated order {target_order['ticket']} on {terminal_name}")
@@ -580,76 +767,15 @@ class OrderManager:
             self.logger.error(f"Error updating single order: {format_error_message(e)}")
             return False
     
-    def _handle_orphaned_orders(self, terminal_name: str, terminal_config: Dict[str, Any],
-                               target_orders: List[Dict[str, Any]]) -> bool:
-        """Handle orphaned orders according to terminal policy"""
-        try:
-            # Get orphan management configuration
-            orphan_config = terminal_config.get('orphan_management', {})
-            kill_orphans = orphan_config.get('kill_orphaned_orders', False)
-            max_checks = orphan_config.get('max_orphan_checks', 3)
-            
-            if not kill_orphans:
-                self.logger.info(f"Orphan killing disabled for {terminal_name}")
-                return True
-            
-            # Detect orphaned orders
-            orphaned_orders = self.tracker.detect_orphaned_orders(terminal_name)
-            
-            if not orphaned_orders:
-                self.logger.info(f"No orphaned orders found on {terminal_name}")
-                return True
-            
-            self.logger.info(f"Found {len(orphaned_orders)} orphaned orders on {terminal_name}")
-            
-            # Process each orphaned order
-            failed_cancellations = []
-            successful_cancellations = 0
-            
-            for orphan_order in orphaned_orders:
-                ticket = orphan_order['ticket']
-                
-                # Increment check counter
-                check_count = self.tracker.increment_orphan_check(terminal_name, ticket)
-                
-                # Check if should kill
-                if self.tracker.should_kill_orphan(terminal_name, ticket, max_checks):
-                    if self._cancel_orphaned_order(terminal_name, orphan_order):
-                        # Reset check counter after successful cancellation
-                        self.tracker.reset_orphan_check(terminal_name, ticket)
-                        self.stats['orders_cancelled'] += 1
-                        successful_cancellations += 1
-                    else:
-                        self.logger.error(f"Failed to cancel orphaned order {ticket} on {terminal_name}")
-                        failed_cancellations.append(ticket)
-                else:
-                    self.logger.info(f"Orphaned order {ticket} on {terminal_name} check count: {check_count}/{max_checks}")
-            
-            if failed_cancellations:
-                self.logger.warning(f"Failed to cancel {len(failed_cancellations)} orphaned orders on {terminal_name}. "
-                                  f"Failed cancellations: {', '.join(map(str, failed_cancellations))}. "
-                                  f"Successfully cancelled: {successful_cancellations} orders.")
-            elif successful_cancellations > 0:
-                self.logger.info(f"Successfully cancelled all {successful_cancellations} orphaned orders on {terminal_name}")
-            
-            # Clean up orphan checks for orders that no longer exist
-            active_tickets = {order['ticket'] for order in target_orders}
-            self.tracker.cleanup_orphan_checks(terminal_name, active_tickets)
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error handling orphaned orders on {terminal_name}: {format_error_message(e)}")
-            return False
-    
-    def _cancel_orphaned_order(self, terminal_name: str, orphan_order: Dict[str, Any]) -> bool:
-        """Cancel a single orphaned order"""
+    def _cancel_orphaned_order(self, terminal_name: str, orphan_order: Dict[str, Any],
+                               record: Optional[Dict[str, Any]] = None) -> bool:
+        """Cancel a single orphaned order (record is this cycle's order data, if available)"""
         try:
             ticket = orphan_order['ticket']
             
             self.logger.info(f"Cancelling orphaned order {ticket} on {terminal_name}")
             
-            success, message = self.connector.cancel_order(ticket)
+            success, message = self.connector.cancel_order(ticket, order=record)
             
             if success:
                 self.logger.info(f"Successfully cancelled orphaned order {ticket} on {terminal_name}")
@@ -662,76 +788,15 @@ class OrderManager:
             self.logger.error(f"Error cancelling orphaned order: {format_error_message(e)}")
             return False
     
-    def _handle_orphaned_positions(self, terminal_name: str, terminal_config: Dict[str, Any],
-                                  target_positions: List[Dict[str, Any]]) -> bool:
-        """Handle orphaned positions according to terminal policy"""
-        try:
-            # Get orphan management configuration
-            orphan_config = terminal_config.get('orphan_management', {})
-            kill_orphans = orphan_config.get('kill_orphaned_positions', False)
-            max_checks = orphan_config.get('max_orphan_checks', 3)
-            
-            if not kill_orphans:
-                self.logger.info(f"Orphaned position killing disabled for {terminal_name}")
-                return True
-            
-            # Detect orphaned positions
-            orphaned_positions = self.tracker.detect_orphaned_positions(terminal_name)
-            
-            if not orphaned_positions:
-                self.logger.info(f"No orphaned positions found on {terminal_name}")
-                return True
-            
-            self.logger.info(f"Found {len(orphaned_positions)} orphaned positions on {terminal_name}")
-            
-            # Process each orphaned position
-            failed_closures = []
-            successful_closures = 0
-            
-            for orphan_position in orphaned_positions:
-                ticket = orphan_position['ticket']
-                
-                # Increment check counter (reusing the same counter as orders)
-                check_count = self.tracker.increment_orphan_check(terminal_name, ticket)
-                
-                # Check if should kill
-                if self.tracker.should_kill_orphan(terminal_name, ticket, max_checks):
-                    if self._close_orphaned_position(terminal_name, orphan_position):
-                        # Reset check counter after successful closure
-                        self.tracker.reset_orphan_check(terminal_name, ticket)
-                        self.stats['positions_updated'] += 1  # Reusing this stat for closed positions
-                        successful_closures += 1
-                    else:
-                        self.logger.error(f"Failed to close orphaned position {ticket} on {terminal_name}")
-                        failed_closures.append(ticket)
-                else:
-                    self.logger.info(f"Orphaned position {ticket} on {terminal_name} check count: {check_count}/{max_checks}")
-            
-            if failed_closures:
-                self.logger.warning(f"Failed to close {len(failed_closures)} orphaned positions on {terminal_name}. "
-                                  f"Failed closures: {', '.join(map(str, failed_closures))}. "
-                                  f"Successfully closed: {successful_closures} positions.")
-            elif successful_closures > 0:
-                self.logger.info(f"Successfully closed all {successful_closures} orphaned positions on {terminal_name}")
-            
-            # Clean up orphan checks for positions that no longer exist
-            active_tickets = {position['ticket'] for position in target_positions}
-            self.tracker.cleanup_orphan_checks(terminal_name, active_tickets)
-            
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"Error handling orphaned positions on {terminal_name}: {format_error_message(e)}")
-            return False
-    
-    def _close_orphaned_position(self, terminal_name: str, orphan_position: Dict[str, Any]) -> bool:
-        """Close a single orphaned position"""
+    def _close_orphaned_position(self, terminal_name: str, orphan_position: Dict[str, Any],
+                                 record: Optional[Dict[str, Any]] = None) -> bool:
+        """Close a single orphaned position (record is this cycle's position data, if available)"""
         try:
             ticket = orphan_position['ticket']
             
             self.logger.info(f"Closing orphaned position {ticket} on {terminal_name}")
             
-            success, message = self.connector.close_position(ticket)
+            success, message = self.connector.close_position(ticket, position=record)
             
             if success:
                 self.logger.info(f"Successfully closed orphaned position {ticket} on {terminal_name}")
@@ -744,27 +809,12 @@ class OrderManager:
             self.logger.error(f"Error closing orphaned position: {format_error_message(e)}")
             return False
     
-    def _check_terminal_constraints(self, terminal_name: str, terminal_config: Dict[str, Any],
-                                   current_order_count: int, new_order_count: int) -> bool:
-        """Check if terminal constraints allow new orders"""
-        # Check maximum pending orders limit
-        max_orders_config = terminal_config.get('max_pending_orders', {})
-        if max_orders_config.get('enabled', False):
-            max_orders = max_orders_config.get('max_orders', 50)
-            
-            if current_order_count + new_order_count > max_orders:
-                self.logger.warning(
-                    f"Terminal {terminal_name} would exceed max orders limit: "
-                    f"{current_order_count + new_order_count} > {max_orders}"
-                )
-                return False
-        
-        return True
-    
-    def _log_statistics(self) -> None:
+    def log_statistics(self) -> None:
         """Log processing statistics"""
         self.logger.info("=== Processing Statistics ===")
         self.logger.info(f"Terminals processed: {self.stats['terminals_processed']}")
+        self.logger.info(f"Terminals skipped (unchanged): {self.stats['terminals_skipped']}")
+        self.logger.info(f"Terminals skipped (circuit open): {self.stats['terminals_circuit_open']}")
         self.logger.info(f"Orders copied: {self.stats['orders_copied']}")
         self.logger.info(f"Orders updated: {self.stats['orders_updated']}")
         self.logger.info(f"Orders cancelled: {self.stats['orders_cancelled']}")
@@ -775,23 +825,92 @@ class OrderManager:
         self.logger.info(f"Total source orders: {tracker_stats['total_source_orders']}")
         self.logger.info(f"Total orphan checks: {tracker_stats['total_orphan_checks']}")
         
+        persistence = tracker_stats['persistence']
+        self.logger.info(f"State saves: {persistence['saves']} written ({persistence['skipped_saves']} unchanged), "
+                         f"last {persistence['last_bytes_written']} bytes in {persistence['last_save_seconds'] * 1000:.1f} ms")
+        if persistence['journal_appends']:
+            self.logger.info(f"State journal: {persistence['events_written']} events in {persistence['journal_appends']} appends, "
+                             f"{persistence['compactions']} snapshots")
+        
+        if self.state_writer:
+            writer_stats = self.state_writer.get_statistics()
+            self.logger.info(f"State writer: {writer_stats['flushes']} flushes, queue depth {writer_stats['queue_depth']} "
+                             f"(max {writer_stats['max_queue_depth']}), {writer_stats['jobs_coalesced']} saves coalesced, "
+                             f"last flush {writer_stats['last_flush_seconds'] * 1000:.1f} ms")
+        
+        if self.placements:
+            placement_stats = self.placements.get_statistics()
+            self.logger.info(f"Placements: {placement_stats['placed']} journaled, {placement_stats['recovered']} recovered, "
+                             f"{placement_stats['abandoned']} abandoned, {placement_stats['duplicates_prevented']} duplicates prevented")
+        
         for terminal_name, terminal_stats in tracker_stats['terminals'].items():
             self.logger.info(
                 f"Terminal {terminal_name}: {terminal_stats['target_orders']} orders, "
                 f"{terminal_stats['orphan_checks']} orphan checks"
             )
+        
+        for terminal_name, cache_stats in self.connector.get_symbol_cache_statistics().items():
+            self.logger.info(
+                f"Symbol cache {terminal_name}: {cache_stats['hits']} hits, "
+                f"{cache_stats['negative_hits']} negative hits, {cache_stats['misses']} misses"
+            )
+        
+        for terminal_name, session in self.sessions.get_statistics().items():
+            self.logger.info(
+                f"Session {terminal_name}: established {session['established']} times, "
+                f"current session survived {session['current_cycles']} cycles (max {session['max_cycles']})"
+            )
+        
+        if self.call_supervisor:
+            call_stats = self.call_supervisor.get_statistics()
+            self.logger.info(f"MT5 calls: {call_stats['calls']} supervised, {call_stats['timeouts']} timed out, "
+                             f"{call_stats['restarts']} call worker restarts")
+            for timeout in call_stats['recent_timeouts']:
+                self.logger.info(f"MT5 call timeout: {timeout['call']} on {timeout['terminal']} after {timeout['timeout_seconds']}s")
+        
+        # Parallel workers supervise their own MT5 calls
+        for terminal_name, result in self.last_cycle_results.items():
+            worker_call_stats = result.get('call_supervisor')
+            if not worker_call_stats:
+                continue
+            self.logger.info(f"MT5 calls on {terminal_name} worker: {worker_call_stats['calls']} supervised, "
+                             f"{worker_call_stats['timeouts']} timed out, {worker_call_stats['restarts']} call worker restarts")
+            for timeout in worker_call_stats['recent_timeouts']:
+                self.logger.info(f"MT5 call timeout: {timeout['call']} on {timeout['terminal']} after {timeout['timeout_seconds']}s")
+        
+        if self.breakers:
+            for terminal_name, breaker in self.breakers.get_statistics().items():
+                self.logger.info(
+                    f"Circuit breaker {terminal_name}: {breaker['state']}, {breaker['trips']} trips, "
+                    f"{breaker['skipped_cycles']} cycles skipped"
+                )
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get current processing statistics"""
         return {
             'processing_stats': self.stats.copy(),
-            'tracker_stats': self.tracker.get_system_statistics()
+            'tracker_stats': self.tracker.get_system_statistics(),
+            'session_stats': self.sessions.get_statistics(),
+            'symbol_cache_stats': self.connector.get_symbol_cache_statistics(),
+            'fingerprint_stats': self.fingerprints.get_statistics() if self.fingerprints else {},
+            'placement_stats': self.placements.get_statistics() if self.placements else {},
+            'state_writer_stats': self.state_writer.get_statistics() if self.state_writer else {},
+            'circuit_breaker_stats': self.breakers.get_statistics() if self.breakers else {},
+            'call_supervisor_stats': self.call_supervisor.get_statistics() if self.call_supervisor else {}
         }
     
     def cleanup(self) -> None:
         """Clean up resources"""
         try:
-            self.connector.disconnect()
-            self.tracker.save_state()
+            if self.worker_pool:
+                self.worker_pool.stop()
+            self.sessions.close_all()
+            if self.call_supervisor:
+                self.call_supervisor.stop()
+            if self.state_writer:
+                self.state_writer.stop()
+            else:
+                self.tracker.save_state()
+            self.tracker.close()
         except Exception as e:
             self.logger.error(f"Error during cleanup: {format_error_message(e)}")
\ No newline at end of file
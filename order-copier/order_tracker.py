@@ -3,7 +3,9 @@
 
 import json
 import os
+import time
 import logging
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Set, Optional, Any
 
@@ -11,13 +13,128 @@ from utils import (
     setup_logging, format_error_message, get_current_timestamp,
     ensure_directory_exists, safe_dict_get
 )
+from records import Record, OrderRecord, PositionRecord, json_default
+from tracker_store import SQLiteTrackerStore
+from tracker_journal import TrackerJournal, EVENT_UPSERT, EVENT_REMOVE, EVENT_DROP_TERMINAL
+
+# State sections holding one dictionary per terminal
+TERMINAL_SECTIONS = ('orphan_checks', 'target_orders', 'target_positions')
+
+def _records_differ(old: Dict[int, Any], new: Dict[int, Any]) -> bool:
+    """Compare two ticket -> record mappings on their persisted fields, ignoring last_seen timestamps"""
+    if old.keys() != new.keys():
+        return True
+    
+    for key, new_record in new.items():
+        old_record = old[key]
+        if old_record is new_record:
+            continue
+        if isinstance(new_record, Record):
+            if not new_record.same_state(old_record):
+                return True
+        elif isinstance(new_record, dict) and isinstance(old_record, dict):
+            if len(old_record) != len(new_record):
+                return True
+            if any(field != 'last_seen' and old_record.get(field) != value for field, value in new_record.items()):
+                return True
+        elif old_record != new_record:
+            return True
+    
+    return False
+
+# Record type of each record section
+RECORD_TYPES = {
+    'source_orders': OrderRecord,
+    'target_orders': OrderRecord,
+    'source_positions': PositionRecord,
+    'target_positions': PositionRecord
+}
+
+def _restore_value(section: str, value: Any) -> Any:
+    """Turn a loaded record dictionary back into its record type, with its times as datetimes"""
+    record_type = RECORD_TYPES.get(section)
+    if record_type is None or value is None:
+        return value
+    
+    record = record_type.from_mapping(value)
+    for field in record_type.TIME_FIELDS:
+        time_value = record.get(field)
+        if isinstance(time_value, str):
+            try:
+                setattr(record, field, datetime.fromisoformat(time_value))
+            except ValueError:
+                pass
+    return record
+
+def _restore_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a loaded state (string ticket keys, plain dictionaries) to int keys and records"""
+    for section in ('source_orders', 'source_positions'):
+        if section in state:
+            state[section] = {int(ticket): _restore_value(section, record) for ticket, record in state[section].items()}
+    for section in TERMINAL_SECTIONS:
+        if section in state:
+            state[section] = {terminal_name: {int(ticket): _restore_value(section, value) for ticket, value in records.items()}
+                              for terminal_name, records in state[section].items()}
+    return state
+
+class RecordIndex:
+    """Secondary indexes over a ticket -> record mapping: field value -> set of tickets"""
+    
+    FIELDS = ('magic', 'symbol', 'type_name')
+    
+    def __init__(self, records: Dict[int, Dict[str, Any]]):
+        self.fields = {field: {} for field in self.FIELDS}
+        for ticket, record in records.items():
+            self.add(ticket, record)
+    
+    def add(self, ticket: int, record: Dict[str, Any]) -> None:
+        """Index a record under each of its indexed field values"""
+        for field, index in self.fields.items():
+            value = record.get(field)
+            if value is not None:
+                index.setdefault(value, set()).add(ticket)
+    
+    def by(self, field: str) -> Dict[Any, Set[int]]:
+        """Get the value -> tickets mapping of a field"""
+        return self.fields[field]
+    
+    def lookup(self, field: str, value: Any) -> Set[int]:
+        """Get the tickets of the records with a field value"""
+        return self.fields[field].get(value, set())
 
 class OrderTracker:
-    """Manages order tracking and orphan detection across system runs"""
+    """Manages order tracking and orphan detection across system runs
     
-    def __init__(self, state_file: str = "order_tracker_state.json", logger: Optional[logging.Logger] = None):
+    Changes are tracked per section and per terminal, so a save only serializes the parts of
+    the state that changed since the previous save (only a record's STATE_FIELDS count, so e.g.
+    position profit moving does not). The state file is replaced atomically through a temporary file.
+    
+    With backend='sqlite' the state is kept in an indexed SQLite database instead; changed
+    sections are written as rows and each save commits them in a single transaction.
+    
+    With journal=True (JSON backend), saves append the record-level changes to an event
+    journal next to the state file. The state file becomes a periodic snapshot, rewritten once
+    compact_every_events events have accumulated; loading replays the journal on top of it.
+    
+    Records are keyed by integer ticket. Lookups by magic, symbol and type go through
+    RecordIndex instances built on first use and dropped whenever their records change.
+    """
+    
+    def __init__(self, state_file: Optional[str] = "order_tracker_state.json", logger: Optional[logging.Logger] = None,
+                 backend: str = 'json', journal: bool = False, compact_every_events: int = 1000):
         self.logger = logger or setup_logging()
         self.state_file = state_file
+        self.backend = backend
+        self.store = SQLiteTrackerStore(state_file, self.logger) if backend == 'sqlite' and state_file else None
+        
+        # Event journal (JSON backend only)
+        self.journal = None
+        if journal and state_file and self.store is None:
+            self.journal = TrackerJournal(f"{state_file}.journal", self.logger)
+        self.compact_every_events = compact_every_events
+        self.journal_seq = 0          # Sequence number of the last recorded event
+        self.journal_events = 0       # Events in the journal since the last snapshot
+        self.pending_events = []      # Events recorded since the last save
         self.state = {
             'orphan_checks': {},  # terminal_name -> {ticket: check_count}
             'last_run': None,
@@ -26,172 +143,406 @@ class OrderTracker:
             'source_positions': {},  # ticket -> position_data
             'target_positions': {}   # terminal_name -> {ticket: position_data}
         }
+        
+        # Dirty tracking: (section, terminal_name or None) -> serialized JSON of the last save
+        self.dirty = set()
+        self.fragments = {}
+        self.store_jobs_in_flight = 0  # Store writes prepared but not yet committed
+        
+        # Secondary indexes: (section, terminal_name or None) -> RecordIndex
+        self.indexes = {}
+        
+        # lock guards change tracking when saves are written on a background thread,
+        # io_lock serializes use of the store connection
+        self.lock = threading.RLock()
+        self.io_lock = threading.Lock()
+        self.save_stats = {
+            'saves': 0,
+            'skipped_saves': 0,
+            'fragments_serialized': 0,
+            'bytes_written': 0,
+            'last_bytes_written': 0,
+            'total_save_seconds': 0.0,
+            'last_save_seconds': 0.0,
+            'journal_appends': 0,
+            'events_written': 0,
+            'compactions': 0
+        }
+        
         self.load_state()
+        if self.store is None:
+            self.mark_all_dirty()
+    
+    def mark_dirty(self, section: str, terminal_name: Optional[str] = None) -> None:
+        """Flag a section (or one terminal's part of it) for serialization on the next save"""
+        self.dirty.add((section, terminal_name))
+    
+    def mark_all_dirty(self) -> None:
+        """Force the next save to serialize the complete state (e.g. after editing state directly)"""
+        self.fragments = {}
+        self.indexes = {}
+        self.dirty.add(('*', None))
+    
+    def _record_event(self, op: str, section: str, terminal_name: Optional[str] = None,
+                      ticket: Optional[int] = None, value: Any = None) -> None:
+        """Queue a journal event for the next save"""
+        if self.journal is None:
+            return
+        
+        self.journal_seq += 1
+        self.pending_events.append({
+            'seq': self.journal_seq,
+            'op': op,
+            'section': section,
+            'terminal': terminal_name,
+            'ticket': ticket,
+            'value': value
+        })
+    
+    def _apply_event(self, event: Dict[str, Any]) -> None:
+        """Apply a journal event to the in-memory state"""
+        section = event['section']
+        terminal_name = event.get('terminal')
+        
+        self.indexes.pop((section, terminal_name), None)
+        if event['op'] == EVENT_DROP_TERMINAL:
+            self.state[section].pop(terminal_name, None)
+            return
+        
+        records = self.state[section] if terminal_name is None else self.state[section].setdefault(terminal_name, {})
+        if event['op'] == EVENT_UPSERT:
+            records[int(event['ticket'])] = _restore_value(section, event['value'])
+        elif event['op'] == EVENT_REMOVE:
+            records.pop(int(event['ticket']), None)
+    
+    def _replace_records(self, section: str, records: Dict[str, Any], terminal_name: Optional[str] = None) -> None:
+        """Replace a section's records and mark it dirty if any persisted field changed"""
+        if terminal_name is None:
+            previous = self.state[section]
+            changed = _records_differ(previous, records)
+            self.state[section] = records
+        else:
+            previous = self.state[section].get(terminal_name)
+            changed = previous is None or _records_differ(previous, records)
+            self.state[section][terminal_name] = records
+        
+        if changed:
+            self.mark_dirty(section, terminal_name)
+            self.indexes.pop((section, terminal_name), None)
+            if self.journal is not None:
+                previous = previous or {}
+                for ticket, record in records.items():
+                    if ticket not in previous or _records_differ({ticket: previous[ticket]}, {ticket: record}):
+                        self._record_event(EVENT_UPSERT, section, terminal_name, ticket, record)
+                for ticket in previous.keys() - records.keys():
+                    self._record_event(EVENT_REMOVE, section, terminal_name, ticket)
+    
+    def _index(self, section: str, terminal_name: Optional[str] = None) -> RecordIndex:
+        """Get the secondary indexes of a section (or one terminal's part of it), building them if needed"""
+        key = (section, terminal_name)
+        index = self.indexes.get(key)
+        if index is None:
+            records = self.state[section] if terminal_name is None else self.state[section].get(terminal_name, {})
+            index = RecordIndex(records)
+            self.indexes[key] = index
+        return index
     
     def load_state(self) -> bool:
         """Load tracking state from file"""
         try:
+            if not self.state_file:
+                # In-memory tracker (e.g. inside a terminal worker process)
+                return True
+            
+            if self.store is not None:
+                if not self.store.open():
+                    return False
+                self.state.update(_restore_state(self.store.load()))
+                self.logger.info(f"Loaded tracking state from {self.state_file}")
+                return True
+            
             if os.path.exists(self.state_file):
                 with open(self.state_file, 'r') as f:
                     loaded_state = json.load(f)
-                    self.state.update(loaded_state)
+                    self.state.update(_restore_state(loaded_state))
+                    self.mark_all_dirty()
                     self.logger.info(f"Loaded tracking state from {self.state_file}")
-                    return True
             else:
                 self.logger.info("No existing state file found, starting with clean state")
-                return True
+            
+            if self.journal is not None:
+                self._replay_journal()
+            return True
         except Exception as e:
             self.logger.error(f"Error loading state: {format_error_message(e)}")
             return False
     
+    def _replay_journal(self) -> None:
+        """Apply the journal events that are newer than the loaded snapshot"""
+        snapshot_seq = self.state.get('journal_seq') or 0
+        events = self.journal.read(after_seq=snapshot_seq)
+        for event in events:
+            self._apply_event(event)
+        
+        self.journal_seq = events[-1]['seq'] if events else snapshot_seq
+        self.journal_events = len(events)
+        if events:
+            self.mark_all_dirty()
+            self.logger.info(f"Replayed {len(events)} journal events from {self.journal.journal_file}")
+    
+    def _has_unsaved_changes(self) -> bool:
+        """Check if anything changed since the last save"""
+        if self.journal is not None:
+            # Dirty fragments accumulate until the next snapshot; the events are what a save writes
+            return bool(self.pending_events) or ('*', None) in self.dirty
+        return bool(self.dirty)
+    
     def save_state(self) -> bool:
-        """Save tracking state to file"""
+        """Save tracking state to file, writing only what changed since the previous save"""
         try:
-            # Ensure directory exists
-            state_dir = os.path.dirname(self.state_file)
-            if state_dir and not ensure_directory_exists(state_dir):
-                self.logger.error(f"Failed to create state directory: {state_dir}")
-                return False
+            job = self.prepare_save()
+        except Exception as e:
+            self.logger.error(f"Error saving state: {format_error_message(e)}")
+            return False
+        
+        if job is None:
+            return True
+        return self.write_save(job)
+    
+    def prepare_save(self) -> Optional[Dict[str, Any]]:
+        """Capture the changes to persist and reset change tracking
+        
+        This is the CPU-only part of a save and runs on the thread that mutates the state. The
+        returned job holds everything write_save needs, so the disk I/O can run on another
+        thread. Returns None when there is nothing to save.
+        """
+        if not self.state_file:
+            return None
+        
+        with self.lock:
+            if not self._has_unsaved_changes():
+                self.save_stats['skipped_saves'] += 1
+                self.logger.debug("Tracking state unchanged, skipping save")
+                return None
             
             # Update last run timestamp
             self.state['last_run'] = get_current_timestamp()
             
-            # Save to file
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2, default=str)
+            if self.store is not None:
+                job = {'kind': 'store', 'full': ('*', None) in self.dirty, 'count': 1,
+                       'sections': self._dirty_sections(), 'last_run': self.state['last_run']}
+                self.save_stats['fragments_serialized'] += len(job['sections'])
+                self.store_jobs_in_flight += 1
+                self.dirty.clear()
+                return job
             
-            self.logger.debug(f"Saved tracking state to {self.state_file}")
-            return True
+            events, self.pending_events = self.pending_events, []
+            if (self.journal is not None and ('*', None) not in self.dirty
+                    and self.journal_events + len(events) < self.compact_every_events):
+                self.journal_events += len(events)
+                return {'kind': 'journal', 'events': events}
+            
+            if self.journal is not None:
+                # Events up to this sequence number are contained in the snapshot
+                self.state['journal_seq'] = self.journal_seq
+                self.journal_events = 0
             
+            data = self._serialize_state().encode('utf-8')
+            self.dirty.clear()
+            return {'kind': 'snapshot', 'data': data, 'events': events}
+    
+    def write_save(self, job: Dict[str, Any]) -> bool:
+        """Write a job from prepare_save to disk; on failure its changes are queued for the next save"""
+        started = time.perf_counter()
+        try:
+            if job['kind'] == 'store':
+                written = self._write_store_job(job)
+                description = f"{written} rows to {self.state_file}"
+            elif job['kind'] == 'journal':
+                written = self.journal.append(job['events'])
+                description = f"{len(job['events'])} events to {self.journal.journal_file} ({written} bytes)"
+            else:
+                written = self._write_snapshot(job['data'])
+                description = f"state to {self.state_file} ({written} bytes)"
         except Exception as e:
             self.logger.error(f"Error saving state: {format_error_message(e)}")
+            with self.lock:
+                if job['kind'] != 'store':
+                    self.pending_events[:0] = job['events']
+                if job['kind'] != 'journal':
+                    self.mark_all_dirty()
+                if job['kind'] == 'store':
+                    self.store_jobs_in_flight -= job['count']
             return False
+        
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.save_stats['saves'] += 1
+            self.save_stats['total_save_seconds'] += elapsed
+            self.save_stats['last_save_seconds'] = elapsed
+            if job['kind'] == 'store':
+                self.store_jobs_in_flight -= job['count']
+            else:
+                self.save_stats['bytes_written'] += written
+                self.save_stats['last_bytes_written'] = written
+            if job['kind'] == 'journal':
+                self.save_stats['journal_appends'] += 1
+                self.save_stats['events_written'] += len(job['events'])
+            elif job['kind'] == 'snapshot' and self.journal is not None:
+                self.save_stats['compactions'] += 1
+        
+        self.logger.debug(f"Saved {description} in {elapsed * 1000:.1f} ms")
+        return True
+    
+    def _write_snapshot(self, data: bytes) -> int:
+        """Replace the state file atomically and truncate the journal it supersedes"""
+        # Ensure directory exists
+        state_dir = os.path.dirname(self.state_file)
+        if state_dir and not ensure_directory_exists(state_dir):
+            raise OSError(f"Failed to create state directory: {state_dir}")
+        
+        # Write to a temporary file and swap it in, so a crash never leaves a partial state file
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.state_file)
+        
+        if self.journal is not None:
+            self.journal.reset()
+        return len(data)
+    
+    def _dirty_sections(self) -> List[tuple]:
+        """Copy the records of dirty sections as (section, terminal_name, records) for the store"""
+        if ('*', None) in self.dirty:
+            sections = [(section, None, dict(self.state[section])) for section in ('source_orders', 'source_positions')]
+            for section in TERMINAL_SECTIONS:
+                sections.extend((section, terminal_name, dict(records))
+                                for terminal_name, records in self.state[section].items())
+            return sections
+        
+        sections = []
+        for section, terminal_name in self.dirty:
+            if terminal_name is None:
+                sections.append((section, None, dict(self.state[section])))
+            else:
+                records = self.state[section].get(terminal_name)
+                # None marks a terminal that was removed
+                sections.append((section, terminal_name, dict(records) if records is not None else None))
+        return sections
+    
+    def _write_store_job(self, job: Dict[str, Any]) -> int:
+        """Write a store job's sections and commit them as one transaction"""
+        with self.io_lock:
+            try:
+                rows = 0
+                if job['full']:
+                    for section in TERMINAL_SECTIONS:
+                        self.store.clear_section(section)
+                for section, terminal_name, records in job['sections']:
+                    if records is None:
+                        self.store.delete_terminal(section, terminal_name)
+                    else:
+                        rows += self.store.write_section(section, records, terminal_name)
+                self.store.write_last_run(job['last_run'])
+                self.store.commit()
+                return rows
+            except Exception:
+                self.store.rollback()
+                raise
+    
+    def _serialize_fragment(self, key, value: Any) -> str:
+        """Return the JSON of a state fragment, re-serializing it only when dirty"""
+        fragment = self.fragments.get(key)
+        if fragment is None or key in self.dirty or (key[0], None) in self.dirty:
+            fragment = json.dumps(value, default=json_default)
+            self.fragments[key] = fragment
+            self.save_stats['fragments_serialized'] += 1
+        return fragment
+    
+    def _serialize_state(self) -> str:
+        """Assemble the state file JSON from cached and freshly serialized fragments"""
+        if ('*', None) in self.dirty:
+            self.fragments = {}
+        
+        parts = []
+        for section, value in self.state.items():
+            if section in TERMINAL_SECTIONS:
+                terminal_parts = [
+                    f"{json.dumps(terminal_name)}: {self._serialize_fragment((section, terminal_name), records)}"
+                    for terminal_name, records in value.items()
+                ]
+                section_json = "{" + ", ".join(terminal_parts) + "}"
+            elif section in ('source_orders', 'source_positions'):
+                section_json = self._serialize_fragment((section, None), value)
+            else:
+                section_json = json.dumps(value, default=str)
+            parts.append(f"{json.dumps(section)}: {section_json}")
+        
+        # Drop cached fragments of terminals that no longer exist
+        for key in [key for key in self.fragments if key[1] is not None and key[1] not in self.state.get(key[0], {})]:
+            del self.fragments[key]
+        
+        return "{" + ",\n".join(parts) + "}\n"
+    
+    def get_save_statistics(self) -> Dict[str, Any]:
+        """Get save counters, bytes written and save latency"""
+        stats = self.save_stats.copy()
+        stats['backend'] = 'sqlite' if self.store is not None else 'json'
+        stats['average_save_seconds'] = stats['total_save_seconds'] / stats['saves'] if stats['saves'] else 0.0
+        return stats
     
     def update_source_orders(self, orders: List[Dict[str, Any]]) -> None:
         """Update source orders in tracking state"""
-        self.state['source_orders'] = {}
-        for order in orders:
-            ticket = order['ticket']
-            self.state['source_orders'][str(ticket)] = {
-                'ticket': ticket,
-                'symbol': order['symbol'],
-                'type_name': order['type_name'],
-                'volume': order['volume_initial'],
-                'price_open': order['price_open'],
-                'sl': order['sl'],
-                'tp': order['tp'],
-                'time_setup': str(order['time_setup']),
-                'time_expiration': str(order['time_expiration']) if order['time_expiration'] else None,
-                'last_seen': get_current_timestamp()
-            }
+        self._replace_records('source_orders', {order['ticket']: OrderRecord.from_mapping(order) for order in orders})
         
         self.logger.debug(f"Updated {len(orders)} source orders in tracking state")
     
     def update_source_positions(self, positions: List[Dict[str, Any]]) -> None:
         """Update source positions in tracking state"""
-        self.state['source_positions'] = {}
-        for position in positions:
-            ticket = position['ticket']
-            self.state['source_positions'][str(ticket)] = {
-                'ticket': ticket,
-                'symbol': position['symbol'],
-                'type_name': position['type_name'],
-                'volume': position['volume'],
-                'price_open': position['price_open'],
-                'sl': position['sl'],
-                'tp': position['tp'],
-                'magic': position['magic'],
-                'time': str(position['time']),
-                'last_seen': get_current_timestamp()
-            }
+        self._replace_records('source_positions',
+                              {position['ticket']: PositionRecord.from_mapping(position) for position in positions})
         
         self.logger.debug(f"Updated {len(positions)} source positions in tracking state")
     
     def update_target_orders(self, terminal_name: str, orders: List[Dict[str, Any]]) -> None:
         """Update target orders for a specific terminal"""
-        if terminal_name not in self.state['target_orders']:
-            self.state['target_orders'][terminal_name] = {}
-        
-        self.state['target_orders'][terminal_name] = {}
-        for order in orders:
-            ticket = order['ticket']
-            self.state['target_orders'][terminal_name][str(ticket)] = {
-                'ticket': ticket,
-                'magic': order['magic'],
-                'symbol': order['symbol'],
-                'type_name': order['type_name'],
-                'volume': order['volume_initial'],
-                'price_open': order['price_open'],
-                'sl': order['sl'],
-                'tp': order['tp'],
-                'time_setup': str(order['time_setup']),
-                'time_expiration': str(order['time_expiration']) if order['time_expiration'] else None,
-                'last_seen': get_current_timestamp()
-            }
+        self._replace_records('target_orders', {order['ticket']: OrderRecord.from_mapping(order) for order in orders},
+                              terminal_name)
         
         self.logger.debug(f"Updated {len(orders)} target orders for {terminal_name}")
     
     def update_target_positions(self, terminal_name: str, positions: List[Dict[str, Any]]) -> None:
         """Update target positions for a specific terminal"""
-        if terminal_name not in self.state['target_positions']:
-            self.state['target_positions'][terminal_name] = {}
-        
-        self.state['target_positions'][terminal_name] = {}
-        for position in positions:
-            ticket = position['ticket']
-            self.state['target_positions'][terminal_name][str(ticket)] = {
-                'ticket': ticket,
-                'magic': position['magic'],
-                'symbol': position['symbol'],
-                'type_name': position['type_name'],
-                'volume': position['volume'],
-                'price_open': position['price_open'],
-                'sl': position['sl'],
-                'tp': position['tp'],
-                'time': str(position['time']),
-                'last_seen': get_current_timestamp()
-            }
+        self._replace_records('target_positions',
+                              {position['ticket']: PositionRecord.from_mapping(position) for position in positions},
+                              terminal_name)
         
         self.logger.debug(f"Updated {len(positions)} target positions for {terminal_name}")
     
+    def _find_orphans(self, target_section: str, source_section: str, terminal_name: str) -> List[Dict[str, Any]]:
+        """Get a terminal's records whose magic number (source ticket) is not among the source records"""
+        target_records = self.state[target_section].get(terminal_name, {})
+        by_magic = self._index(target_section, terminal_name).by('magic')
+        
+        orphans = []
+        for magic in by_magic.keys() - self.state[source_section].keys():
+            for ticket in by_magic[magic]:
+                orphans.append(target_records[ticket])
+                self.logger.debug(f"Detected orphan {ticket} with magic {magic} in {target_section} on {terminal_name}")
+        return orphans
+    
     def detect_orphaned_orders(self, terminal_name: str) -> List[Dict[str, Any]]:
         """Detect orphaned orders for a specific terminal"""
-        orphaned_orders = []
-        
-        # Get current source order tickets
-        source_tickets = set(self.state['source_orders'].keys())
-        
-        # Get target orders for this terminal
-        target_orders = self.state['target_orders'].get(terminal_name, {})
-        
-        for ticket_str, order_data in target_orders.items():
-            magic = order_data.get('magic')
-            
-            # Check if magic number (source ticket) exists in current source orders
-            if str(magic) not in source_tickets:
-                orphaned_orders.append(order_data)
-                self.logger.debug(f"Detected orphaned order {ticket_str} with magic {magic} on {terminal_name}")
+        orphaned_orders = self._find_orphans('target_orders', 'source_orders', terminal_name)
         
         self.logger.info(f"Detected {len(orphaned_orders)} orphaned orders on {terminal_name}")
         return orphaned_orders
     
     def detect_orphaned_positions(self, terminal_name: str) -> List[Dict[str, Any]]:
         """Detect orphaned positions for a specific terminal"""
-        orphaned_positions = []
-        
-        # Get current source position tickets
-        source_tickets = set(self.state['source_positions'].keys())
-        
-        # Get target positions for this terminal
-        target_positions = self.state['target_positions'].get(terminal_name, {})
-        
-        for ticket_str, position_data in target_positions.items():
-            magic = position_data.get('magic')
-            
-            # Check if magic number (source ticket) exists in current source positions
-            if str(magic) not in source_tickets:
-                orphaned_positions.append(position_data)
-                self.logger.debug(f"Detected orphaned position {ticket_str} with magic {magic} on {terminal_name}")
+        orphaned_positions = self._find_orphans('target_positions', 'source_positions', terminal_name)
         
         self.logger.info(f"Detected {len(orphaned_positions)} orphaned positions on {terminal_name}")
         return orphaned_positions
@@ -201,10 +552,11 @@ class OrderTracker:
         if terminal_name not in self.state['orphan_checks']:
             self.state['orphan_checks'][terminal_name] = {}
         
-        ticket_str = str(ticket)
-        current_count = self.state['orphan_checks'][terminal_name].get(ticket_str, 0)
+        current_count = self.state['orphan_checks'][terminal_name].get(ticket, 0)
         new_count = current_count + 1
-        self.state['orphan_checks'][terminal_name][ticket_str] = new_count
+        self.state['orphan_checks'][terminal_name][ticket] = new_count
+        self.mark_dirty('orphan_checks', terminal_name)
+        self._record_event(EVENT_UPSERT, 'orphan_checks', terminal_name, ticket, new_count)
         
         self.logger.debug(f"Incremented orphan check for {terminal_name} order {ticket}: {new_count}")
         return new_count
@@ -214,17 +566,17 @@ class OrderTracker:
         if terminal_name not in self.state['orphan_checks']:
             return 0
         
-        ticket_str = str(ticket)
-        return self.state['orphan_checks'][terminal_name].get(ticket_str, 0)
+        return self.state['orphan_checks'][terminal_name].get(ticket, 0)
     
     def reset_orphan_check(self, terminal_name: str, ticket: int) -> None:
         """Reset orphan check counter for a specific order"""
         if terminal_name not in self.state['orphan_checks']:
             return
         
-        ticket_str = str(ticket)
-        if ticket_str in self.state['orphan_checks'][terminal_name]:
-            del self.state['orphan_checks'][terminal_name][ticket_str]
+        if ticket in self.state['orphan_checks'][terminal_name]:
+            del self.state['orphan_checks'][terminal_name][ticket]
+            self.mark_dirty('orphan_checks', terminal_name)
+            self._record_event(EVENT_REMOVE, 'orphan_checks', terminal_name, ticket)
             self.logger.debug(f"Reset orphan check for {terminal_name} order {ticket}")
     
     def cleanup_orphan_checks(self, terminal_name: str, active_tickets: Set[int]) -> None:
@@ -232,20 +584,18 @@ class OrderTracker:
         if terminal_name not in self.state['orphan_checks']:
             return
         
-        active_ticket_strs = {str(ticket) for ticket in active_tickets}
         orphan_checks = self.state['orphan_checks'][terminal_name]
         
         # Remove counters for tickets that no longer exist
-        tickets_to_remove = []
-        for ticket_str in orphan_checks.keys():
-            if ticket_str not in active_ticket_strs:
-                tickets_to_remove.append(ticket_str)
+        tickets_to_remove = orphan_checks.keys() - set(active_tickets)
         
-        for ticket_str in tickets_to_remove:
-            del orphan_checks[ticket_str]
-            self.logger.debug(f"Cleaned up orphan check for non-existent order {ticket_str} on {terminal_name}")
+        for ticket in tickets_to_remove:
+            del orphan_checks[ticket]
+            self._record_event(EVENT_REMOVE, 'orphan_checks', terminal_name, ticket)
+            self.logger.debug(f"Cleaned up orphan check for non-existent order {ticket} on {terminal_name}")
         
         if tickets_to_remove:
+            self.mark_dirty('orphan_checks', terminal_name)
             self.logger.info(f"Cleaned up {len(tickets_to_remove)} orphan check counters on {terminal_name}")
     
     def should_kill_orphan(self, terminal_name: str, ticket: int, max_checks: int) -> bool:
@@ -284,17 +634,17 @@ class OrderTracker:
         
         # Get previous orders for this terminal
         previous_orders = self.state['target_orders'].get(terminal_name, {})
-        current_orders_dict = {str(order['ticket']): order for order in current_orders}
+        current_orders_dict = {order['ticket']: order for order in current_orders}
         
         # Find new orders
-        for ticket_str, order in current_orders_dict.items():
-            if ticket_str not in previous_orders:
+        for ticket, order in current_orders_dict.items():
+            if ticket not in previous_orders:
                 changes['new_orders'].append(order)
         
         # Find modified and removed orders
-        for ticket_str, prev_order in previous_orders.items():
-            if ticket_str in current_orders_dict:
-                current_order = current_orders_dict[ticket_str]
+        for ticket, prev_order in previous_orders.items():
+            if ticket in current_orders_dict:
+                current_order = current_orders_dict[ticket]
                 
                 # Check for modifications
                 if self._order_modified(prev_order, current_order):
@@ -310,7 +660,7 @@ class OrderTracker:
     def _order_modified(self, prev_order: Dict[str, Any], current_order: Dict[str, Any]) -> bool:
         """Check if an order has been modified"""
         # Compare key fields that indicate modification
-        fields_to_compare = ['price_open', 'sl', 'tp', 'volume', 'time_expiration']
+        fields_to_compare = ['price_open', 'sl', 'tp', 'volume_initial', 'time_expiration']
         
         for field in fields_to_compare:
             prev_value = prev_order.get(field)
@@ -332,17 +682,17 @@ class OrderTracker:
         
         # Get previous source orders
         previous_orders = self.state['source_orders']
-        current_orders_dict = {str(order['ticket']): order for order in current_orders}
+        current_orders_dict = {order['ticket']: order for order in current_orders}
         
         # Find new orders
-        for ticket_str, order in current_orders_dict.items():
-            if ticket_str not in previous_orders:
+        for ticket, order in current_orders_dict.items():
+            if ticket not in previous_orders:
                 changes['new_orders'].append(order)
         
         # Find modified and removed orders
-        for ticket_str, prev_order in previous_orders.items():
-            if ticket_str in current_orders_dict:
-                current_order = current_orders_dict[ticket_str]
+        for ticket, prev_order in previous_orders.items():
+            if ticket in current_orders_dict:
+                current_order = current_orders_dict[ticket]
                 
                 # Check for modifications
                 if self._order_modified(prev_order, current_order):
@@ -355,17 +705,43 @@ class OrderTracker:
         
         return changes
     
+    def get_tracked_magics(self, terminal_name: str) -> Set[int]:
+        """Get the magic numbers (source tickets) of a terminal's tracked target orders and positions"""
+        return (self._index('target_orders', terminal_name).by('magic').keys()
+                | self._index('target_positions', terminal_name).by('magic').keys())
+    
+    def _target_orders_unsaved(self, terminal_name: str) -> bool:
+        """Check if a terminal's target orders changed since they were last committed to the store"""
+        return (self.store_jobs_in_flight > 0 or ('*', None) in self.dirty
+                or ('target_orders', terminal_name) in self.dirty)
+    
     def get_matching_target_orders(self, source_ticket: int, terminal_name: str) -> List[Dict[str, Any]]:
         """Get target orders that match a source ticket (by magic number)"""
-        matching_orders = []
-        target_orders = self.state['target_orders'].get(terminal_name, {})
-        
-        for ticket_str, order in target_orders.items():
-            if order.get('magic') == source_ticket:
-                matching_orders.append(order)
+        if self.store is not None and not self._target_orders_unsaved(terminal_name):
+            # Indexed (terminal, magic) lookup - the database holds the current records
+            with self.io_lock:
+                rows = self.store.find_target_orders_by_magic(terminal_name, source_ticket)
+            # Same record types as the in-memory lookup
+            return [_restore_value('target_orders', row) for row in rows]
         
-        return matching_orders
+        target_orders = self.state['target_orders'].get(terminal_name, {})
+        tickets = self._index('target_orders', terminal_name).lookup('magic', source_ticket)
+        return [target_orders[ticket] for ticket in sorted(tickets)]
     
+    def get_terminal_state(self, terminal_name: str) -> Dict[str, Any]:
+        """Get the tracked target orders, positions and orphan checks for a terminal"""
+        return {
+            'target_orders': self.state['target_orders'].get(terminal_name, {}),
+            'target_positions': self.state['target_positions'].get(terminal_name, {}),
+            'orphan_checks': self.state['orphan_checks'].get(terminal_name, {})
+        }
+
+    def apply_terminal_state(self, terminal_name: str, terminal_state: Dict[str, Any]) -> None:
+        """Replace the tracked sections of a terminal (e.g. with results from a worker process)"""
+        for section in TERMINAL_SECTIONS:
+            if section in terminal_state:
+                self._replace_records(section, dict(terminal_state[section]), terminal_name)
+
     def cleanup_state(self, active_terminals: List[str]) -> None:
         """Clean up state for terminals that are no longer active"""
         # Clean up target orders
@@ -376,6 +752,9 @@ class OrderTracker:
         
         for terminal_name in terminals_to_remove:
             del self.state['target_orders'][terminal_name]
+            self.indexes.pop(('target_orders', terminal_name), None)
+            self.mark_dirty('target_orders', terminal_name)
+            self._record_event(EVENT_DROP_TERMINAL, 'target_orders', terminal_name)
             self.logger.info(f"Cleaned up target orders for inactive terminal: {terminal_name}")
         
         # Clean up orphan checks
@@ -386,6 +765,8 @@ class OrderTracker:
         
         for terminal_name in terminals_to_remove:
             del self.state['orphan_checks'][terminal_name]
+            self.mark_dirty('orphan_checks', terminal_name)
+            self._record_event(EVENT_DROP_TERMINAL, 'orphan_checks', terminal_name)
             self.logger.info(f"Cleaned up orphan checks for inactive terminal: {terminal_name}")
     
     def get_system_statistics(self) -> Dict[str, Any]:
@@ -406,13 +787,20 @@ class OrderTracker:
             stats['terminals'][terminal_name] = terminal_stats
             stats['total_orphan_checks'] += terminal_stats['orphan_checks']
         
+        stats['persistence'] = self.get_save_statistics()
         return stats
     
+    def close(self) -> None:
+        """Close the state store, if one is open"""
+        if self.store is not None:
+            with self.io_lock:
+                self.store.close()
+    
     def export_state(self, export_file: str) -> bool:
         """Export current state to a different file"""
         try:
             with open(export_file, 'w') as f:
-                json.dump(self.state, f, indent=2, default=str)
+                json.dump(self.state, f, indent=2, default=json_default)
             self.logger.info(f"Exported state to {export_file}")
             return True
         except Exception as e:
@@ -428,7 +816,8 @@ class OrderTracker:
             
             with open(import_file, 'r') as f:
                 imported_state = json.load(f)
-                self.state.update(imported_state)
+                self.state.update(_restore_state(imported_state))
+                self.mark_all_dirty()
             
             self.logger.info(f"Imported state from {import_file}")
             return True
@@ -0,0 +1,191 @@
+# MT5 Pending Order Copier System - Placement Journal
+# This module records order placement intents durably so a crash cannot cause duplicate copies
+
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional, Any, Iterable
+
+from utils import setup_logging, format_error_message, ensure_directory_exists, get_current_timestamp
+
+# Placement states
+PLACEMENT_PENDING = 'pending'   # Intent recorded, order_send result unknown
+PLACEMENT_PLACED = 'placed'     # Order placed, target ticket known
+
+class PlacementJournal:
+    """Durable record of copy placements, one append-only file per target terminal
+
+    An intent is written (and fsynced) before order_send and its result after it. Entries are
+    keyed by source ticket and kept while the source order exists, so the copier can tell that
+    a copy was already placed even when it no longer shows up as a pending order (e.g. it was
+    filled right away). Entries still pending - after a crash, or after a failed order_send whose
+    outcome is unknown - must be checked on the target before the order is copied again.
+
+    Each terminal is handled by exactly one process at a time (main process or its worker),
+    so per-terminal files never have concurrent writers.
+    """
+
+    def __init__(self, directory: str, logger: Optional[logging.Logger] = None):
+        self.logger = logger or setup_logging()
+        self.directory = directory
+        self.entries = {}   # terminal_name -> {source_ticket: entry}
+        self.stats = {
+            'intents': 0,
+            'placed': 0,
+            'recovered': 0,
+            'abandoned': 0,
+            'duplicates_prevented': 0,
+            'compactions': 0
+        }
+
+    def _journal_file(self, terminal_name: str) -> str:
+        """Get the journal file path of a terminal"""
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', terminal_name)
+        return os.path.join(self.directory, f"{safe_name}.jsonl")
+
+    def _terminal_entries(self, terminal_name: str) -> Dict[int, Dict[str, Any]]:
+        """Get the entries of a terminal, loading its journal on first use"""
+        entries = self.entries.get(terminal_name)
+        if entries is not None:
+            return entries
+
+        entries = {}
+        journal_file = self._journal_file(terminal_name)
+        if os.path.exists(journal_file):
+            with open(journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Incomplete last line from a crash during append
+                        continue
+                    source_ticket = event['source_ticket']
+                    if event['op'] == 'intent':
+                        entries[source_ticket] = {
+                            'source_ticket': source_ticket,
+                            'symbol': event['symbol'],
+                            'status': PLACEMENT_PENDING,
+                            'target_ticket': None,
+                            'time': event.get('time')
+                        }
+                    elif event['op'] == 'placed' and source_ticket in entries:
+                        entries[source_ticket]['status'] = PLACEMENT_PLACED
+                        entries[source_ticket]['target_ticket'] = event['target_ticket']
+                    elif event['op'] == 'failed':
+                        entries.pop(source_ticket, None)
+
+            in_flight = sum(1 for entry in entries.values() if entry['status'] == PLACEMENT_PENDING)
+            if in_flight:
+                self.logger.warning(f"Found {in_flight} in-flight placements for {terminal_name} in {journal_file}")
+
+        self.entries[terminal_name] = entries
+        return entries
+
+    def _append(self, terminal_name: str, event: Dict[str, Any]) -> None:
+        """Append an event to a terminal's journal and flush it to disk"""
+        if not ensure_directory_exists(self.directory):
+            raise OSError(f"Failed to create placement journal directory: {self.directory}")
+
+        with open(self._journal_file(terminal_name), 'a') as f:
+            f.write(json.dumps(event, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_intent(self, terminal_name: str, source_ticket: int, symbol: str) -> None:
+        """Record that a copy of a source order is about to be sent"""
+        entries = self._terminal_entries(terminal_name)
+        self._append(terminal_name, {'op': 'intent', 'source_ticket': source_ticket, 'symbol': symbol,
+                                     'time': get_current_timestamp()})
+        entries[source_ticket] = {
+            'source_ticket': source_ticket,
+            'symbol': symbol,
+            'status': PLACEMENT_PENDING,
+            'target_ticket': None,
+            'time': get_current_timestamp()
+        }
+        self.stats['intents'] += 1
+
+    def _settle(self, terminal_name: str, source_ticket: int, target_ticket: Optional[int]) -> None:
+        """Record the outcome of a placement - placed as target_ticket, or not on the target when None"""
+        entries = self._terminal_entries(terminal_name)
+        if target_ticket is not None:
+            self._append(terminal_name, {'op': 'placed', 'source_ticket': source_ticket, 'target_ticket': target_ticket})
+            entry = entries.get(source_ticket)
+            if entry is not None:
+                entry['status'] = PLACEMENT_PLACED
+                entry['target_ticket'] = target_ticket
+        else:
+            self._append(terminal_name, {'op': 'failed', 'source_ticket': source_ticket})
+            entries.pop(source_ticket, None)
+
+    def record_placed(self, terminal_name: str, source_ticket: int, target_ticket: int) -> None:
+        """Record that a copy was placed as target_ticket"""
+        self._settle(terminal_name, source_ticket, target_ticket)
+        self.stats['placed'] += 1
+
+    def resolve(self, terminal_name: str, source_ticket: int, target_ticket: Optional[int]) -> None:
+        """Settle an in-flight placement after looking for its copy on the target"""
+        self._settle(terminal_name, source_ticket, target_ticket)
+        if target_ticket is not None:
+            self.stats['recovered'] += 1
+        else:
+            self.stats['abandoned'] += 1
+
+    def record_duplicate_prevented(self) -> None:
+        """Count a copy that was skipped because it already exists on the target"""
+        self.stats['duplicates_prevented'] += 1
+
+    def get(self, terminal_name: str, source_ticket: int) -> Optional[Dict[str, Any]]:
+        """Get the placement entry of a source order on a terminal"""
+        return self._terminal_entries(terminal_name).get(source_ticket)
+
+    def in_flight(self, terminal_name: str) -> List[Dict[str, Any]]:
+        """Get the placements whose order_send outcome is unknown"""
+        return [entry for entry in self._terminal_entries(terminal_name).values()
+                if entry['status'] == PLACEMENT_PENDING]
+
+    def retain(self, terminal_name: str, source_tickets: Iterable[int]) -> int:
+        """Drop entries of source orders that no longer exist and compact the journal"""
+        entries = self._terminal_entries(terminal_name)
+        source_tickets = set(source_tickets)
+        stale = [ticket for ticket in entries if ticket not in source_tickets]
+        if not stale:
+            return 0
+
+        for ticket in stale:
+            del entries[ticket]
+        self._compact(terminal_name)
+        return len(stale)
+
+    def _compact(self, terminal_name: str) -> None:
+        """Rewrite a terminal's journal with only its live entries"""
+        try:
+            journal_file = self._journal_file(terminal_name)
+            if not ensure_directory_exists(self.directory):
+                raise OSError(f"Failed to create placement journal directory: {self.directory}")
+
+            lines = []
+            for entry in self.entries.get(terminal_name, {}).values():
+                lines.append(json.dumps({'op': 'intent', 'source_ticket': entry['source_ticket'],
+                                         'symbol': entry['symbol'], 'time': entry['time']}, default=str))
+                if entry['status'] == PLACEMENT_PLACED:
+                    lines.append(json.dumps({'op': 'placed', 'source_ticket': entry['source_ticket'],
+                                             'target_ticket': entry['target_ticket']}))
+
+            temp_file = f"{journal_file}.tmp"
+            with open(temp_file, 'w') as f:
+                f.write("".join(line + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, journal_file)
+            self.stats['compactions'] += 1
+        except Exception as e:
+            # The uncompacted journal is still valid - compaction is retried next time
+            self.logger.warning(f"Error compacting placement journal for {terminal_name}: {format_error_message(e)}")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get placement counters and the number of tracked entries"""
+        stats = self.stats.copy()
+        stats['tracked'] = sum(len(entries) for entries in self.entries.values())
+        return stats
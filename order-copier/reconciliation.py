@@ -0,0 +1,260 @@
+# MT5 Pending Order Copier System - Reconciliation Planning
+# This module compares source and target state once and produces a typed action plan
+
+import logging
+from typing import Dict, List, Optional, Any, Callable
+
+from utils import (
+    setup_logging, calculate_lot_size, is_valid_order_type,
+    validate_symbol_mapping, safe_float_compare
+)
+from order_columns import numpy_available, build_order_columns, orders_needing_update
+
+# Action kinds
+ACTION_CREATE = 'create'   # Copy a new source order to the target
+ACTION_MODIFY = 'modify'   # Update a copied order to match its source order
+ACTION_CANCEL = 'cancel'   # Cancel an orphaned target order
+ACTION_CLOSE = 'close'     # Close an orphaned target position
+ACTION_SLTP = 'sltp'       # Synchronize SL/TP of a copied position
+
+ACTION_KINDS = (ACTION_CREATE, ACTION_MODIFY, ACTION_CANCEL, ACTION_CLOSE, ACTION_SLTP)
+
+# Tasks - groups of action kinds that can run on separate timers
+TASK_COPY = 'copy'         # New-order copying and order modifications
+TASK_SLTP = 'sltp'         # Position SL/TP synchronization
+TASK_ORPHANS = 'orphans'   # Orphan checks, cancellations and closures
+
+TASK_ACTIONS = {
+    TASK_COPY: (ACTION_CREATE, ACTION_MODIFY),
+    TASK_SLTP: (ACTION_SLTP,),
+    TASK_ORPHANS: (ACTION_CANCEL, ACTION_CLOSE)
+}
+
+ALL_TASKS = frozenset(TASK_ACTIONS)
+
+class ReconciliationAction:
+    """A single planned change on a target terminal"""
+
+    __slots__ = ('kind', 'source', 'target', 'target_symbol')
+
+    def __init__(self, kind: str, source: Optional[Dict[str, Any]] = None,
+                 target: Optional[Dict[str, Any]] = None, target_symbol: Optional[str] = None):
+        self.kind = kind
+        self.source = source                # Source order/position (None for orphans)
+        self.target = target                # Target order/position (None for creates)
+        self.target_symbol = target_symbol  # Mapped symbol (creates only)
+
+    @property
+    def ticket(self) -> Optional[int]:
+        """Ticket the action refers to - target ticket, or source ticket for creates"""
+        record = self.target if self.target is not None else self.source
+        return record['ticket'] if record is not None else None
+
+    def __repr__(self) -> str:
+        return f"ReconciliationAction({self.kind}, ticket={self.ticket})"
+
+class ReconciliationPlan:
+    """Ordered set of actions for one target terminal"""
+
+    def __init__(self, terminal_name: str):
+        self.terminal_name = terminal_name
+        self.actions = {kind: [] for kind in ACTION_KINDS}
+        self.orphaned_orders = []      # Target orders without a source order
+        self.orphaned_positions = []   # Target positions without a source position
+        self.active_tickets = set()    # All target order and position tickets
+        self.creates_blocked = 0       # New orders held back by max_pending_orders
+        self.creates_unmapped = 0      # New orders on symbols missing from a filtering terminal's mapping
+
+    def add(self, action: ReconciliationAction) -> None:
+        """Append an action to the plan"""
+        self.actions[action.kind].append(action)
+
+    def get(self, kind: str) -> List[ReconciliationAction]:
+        """Get the planned actions of one kind"""
+        return self.actions[kind]
+
+    def __iter__(self):
+        for kind in ACTION_KINDS:
+            yield from self.actions[kind]
+
+    def __len__(self) -> int:
+        return sum(len(actions) for actions in self.actions.values())
+
+    def summary(self) -> Dict[str, int]:
+        """Count actions per kind"""
+        counts = {kind: len(actions) for kind, actions in self.actions.items()}
+        counts['orphaned_orders'] = len(self.orphaned_orders)
+        counts['orphaned_positions'] = len(self.orphaned_positions)
+        counts['creates_blocked'] = self.creates_blocked
+        counts['creates_unmapped'] = self.creates_unmapped
+        return counts
+
+class ReconciliationPlanner:
+    """Builds a ReconciliationPlan from source and target state in a single pass
+
+    Source orders and positions are indexed once by ticket. Copied target orders and
+    positions carry the source ticket as their magic number, so each target record is
+    matched with a single dictionary lookup.
+
+    With vectorize_min_orders set and NumPy installed, terminals with at least that many
+    target orders have their modifications detected on columnar snapshots (order_columns.py).
+    The source columns are built once per source order list and reused for every terminal.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, tolerance: float = 1e-5,
+                 vectorize_min_orders: Optional[int] = None):
+        self.logger = logger or setup_logging()
+        self.tolerance = tolerance
+        self.vectorize_min_orders = vectorize_min_orders if numpy_available() else None
+        self._source_columns = (None, None)  # (source order list, its columns)
+        self._unmapped_warned = set()  # (terminal_name, symbol) pairs already warned about
+
+    def plan(self, terminal_name: str, terminal_config: Dict[str, Any],
+             source_orders: List[Dict[str, Any]], source_positions: List[Dict[str, Any]],
+             target_orders: List[Dict[str, Any]], target_positions: List[Dict[str, Any]],
+             orphan_check_count: Optional[Callable[[int], int]] = None) -> ReconciliationPlan:
+        """Compare source and target state and return the actions needed on the target"""
+        plan = ReconciliationPlan(terminal_name)
+        orphan_check_count = orphan_check_count or (lambda ticket: 0)
+
+        orphan_config = terminal_config.get('orphan_management', {})
+        kill_orders = orphan_config.get('kill_orphaned_orders', False)
+        kill_positions = orphan_config.get('kill_orphaned_positions', False)
+        max_checks = orphan_config.get('max_orphan_checks', 3)
+
+        multiplier = terminal_config.get('lot_multiplier', 1.0)
+        min_lot = terminal_config.get('min_lot_size', 0.01)
+        max_lot = terminal_config.get('max_lot_size', 100.0)
+
+        # Index the source once
+        source_by_ticket = {order['ticket']: order for order in source_orders}
+        source_positions_by_ticket = {position['ticket']: position for position in source_positions}
+
+        # Target orders: modifications and orphans
+        needs_update = self._vectorized_order_updates(source_orders, target_orders, multiplier, min_lot, max_lot)
+        copied_tickets = set()
+        for index, target_order in enumerate(target_orders):
+            plan.active_tickets.add(target_order['ticket'])
+            magic = target_order['magic']
+            copied_tickets.add(magic)
+
+            source_order = source_by_ticket.get(magic)
+            if source_order is not None:
+                if needs_update is not None:
+                    update = needs_update[index]
+                else:
+                    expected_lot = calculate_lot_size(source_order['volume_initial'], multiplier, min_lot, max_lot)
+                    update = self.order_needs_update(source_order, target_order, expected_lot)
+                if update:
+                    plan.add(ReconciliationAction(ACTION_MODIFY, source_order, target_order))
+            elif kill_orders:
+                plan.orphaned_orders.append(target_order)
+                if orphan_check_count(target_order['ticket']) + 1 >= max_checks:
+                    plan.add(ReconciliationAction(ACTION_CANCEL, None, target_order))
+
+        # Target positions: SL/TP synchronization and orphans
+        for target_position in target_positions:
+            plan.active_tickets.add(target_position['ticket'])
+            # A copy filled on the target is a position, but the source order may still be pending
+            copied_tickets.add(target_position['magic'])
+
+            source_position = source_positions_by_ticket.get(target_position['magic'])
+            if source_position is not None:
+                if self.position_needs_update(source_position, target_position):
+                    plan.add(ReconciliationAction(ACTION_SLTP, source_position, target_position))
+            elif kill_positions:
+                plan.orphaned_positions.append(target_position)
+                if orphan_check_count(target_position['ticket']) + 1 >= max_checks:
+                    plan.add(ReconciliationAction(ACTION_CLOSE, None, target_position))
+
+        # Source orders not yet on the target: creates
+        allowed_types = terminal_config.get('allowed_order_types', [])
+        symbol_mapping = terminal_config.get('symbol_mapping', {})
+        # Filtered retrieval only sees mapped symbols, so copies on other symbols could not be tracked
+        mapped_only = terminal_config.get('filter_target_records', False) and bool(symbol_mapping)
+        creates = []
+        for source_ticket, source_order in source_by_ticket.items():
+            if source_ticket in copied_tickets:
+                continue
+            if not is_valid_order_type(source_order['type_name'], allowed_types):
+                continue
+            if mapped_only and source_order['symbol'] not in symbol_mapping:
+                plan.creates_unmapped += 1
+                self._warn_unmapped(terminal_name, source_order['symbol'])
+                continue
+            target_symbol = validate_symbol_mapping(source_order['symbol'], symbol_mapping)
+            creates.append(ReconciliationAction(ACTION_CREATE, source_order, None, target_symbol))
+
+        if creates and self._creates_allowed(terminal_name, terminal_config, len(target_orders), len(creates)):
+            for action in creates:
+                plan.add(action)
+        else:
+            plan.creates_blocked = len(creates)
+
+        return plan
+
+    def _warn_unmapped(self, terminal_name: str, symbol: str) -> None:
+        """Warn once per terminal and symbol that orders on an unmapped symbol are not copied"""
+        if (terminal_name, symbol) in self._unmapped_warned:
+            return
+        self._unmapped_warned.add((terminal_name, symbol))
+        self.logger.warning(f"Orders on {symbol} are not copied to {terminal_name}: filter_target_records is enabled "
+                            f"and {symbol} is not in its symbol_mapping (add '{symbol}': '{symbol}' to copy it)")
+
+    def order_needs_update(self, source_order: Dict[str, Any], target_order: Dict[str, Any], expected_lot: float) -> bool:
+        """Check if target order needs to be updated based on source order changes"""
+        tolerance = self.tolerance
+
+        if not safe_float_compare(source_order['price_open'], target_order['price_open'], tolerance):
+            return True
+
+        if not safe_float_compare(expected_lot, target_order['volume_initial'], tolerance):
+            return True
+
+        if not safe_float_compare(source_order.get('sl', 0), target_order.get('sl', 0), tolerance):
+            return True
+
+        if not safe_float_compare(source_order.get('tp', 0), target_order.get('tp', 0), tolerance):
+            return True
+
+        if str(source_order.get('time_expiration')) != str(target_order.get('time_expiration')):
+            return True
+
+        return False
+
+    def _vectorized_order_updates(self, source_orders: List[Dict[str, Any]], target_orders: List[Dict[str, Any]],
+                                  multiplier: float, min_lot: float, max_lot: float) -> Optional[List[bool]]:
+        """Flag the target orders needing an update in a few array operations, or None for the per-pair path"""
+        if self.vectorize_min_orders is None or len(target_orders) < self.vectorize_min_orders:
+            return None
+
+        cached_orders, source_columns = self._source_columns
+        if cached_orders is not source_orders:
+            # Keeping the list referenced means its identity cannot be reused by a later list
+            source_columns = build_order_columns(source_orders)
+            self._source_columns = (source_orders, source_columns)
+
+        return orders_needing_update(source_columns, build_order_columns(target_orders), multiplier,
+                                     min_lot, max_lot, self.tolerance).tolist()
+
+    def position_needs_update(self, source_position: Dict[str, Any], target_position: Dict[str, Any]) -> bool:
+        """Check if a position's SL/TP differs from its source position"""
+        sl_different = abs(source_position.get('sl', 0.0) - target_position.get('sl', 0.0)) > self.tolerance
+        tp_different = abs(source_position.get('tp', 0.0) - target_position.get('tp', 0.0)) > self.tolerance
+        return sl_different or tp_different
+
+    def _creates_allowed(self, terminal_name: str, terminal_config: Dict[str, Any],
+                         current_order_count: int, new_order_count: int) -> bool:
+        """Check if the max_pending_orders constraint allows the new orders"""
+        max_orders_config = terminal_config.get('max_pending_orders', {})
+        if max_orders_config.get('enabled', False):
+            max_orders = max_orders_config.get('max_orders', 50)
+
+            if current_order_count + new_order_count > max_orders:
+                self.logger.warning(
+                    f"Terminal {terminal_name} would exceed max orders limit: "
+                    f"{current_order_count + new_order_count} > {max_orders}"
+                )
+                return False
+
+        return True
@@ -0,0 +1,149 @@
+# MT5 Pending Order Copier System - Order and Position Records
+# This module defines the compact record types shared by the connector, manager and tracker
+
+from typing import Dict, Any, Iterator, Tuple
+
+from utils import convert_mt5_time, get_order_type_name
+
+_MISSING = object()
+
+class Record:
+    """Slotted record with read-only dictionary-style access (record['ticket'], record.get('sl', 0))
+
+    A field that was never set (records built from partial dictionaries) behaves like a missing
+    dictionary key. STATE_FIELDS are the fields the tracker persists and compares between cycles.
+    """
+
+    __slots__ = ()
+    STATE_FIELDS: Tuple[str, ...] = ()
+    TIME_FIELDS: Tuple[str, ...] = ()  # Datetime fields, persisted as strings
+
+    def __getitem__(self, field: str) -> Any:
+        if field in self.__slots__:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise KeyError(field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Get a field value, or default when the field is not set"""
+        if field in self.__slots__:
+            return getattr(self, field, default)
+        return default
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.__slots__ and hasattr(self, field)
+
+    def keys(self) -> Iterator[str]:
+        """Iterate over the names of the set fields"""
+        return (field for field in self.__slots__ if hasattr(self, field))
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Iterate over (field, value) pairs of the set fields"""
+        return ((field, getattr(self, field)) for field in self.keys())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy all set fields into a dictionary"""
+        return dict(self.items())
+
+    def to_state(self) -> Dict[str, Any]:
+        """Copy the persisted fields into a dictionary"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS if hasattr(self, field)}
+
+    def same_state(self, other: Any) -> bool:
+        """Check if another record has the same persisted fields"""
+        if type(other) is not type(self):
+            return False
+        return all(getattr(self, field, _MISSING) == getattr(other, field, _MISSING) for field in self.STATE_FIELDS)
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, Any]) -> 'Record':
+        """Build a record from a dictionary, leaving absent fields unset"""
+        if type(mapping) is cls:
+            return mapping
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            value = mapping.get(field, _MISSING)
+            if value is not _MISSING:
+                setattr(record, field, value)
+        return record
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field, _MISSING) == getattr(other, field, _MISSING) for field in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={value!r}" for field, value in self.items())
+        return f"{type(self).__name__}({fields})"
+
+class OrderRecord(Record):
+    """A pending order as returned by MT5Connector.get_pending_orders"""
+
+    __slots__ = ('ticket', 'time_setup', 'time_expiration', 'type', 'type_name', 'type_time', 'state',
+                 'volume_initial', 'volume_current', 'price_open', 'sl', 'tp', 'symbol', 'comment',
+                 'magic', 'position_id')
+    STATE_FIELDS = ('ticket', 'magic', 'symbol', 'type_name', 'volume_initial', 'price_open', 'sl', 'tp',
+                    'time_setup', 'time_expiration')
+    TIME_FIELDS = ('time_setup', 'time_expiration')
+
+    @classmethod
+    def from_mt5(cls, order) -> 'OrderRecord':
+        """Build a record from an MT5 TradeOrder"""
+        record = cls.__new__(cls)
+        record.ticket = order.ticket
+        record.time_setup = convert_mt5_time(order.time_setup)
+        record.time_expiration = convert_mt5_time(order.time_expiration) if order.time_expiration > 0 else None
+        record.type = order.type
+        record.type_name = get_order_type_name(order.type)
+        record.type_time = order.type_time
+        record.state = order.state
+        record.volume_initial = order.volume_initial
+        record.volume_current = order.volume_current
+        record.price_open = order.price_open
+        record.sl = order.sl
+        record.tp = order.tp
+        record.symbol = order.symbol
+        record.comment = order.comment
+        record.magic = order.magic
+        record.position_id = order.position_id
+        return record
+
+class PositionRecord(Record):
+    """An open position as returned by MT5Connector.get_positions"""
+
+    __slots__ = ('ticket', 'time', 'time_update', 'type', 'type_name', 'volume', 'price_open', 'price_current',
+                 'sl', 'tp', 'symbol', 'comment', 'magic', 'identifier', 'profit', 'swap')
+    # price_current, profit and swap move with the market and are not persisted
+    STATE_FIELDS = ('ticket', 'magic', 'symbol', 'type_name', 'volume', 'price_open', 'sl', 'tp', 'time')
+    TIME_FIELDS = ('time', 'time_update')
+
+    @classmethod
+    def from_mt5(cls, position) -> 'PositionRecord':
+        """Build a record from an MT5 TradePosition"""
+        record = cls.__new__(cls)
+        record.ticket = position.ticket
+        record.time = convert_mt5_time(position.time)
+        record.time_update = convert_mt5_time(position.time_update)
+        record.type = position.type
+        record.type_name = 'BUY' if position.type == 0 else 'SELL'
+        record.volume = position.volume
+        record.price_open = position.price_open
+        record.price_current = position.price_current
+        record.sl = position.sl
+        record.tp = position.tp
+        record.symbol = position.symbol
+        record.comment = position.comment
+        record.magic = position.magic
+        record.identifier = position.identifier
+        record.profit = position.profit
+        record.swap = position.swap
+        return record
+
+def json_default(value: Any) -> Any:
+    """json.dumps default hook: records are written as their persisted fields, anything else as str"""
+    if isinstance(value, Record):
+        return value.to_state()
+    return str(value)
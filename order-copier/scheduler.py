@@ -0,0 +1,316 @@
+# MT5 Pending Order Copier System - Deadline Scheduler
+# This module times the main loops on monotonic deadlines with instant wakeup on shutdown
+# and schedules per-terminal reconciliation jobs on their own triggers
+
+import time
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+
+from scheduling_utils import calculate_next_execution_time
+
+class DeadlineScheduler:
+    """Waits for monotonic deadlines on an Event, so stop() interrupts any wait at once
+
+    Deadlines come from time.monotonic, so wall-clock adjustments cannot stretch or shorten a
+    wait. Every tick records how late it fired. Loops running on a fixed period take their next
+    deadline from next_deadline(), which stays on the original grid instead of drifting by the
+    cycle time, and skips (and counts) the ticks an overrunning cycle missed.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.stop_event = threading.Event()
+        self.stats = {
+            'ticks': 0,
+            'skipped_ticks': 0,
+            'last_lateness_seconds': 0.0,
+            'max_lateness_seconds': 0.0,
+            'total_lateness_seconds': 0.0
+        }
+
+    @property
+    def stopped(self) -> bool:
+        """Check if stop() was called"""
+        return self.stop_event.is_set()
+
+    def stop(self) -> None:
+        """Wake up any wait and make further waits return immediately"""
+        self.stop_event.set()
+
+    def sleep(self, seconds: float) -> bool:
+        """Wait for a number of seconds; False when interrupted by stop()"""
+        return self.wait_until(self.clock() + seconds, record=False)
+
+    def wait_until(self, deadline: float, record: bool = True) -> bool:
+        """Wait until a monotonic deadline and record the tick's lateness; False when interrupted by stop()"""
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            if self.stop_event.wait(remaining):
+                return False
+
+        if self.stopped:
+            return False
+
+        if record:
+            lateness = self.clock() - deadline
+            self.stats['ticks'] += 1
+            self.stats['last_lateness_seconds'] = lateness
+            self.stats['max_lateness_seconds'] = max(self.stats['max_lateness_seconds'], lateness)
+            self.stats['total_lateness_seconds'] += lateness
+        return True
+
+    def next_deadline(self, deadline: float, interval: float) -> float:
+        """Get the first deadline + k * interval still ahead, counting the ticks skipped to reach it"""
+        now = self.clock()
+        if interval <= 0:
+            return max(deadline, now)
+
+        next_deadline = deadline + interval
+        if next_deadline <= now:
+            missed = int((now - deadline) // interval)
+            next_deadline = deadline + (missed + 1) * interval
+            self.record_skipped(missed)
+        return next_deadline
+
+    def record_skipped(self, count: int) -> None:
+        """Count ticks that were not run because a cycle overran"""
+        if count > 0:
+            self.stats['skipped_ticks'] += count
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get tick, skip and lateness counters"""
+        stats = self.stats.copy()
+        stats['average_lateness_seconds'] = stats['total_lateness_seconds'] / stats['ticks'] if stats['ticks'] else 0.0
+        return stats
+
+class IntervalTrigger:
+    """Fires every interval_seconds, on a fixed grid from the first run"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+
+    def first_run(self, now: datetime) -> datetime:
+        """Get the first run time"""
+        return now
+
+    def next_after(self, previous: datetime) -> datetime:
+        """Get the run time following a previous one"""
+        return previous + timedelta(seconds=self.interval_seconds)
+
+    def describe(self) -> str:
+        return f"every {self.interval_seconds}s"
+
+class TimeframeTrigger:
+    """Fires offset_seconds after every candle of a timeframe (M1, M5, ..., H1, H4, D1)"""
+
+    def __init__(self, timeframe: str, offset_seconds: int = 0):
+        self.timeframe = timeframe
+        self.offset_seconds = offset_seconds
+
+    def first_run(self, now: datetime) -> datetime:
+        """Get the first run time"""
+        return self.next_after(now)
+
+    def next_after(self, previous: datetime) -> datetime:
+        """Get the first candle-aligned run time after previous"""
+        next_run = calculate_next_execution_time(self.timeframe, self.offset_seconds, previous)
+        if next_run <= previous:
+            next_run = calculate_next_execution_time(self.timeframe, self.offset_seconds, previous + timedelta(seconds=1))
+        return next_run
+
+    def describe(self) -> str:
+        return f"{self.timeframe} + {self.offset_seconds}s"
+
+class CronTrigger:
+    """Fires on a five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields accept *, numbers, ranges (1-5), lists (0,30) and steps (*/15, 8-18/2). Day of week
+    runs from 0 (Sunday) to 6; 7 is also Sunday. As in cron, when both day fields are restricted
+    a day matching either of them fires.
+    """
+
+    FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.days_restricted = fields[2] != '*'
+        self.weekdays_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> set:
+        """Expand one cron field into the set of values it matches"""
+        values = set()
+        for part in field.split(','):
+            range_part, _, step = part.partition('/')
+            step = int(step) if step else 1
+            if range_part == '*':
+                start, end = low, high
+            elif '-' in range_part:
+                start, end = (int(value) for value in range_part.split('-', 1))
+            else:
+                start = end = int(range_part)
+                if step > 1:
+                    end = high
+            if step <= 0 or start < low or end > high or start > end:
+                raise ValueError(f"Invalid cron field '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        """Check the day-of-month and day-of-week fields"""
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def first_run(self, now: datetime) -> datetime:
+        """Get the first run time"""
+        return self.next_after(now)
+
+    def next_after(self, previous: datetime) -> datetime:
+        """Get the first matching minute after previous"""
+        moment = previous.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+                moment = moment.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+
+    def describe(self) -> str:
+        return f"cron '{self.expression}'"
+
+def create_trigger(schedule: Dict[str, Any]):
+    """Build a trigger from a terminal's 'schedule' configuration"""
+    if 'cron' in schedule:
+        return CronTrigger(schedule['cron'])
+    if 'interval_seconds' in schedule:
+        return IntervalTrigger(schedule['interval_seconds'])
+    if 'timeframe' in schedule:
+        return TimeframeTrigger(schedule['timeframe'], schedule.get('offset_seconds', 0))
+    raise ValueError("Schedule needs one of 'timeframe', 'interval_seconds' or 'cron'")
+
+class ScheduledJob:
+    """Reconciliation of a group of target terminals on one trigger"""
+
+    __slots__ = ('name', 'trigger', 'terminals', 'priority', 'next_run', 'runs', 'skipped')
+
+    def __init__(self, name: str, trigger, terminals: List[str], priority: int = 0):
+        self.name = name
+        self.trigger = trigger
+        self.terminals = terminals
+        self.priority = priority     # Lower numbers run first among jobs due together
+        self.next_run = None         # Wall-clock time of the next run
+        self.runs = 0
+        self.skipped = 0
+
+def build_terminal_jobs(target_terminals: Dict[str, Dict[str, Any]], default_timeframe: str,
+                        default_offset_seconds: int = 0) -> List[ScheduledJob]:
+    """Group target terminals into jobs by their 'schedule' and 'priority'
+
+    Terminals without a schedule share the default timeframe job; terminals with identical
+    schedules and priorities share a job, so one cycle serves all of them.
+    """
+    groups = {}
+    for terminal_name, terminal_config in target_terminals.items():
+        schedule = terminal_config.get('schedule') or {'timeframe': default_timeframe,
+                                                       'offset_seconds': default_offset_seconds}
+        priority = terminal_config.get('priority', 0)
+        key = (tuple(sorted(schedule.items())), priority)
+        if key not in groups:
+            groups[key] = ScheduledJob(f"job-{len(groups) + 1}", create_trigger(schedule), [], priority)
+        groups[key].terminals.append(terminal_name)
+    return list(groups.values())
+
+class JobScheduler:
+    """Priority queue of jobs ordered by their next deadline
+
+    Run times come from each job's trigger in wall-clock time and are turned into monotonic
+    deadlines from a single reading of both clocks. wait_for_due() sleeps until the earliest
+    deadline and pops every job due by then, lower priority numbers first and in deadline order among
+    equal priorities, so overdue low-priority jobs never delay high-priority ones. After the
+    jobs ran, reschedule() queues them again after the current time; run times passed while
+    a job was still running are skipped and counted.
+    """
+
+    def __init__(self, scheduler: DeadlineScheduler, wall_clock=datetime.now):
+        self.scheduler = scheduler
+        self.wall_clock = wall_clock
+        self.heap = []  # (deadline, priority, sequence, job)
+        self.sequence = 0
+
+    def _now(self) -> Tuple[datetime, float]:
+        """Read the wall clock and the monotonic clock together"""
+        return self.wall_clock(), self.scheduler.clock()
+
+    def _push(self, job: ScheduledJob, now: datetime, monotonic_now: float) -> None:
+        """Queue a job for its next_run"""
+        deadline = monotonic_now + (job.next_run - now).total_seconds()
+        self.sequence += 1
+        heapq.heappush(self.heap, (deadline, job.priority, self.sequence, job))
+
+    def add(self, job: ScheduledJob) -> None:
+        """Queue a new job for its first run"""
+        now, monotonic_now = self._now()
+        job.next_run = job.trigger.first_run(now)
+        self._push(job, now, monotonic_now)
+
+    def peek(self) -> Optional[ScheduledJob]:
+        """Get the job that runs next without removing it"""
+        return self.heap[0][3] if self.heap else None
+
+    def wait_for_due(self) -> Optional[List[ScheduledJob]]:
+        """Wait for the earliest deadline and pop all jobs due by then; None when stopped or empty"""
+        if not self.heap:
+            return None
+        if not self.scheduler.wait_until(self.heap[0][0]):
+            return None
+
+        now = self.scheduler.clock()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due.append(heapq.heappop(self.heap)[3])
+        due.sort(key=lambda job: job.priority)
+        return due
+
+    def reschedule(self, jobs: List[ScheduledJob]) -> None:
+        """Queue jobs that just ran for their next run after the current time"""
+        now, monotonic_now = self._now()
+        for job in jobs:
+            job.runs += 1
+            next_run = job.trigger.next_after(job.next_run)
+            missed = 0
+            while next_run <= now:
+                missed += 1
+                next_run = job.trigger.next_after(next_run)
+            if missed:
+                job.skipped += missed
+                self.scheduler.record_skipped(missed)
+            job.next_run = next_run
+            self._push(job, now, monotonic_now)
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Get runs, skipped runs and the next run time per job"""
+        return {job.name: {'terminals': list(job.terminals), 'runs': job.runs, 'skipped': job.skipped,
+                           'next_run': job.next_run}
+                for _, _, _, job in self.heap}
@@ -4,7 +4,7 @@
 import logging
 from datetime import datetime, timedelta
 
-def calculate_next_execution_time(timeframe_str, offset_seconds=0):
+def calculate_next_execution_time(timeframe_str, offset_seconds=0, now=None):
     """
     Calculate the next execution time based on a given timeframe.
     Ported from Claude system for unified scheduling.
@@ -12,12 +12,14 @@ def calculate_next_execution_time(timeframe_str, offset_seconds=0):
     Args:
         timeframe_str (str): Timeframe string, e.g., "M1", "M5", "H1", etc.
         offset_seconds (int): Offset in seconds from the start of the timeframe
+        now (datetime): Time to calculate from (defaults to the current system time)
         
     Returns:
         datetime: Next execution time
     """
     # Use system time for scheduling calculations
-    now = datetime.now()
+    if now is None:
+        now = datetime.now()
     
     if timeframe_str.startswith("M"):
         # Minutes-based timeframe
@@ -68,22 +70,40 @@ def calculate_next_execution_time(timeframe_str, offset_seconds=0):
     
     return next_time
 
-def get_time_until_next_execution(timeframe_str, offset_seconds=0):
+def get_time_until_next_execution(timeframe_str, offset_seconds=0, now=None):
     """
     Get the time remaining until the next scheduled execution.
     
     Args:
         timeframe_str (str): Timeframe string
         offset_seconds (int): Offset in seconds
+        now (datetime): Time to calculate from (defaults to the current system time)
         
     Returns:
         float: Seconds until next execution
     """
-    next_time = calculate_next_execution_time(timeframe_str, offset_seconds)
-    now = datetime.now()
+    if now is None:
+        now = datetime.now()
+    next_time = calculate_next_execution_time(timeframe_str, offset_seconds, now)
     time_diff = (next_time - now).total_seconds()
     return max(0, time_diff)  # Ensure non-negative
 
+def get_timeframe_seconds(timeframe_str):
+    """
+    Get the length of a timeframe in seconds.
+    
+    Args:
+        timeframe_str (str): Timeframe string, e.g., "M1", "M5", "H1", etc.
+        
+    Returns:
+        int: Seconds per timeframe period (M5 for unknown timeframes)
+    """
+    units = {'M': 60, 'H': 3600, 'D': 86400}
+    unit = units.get(timeframe_str[:1])
+    if unit is None or not timeframe_str[1:].isdigit():
+        return 300
+    return int(timeframe_str[1:]) * unit
+
 def format_next_execution_time(timeframe_str, offset_seconds=0):
     """
     Format the next execution time as a readable string.
@@ -0,0 +1,103 @@
+# MT5 Pending Order Copier System - Terminal Session Management
+# This module keeps MT5 sessions alive between cycles instead of reconnecting every time
+
+import logging
+from typing import Dict, Optional, Any
+
+from mt5_connector import MT5Connector
+from utils import setup_logging, format_error_message, get_current_timestamp
+
+class SessionManager:
+    """Keeps terminal sessions alive between cycles and re-establishes them only when needed
+
+    The MetaTrader5 module holds one session per process, so a session survives only while
+    the same terminal is requested again (e.g. the source in the main process, or a target
+    inside its own worker process). Switching terminals closes the previous session, so in
+    sequential mode, where every cycle visits the source and at least one target, every
+    terminal is still logged into once per cycle. Sessions are only really kept alive with
+    parallel_terminals enabled (and for repeated source polls in watcher mode).
+    """
+
+    def __init__(self, connector: MT5Connector, logger: Optional[logging.Logger] = None, persistent: bool = True):
+        self.logger = logger or setup_logging()
+        self.connector = connector
+        self.persistent = persistent
+        self.active_terminal = None
+        self.sessions = {}  # terminal_name -> session statistics
+
+    def acquire(self, terminal_config: Dict[str, Any], terminal_name: str) -> bool:
+        """Make sure the connector holds a live session for the given terminal"""
+        session = self.sessions.setdefault(terminal_name, {
+            'established': 0,
+            'reused': 0,
+            'probe_failures': 0,
+            'current_cycles': 0,
+            'max_cycles': 0,
+            'connected_since': None
+        })
+
+        if self.active_terminal == terminal_name:
+            # Cheap liveness probe before reusing the session
+            if self.connector.check_connection():
+                session['reused'] += 1
+                session['current_cycles'] += 1
+                session['max_cycles'] = max(session['max_cycles'], session['current_cycles'])
+                self.logger.debug(f"Reusing session for {terminal_name} (cycle {session['current_cycles']})")
+                return True
+
+            session['probe_failures'] += 1
+            self.logger.warning(f"Session for {terminal_name} failed liveness probe, reconnecting")
+            self._close_active()
+        elif self.active_terminal is not None:
+            # Only one session per process - switch terminals
+            self._close_active()
+
+        if not self.connector.connect(terminal_config, terminal_name):
+            return False
+
+        self.active_terminal = terminal_name
+        session['established'] += 1
+        session['current_cycles'] = 1
+        session['max_cycles'] = max(session['max_cycles'], 1)
+        session['connected_since'] = get_current_timestamp()
+        return True
+
+    def is_active(self, terminal_name: str) -> bool:
+        """Check if the connector currently holds the session for a terminal"""
+        return self.active_terminal == terminal_name
+
+    def release(self, terminal_name: str) -> None:
+        """Finish using a session - kept open when sessions are persistent"""
+        if not self.persistent and self.active_terminal == terminal_name:
+            self._close_active()
+
+    def invalidate(self, terminal_name: str) -> None:
+        """Drop a session after an error so the next acquire reconnects"""
+        if self.active_terminal == terminal_name:
+            self._close_active()
+
+    def close_all(self) -> None:
+        """Close the active session"""
+        self._close_active()
+
+    def _close_active(self) -> None:
+        """Disconnect the active session and record how many cycles it survived"""
+        if self.active_terminal is None:
+            return
+
+        session = self.sessions.get(self.active_terminal)
+        if session:
+            self.logger.debug(f"Closing session for {self.active_terminal} after {session['current_cycles']} cycles")
+            session['current_cycles'] = 0
+            session['connected_since'] = None
+
+        try:
+            self.connector.disconnect()
+        except Exception as e:
+            self.logger.error(f"Error closing session for {self.active_terminal}: {format_error_message(e)}")
+        finally:
+            self.active_terminal = None
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-terminal session statistics"""
+        return {terminal_name: session.copy() for terminal_name, session in self.sessions.items()}
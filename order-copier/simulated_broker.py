@@ -0,0 +1,367 @@
+# MT5 Pending Order Copier System - Simulated Broker Backend
+# This module implements the subset of the MetaTrader5 API used by MT5Connector in memory
+
+import time
+import random
+from fnmatch import fnmatchcase
+from collections import Counter, namedtuple, deque
+from typing import Dict, List, Optional, Any, Tuple
+
+# Records shaped like the MetaTrader5 package's named tuples (only the fields the copier reads)
+TradeOrder = namedtuple('TradeOrder', [
+    'ticket', 'time_setup', 'time_expiration', 'type', 'type_time', 'state', 'volume_initial',
+    'volume_current', 'price_open', 'sl', 'tp', 'symbol', 'comment', 'magic', 'position_id'
+])
+TradePosition = namedtuple('TradePosition', [
+    'ticket', 'time', 'time_update', 'type', 'volume', 'price_open', 'price_current', 'sl', 'tp',
+    'symbol', 'comment', 'magic', 'identifier', 'profit', 'swap'
+])
+SymbolInfo = namedtuple('SymbolInfo', [
+    'name', 'digits', 'point', 'spread', 'volume_min', 'volume_max', 'volume_step', 'trade_mode', 'filling_mode'
+])
+AccountInfo = namedtuple('AccountInfo', [
+    'login', 'server', 'currency', 'trade_mode', 'leverage', 'limit_orders', 'margin_so_mode', 'trade_allowed',
+    'trade_expert', 'margin_mode', 'currency_digits', 'balance', 'credit', 'profit', 'equity', 'margin',
+    'margin_free', 'margin_level', 'margin_so_call', 'margin_so_so', 'margin_initial', 'margin_maintenance',
+    'assets', 'liabilities', 'commission_blocked', 'name', 'company'
+])
+OrderSendResult = namedtuple('OrderSendResult', ['retcode', 'deal', 'order', 'volume', 'price', 'comment', 'request'])
+
+class SimulatedBroker:
+    """In-memory stand-in for the MetaTrader5 module
+
+    Holds any number of accounts; `login` switches the active one, just like a terminal
+    switching accounts. Pass an instance as the `backend` of MT5Connector/OrderManager.
+
+    Latency is configured per API function in seconds (`latency={'order_send': 0.02}`, with
+    an optional 'default'), trade retcodes can be queued or rejected at random, and pending
+    orders can be filled into positions on placement or on demand.
+    """
+
+    # MetaTrader5 constants used by the copier
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TYPE_BUY_STOP = 4
+    ORDER_TYPE_SELL_STOP = 5
+    ORDER_TYPE_BUY_STOP_LIMIT = 6
+    ORDER_TYPE_SELL_STOP_LIMIT = 7
+
+    TRADE_ACTION_DEAL = 1
+    TRADE_ACTION_PENDING = 5
+    TRADE_ACTION_SLTP = 6
+    TRADE_ACTION_MODIFY = 7
+    TRADE_ACTION_REMOVE = 8
+
+    ORDER_FILLING_FOK = 0
+    ORDER_FILLING_IOC = 1
+    ORDER_FILLING_RETURN = 2
+
+    ORDER_TIME_GTC = 0
+    ORDER_TIME_DAY = 1
+    ORDER_TIME_SPECIFIED = 2
+
+    ORDER_STATE_PLACED = 1
+
+    TRADE_RETCODE_REJECT = 10006
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_TIMEOUT = 10012
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_INVALID_VOLUME = 10014
+    TRADE_RETCODE_INVALID_PRICE = 10015
+    TRADE_RETCODE_POSITION_CLOSED = 10036
+
+    # Error codes returned by last_error()
+    RES_S_OK = 1
+    RES_E_FAIL = -1
+    RES_E_NOT_FOUND = -4
+    RES_E_AUTH_FAILED = -6
+    RES_E_NO_CONNECTION = -10004
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, reject_probability: float = 0.0,
+                 fill_on_place: bool = False, seed: Optional[int] = None, sleep=time.sleep):
+        self.latency = dict(latency or {})
+        self.reject_probability = reject_probability
+        self.fill_on_place = fill_on_place
+        self.random = random.Random(seed)
+        self.sleep = sleep
+
+        self.accounts = {}   # login -> account state
+        self.symbols = {}    # symbol name -> SymbolInfo (shared by all accounts)
+        self.initialized = False
+        self.current_login = None
+        self.next_ticket = 1000000
+        self.queued_retcodes = deque()
+        self.error = (self.RES_S_OK, 'Success')
+        self.call_counts = Counter()
+
+    # --- Scenario setup -------------------------------------------------------------
+
+    def add_account(self, login: int, password: str = '', server: str = 'Simulated-Server',
+                    balance: float = 10000.0) -> None:
+        """Create an empty trading account"""
+        self.accounts[login] = {
+            'password': password,
+            'server': server,
+            'balance': balance,
+            'orders': {},      # ticket -> order dict
+            'positions': {}    # ticket -> position dict
+        }
+
+    def add_symbol(self, name: str, digits: int = 5, filling_mode: int = 1, volume_min: float = 0.01,
+                   volume_max: float = 100.0, volume_step: float = 0.01, trade_mode: int = 4) -> None:
+        """Make a symbol available on every account"""
+        self.symbols[name] = SymbolInfo(name, digits, 10 ** -digits, 10, volume_min, volume_max,
+                                        volume_step, trade_mode, filling_mode)
+
+    def add_pending_order(self, login: int, symbol: str, order_type: int, volume: float, price: float,
+                          sl: float = 0.0, tp: float = 0.0, magic: int = 0, comment: str = '',
+                          expiration: int = 0) -> int:
+        """Place a pending order directly on an account (bypassing latency and retcodes)"""
+        ticket = self._new_ticket()
+        self.accounts[login]['orders'][ticket] = {
+            'ticket': ticket, 'time_setup': int(time.time()), 'time_expiration': expiration,
+            'type': order_type, 'type_time': self.ORDER_TIME_SPECIFIED if expiration else self.ORDER_TIME_GTC,
+            'state': self.ORDER_STATE_PLACED, 'volume_initial': volume, 'volume_current': volume,
+            'price_open': price, 'sl': sl, 'tp': tp, 'symbol': symbol, 'comment': comment,
+            'magic': magic, 'position_id': 0
+        }
+        return ticket
+
+    def update_pending_order(self, login: int, ticket: int, **changes) -> None:
+        """Change fields of a pending order directly (e.g. price_open, sl, tp, volume_initial)"""
+        self.accounts[login]['orders'][ticket].update(changes)
+
+    def remove_pending_order(self, login: int, ticket: int) -> None:
+        """Delete a pending order directly"""
+        self.accounts[login]['orders'].pop(ticket, None)
+
+    def fill_order(self, login: int, ticket: int) -> Optional[int]:
+        """Turn a pending order into a position - the position keeps the order's ticket and magic"""
+        order = self.accounts[login]['orders'].pop(ticket, None)
+        if order is None:
+            return None
+
+        now = int(time.time())
+        self.accounts[login]['positions'][ticket] = {
+            'ticket': ticket, 'time': now, 'time_update': now,
+            'type': self.ORDER_TYPE_BUY if order['type'] % 2 == 0 else self.ORDER_TYPE_SELL,
+            'volume': order['volume_current'], 'price_open': order['price_open'],
+            'price_current': order['price_open'], 'sl': order['sl'], 'tp': order['tp'],
+            'symbol': order['symbol'], 'comment': order['comment'], 'magic': order['magic'],
+            'identifier': ticket, 'profit': 0.0, 'swap': 0.0
+        }
+        return ticket
+
+    def close_position_directly(self, login: int, ticket: int) -> None:
+        """Remove a position directly (e.g. hit SL/TP on the source)"""
+        self.accounts[login]['positions'].pop(ticket, None)
+
+    def queue_retcode(self, *retcodes: int) -> None:
+        """Force the retcodes of the next order_send calls, in order"""
+        self.queued_retcodes.extend(retcodes)
+
+    def reset_call_counts(self) -> None:
+        """Clear the per-function call counters"""
+        self.call_counts.clear()
+
+    # --- MetaTrader5 API ------------------------------------------------------------
+
+    def initialize(self, path: Optional[str] = None, **kwargs) -> bool:
+        self._call('initialize')
+        self.initialized = True
+        self.error = (self.RES_S_OK, 'Success')
+        return True
+
+    def login(self, login: int, password: str = '', server: str = '', **kwargs) -> bool:
+        self._call('login')
+        account = self.accounts.get(login)
+        if not self.initialized or account is None or account['password'] != password:
+            self.error = (self.RES_E_AUTH_FAILED, 'Authorization failed')
+            return False
+
+        self.current_login = login
+        self.error = (self.RES_S_OK, 'Success')
+        return True
+
+    def shutdown(self) -> None:
+        self._call('shutdown')
+        self.initialized = False
+        self.current_login = None
+
+    def last_error(self) -> Tuple[int, str]:
+        return self.error
+
+    def account_info(self) -> Optional[AccountInfo]:
+        self._call('account_info')
+        account = self._account()
+        if account is None:
+            return None
+
+        balance = account['balance']
+        return AccountInfo(
+            login=self.current_login, server=account['server'], currency='USD', trade_mode=0, leverage=100,
+            limit_orders=0, margin_so_mode=0, trade_allowed=True, trade_expert=True, margin_mode=2,
+            currency_digits=2, balance=balance, credit=0.0, profit=0.0, equity=balance, margin=0.0,
+            margin_free=balance, margin_level=0.0, margin_so_call=50.0, margin_so_so=30.0,
+            margin_initial=0.0, margin_maintenance=0.0, assets=0.0, liabilities=0.0,
+            commission_blocked=0.0, name='Simulated', company='Simulated Broker'
+        )
+
+    def terminal_info(self):
+        self._call('terminal_info')
+        return None
+
+    def symbol_info(self, symbol: str) -> Optional[SymbolInfo]:
+        self._call('symbol_info')
+        if self._account() is None:
+            return None
+        return self.symbols.get(symbol)
+
+    def orders_total(self) -> Optional[int]:
+        self._call('orders_total')
+        account = self._account()
+        return len(account['orders']) if account is not None else None
+
+    def positions_total(self) -> Optional[int]:
+        self._call('positions_total')
+        account = self._account()
+        return len(account['positions']) if account is not None else None
+
+    def orders_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                   ticket: Optional[int] = None) -> Optional[Tuple[TradeOrder, ...]]:
+        self._call('orders_get')
+        account = self._account()
+        if account is None:
+            return None
+        records = self._select(account['orders'], symbol, group, ticket)
+        return tuple(TradeOrder(**record) for record in records)
+
+    def positions_get(self, symbol: Optional[str] = None, group: Optional[str] = None,
+                      ticket: Optional[int] = None) -> Optional[Tuple[TradePosition, ...]]:
+        self._call('positions_get')
+        account = self._account()
+        if account is None:
+            return None
+        records = self._select(account['positions'], symbol, group, ticket)
+        return tuple(TradePosition(**record) for record in records)
+
+    def order_send(self, request: Dict[str, Any]) -> Optional[OrderSendResult]:
+        self._call('order_send')
+        account = self._account()
+        if account is None:
+            return None
+
+        if self.queued_retcodes:
+            retcode = self.queued_retcodes.popleft()
+            if retcode != self.TRADE_RETCODE_DONE:
+                return self._result(retcode, request, comment='Simulated retcode')
+        elif self.reject_probability and self.random.random() < self.reject_probability:
+            return self._result(self.TRADE_RETCODE_REJECT, request, comment='Simulated rejection')
+
+        action = request.get('action')
+        if action == self.TRADE_ACTION_PENDING:
+            return self._place(account, request)
+        if action == self.TRADE_ACTION_MODIFY:
+            return self._modify(account, request)
+        if action == self.TRADE_ACTION_REMOVE:
+            return self._remove(account, request)
+        if action == self.TRADE_ACTION_SLTP:
+            return self._sltp(account, request)
+        if action == self.TRADE_ACTION_DEAL and request.get('position'):
+            return self._close(account, request)
+
+        return self._result(self.TRADE_RETCODE_INVALID, request, comment='Unsupported request')
+
+    # --- Internals ------------------------------------------------------------------
+
+    def _call(self, name: str) -> None:
+        """Count an API call and apply its configured latency"""
+        self.call_counts[name] += 1
+        delay = self.latency.get(name, self.latency.get('default', 0.0))
+        if delay > 0:
+            self.sleep(delay)
+
+    def _account(self) -> Optional[Dict[str, Any]]:
+        """Get the logged-in account, recording an error when there is none"""
+        if not self.initialized or self.current_login is None:
+            self.error = (self.RES_E_NO_CONNECTION, 'No IPC connection')
+            return None
+        return self.accounts[self.current_login]
+
+    def _new_ticket(self) -> int:
+        self.next_ticket += 1
+        return self.next_ticket
+
+    def _select(self, records: Dict[int, Dict[str, Any]], symbol: Optional[str],
+                group: Optional[str], ticket: Optional[int]) -> List[Dict[str, Any]]:
+        """Filter records like orders_get/positions_get (group is a comma-separated list of '*' masks, '!' excludes)"""
+        if ticket is not None:
+            record = records.get(ticket)
+            return [record] if record is not None else []
+
+        selected = list(records.values())
+        if symbol is not None:
+            selected = [record for record in selected if record['symbol'] == symbol]
+        if group is not None:
+            masks = [mask.strip() for mask in group.split(',') if mask.strip()]
+            include = [mask for mask in masks if not mask.startswith('!')]
+            exclude = [mask[1:] for mask in masks if mask.startswith('!')]
+            selected = [record for record in selected
+                        if any(fnmatchcase(record['symbol'], mask) for mask in include)
+                        and not any(fnmatchcase(record['symbol'], mask) for mask in exclude)]
+        return selected
+
+    def _result(self, retcode: int, request: Dict[str, Any], order: int = 0,
+                comment: str = 'Request executed') -> OrderSendResult:
+        return OrderSendResult(retcode, 0, order, request.get('volume', 0.0), request.get('price', 0.0),
+                               comment, request)
+
+    def _place(self, account: Dict[str, Any], request: Dict[str, Any]) -> OrderSendResult:
+        if request.get('symbol') not in self.symbols:
+            return self._result(self.TRADE_RETCODE_INVALID, request, comment='Unknown symbol')
+
+        ticket = self.add_pending_order(
+            self.current_login, request['symbol'], request['type'], request['volume'], request['price'],
+            sl=request.get('sl', 0.0), tp=request.get('tp', 0.0), magic=request.get('magic', 0),
+            comment=request.get('comment', ''), expiration=request.get('expiration', 0)
+        )
+        if self.fill_on_place:
+            self.fill_order(self.current_login, ticket)
+        return self._result(self.TRADE_RETCODE_DONE, request, order=ticket)
+
+    def _modify(self, account: Dict[str, Any], request: Dict[str, Any]) -> OrderSendResult:
+        order = account['orders'].get(request.get('order'))
+        if order is None:
+            return self._result(self.TRADE_RETCODE_INVALID, request, comment='Order not found')
+
+        order.update({
+            'price_open': request.get('price', order['price_open']),
+            'volume_initial': request.get('volume', order['volume_initial']),
+            'volume_current': request.get('volume', order['volume_current']),
+            'sl': request.get('sl', order['sl']),
+            'tp': request.get('tp', order['tp']),
+            'type_time': request.get('type_time', order['type_time']),
+            'time_expiration': request.get('expiration', 0)
+        })
+        return self._result(self.TRADE_RETCODE_DONE, request, order=order['ticket'])
+
+    def _remove(self, account: Dict[str, Any], request: Dict[str, Any]) -> OrderSendResult:
+        if account['orders'].pop(request.get('order'), None) is None:
+            return self._result(self.TRADE_RETCODE_INVALID, request, comment='Order not found')
+        return self._result(self.TRADE_RETCODE_DONE, request, order=request['order'])
+
+    def _sltp(self, account: Dict[str, Any], request: Dict[str, Any]) -> OrderSendResult:
+        position = account['positions'].get(request.get('position'))
+        if position is None:
+            return self._result(self.TRADE_RETCODE_POSITION_CLOSED, request, comment='Position not found')
+
+        position['sl'] = request.get('sl', position['sl'])
+        position['tp'] = request.get('tp', position['tp'])
+        return self._result(self.TRADE_RETCODE_DONE, request)
+
+    def _close(self, account: Dict[str, Any], request: Dict[str, Any]) -> OrderSendResult:
+        if account['positions'].pop(request['position'], None) is None:
+            return self._result(self.TRADE_RETCODE_POSITION_CLOSED, request, comment='Position not found')
+        return self._result(self.TRADE_RETCODE_DONE, request)
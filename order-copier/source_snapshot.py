@@ -0,0 +1,46 @@
+# MT5 Pending Order Copier System - Source Snapshot
+# This module holds a consistent capture of the source terminal state
+
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+
+from fingerprints import compute_fingerprint
+
+class SourceSnapshot:
+    """Pending orders, positions and account state captured in one source session"""
+
+    def __init__(self, orders: List[Dict[str, Any]], positions: List[Dict[str, Any]],
+                 account_info: Optional[Dict[str, Any]] = None, captured_at: Optional[datetime] = None,
+                 terminal_name: str = "Source"):
+        self.orders = orders
+        self.positions = positions
+        self.account_info = account_info
+        self.captured_at = captured_at or datetime.now()
+        self.terminal_name = terminal_name
+        self._fingerprint = None
+
+    @property
+    def order_count(self) -> int:
+        """Number of pending orders in the snapshot"""
+        return len(self.orders)
+
+    @property
+    def position_count(self) -> int:
+        """Number of open positions in the snapshot"""
+        return len(self.positions)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the order and position fields that matter for reconciliation"""
+        if self._fingerprint is None:
+            self._fingerprint = compute_fingerprint(self.orders, self.positions)
+        return self._fingerprint
+
+    def age_seconds(self, now: Optional[datetime] = None) -> float:
+        """Seconds elapsed since the snapshot was captured"""
+        return ((now or datetime.now()) - self.captured_at).total_seconds()
+
+    def summary(self) -> str:
+        """Readable one-line description of the snapshot"""
+        return (f"{self.terminal_name} snapshot at {self.captured_at.strftime('%Y-%m-%d %H:%M:%S')}: "
+                f"{self.order_count} orders, {self.position_count} positions")
@@ -0,0 +1,102 @@
+# MT5 Pending Order Copier System - Source Change Watcher
+# This module polls a cheap source change signature and runs full cycles only when it moves
+
+import time
+import logging
+from typing import Dict, Optional, Any, Tuple
+
+from order_manager import OrderManager
+from utils import setup_logging, format_error_message
+
+class SourceWatcher:
+    """Triggers reconciliation cycles from changes on the source terminal instead of a fixed delay
+
+    Each poll reads the source's order/position counts and a hash of tickets, prices, volumes and
+    SL/TP over the open source session. With hash_check_interval_seconds set, polls in between
+    read only the counts and fetch the full signature when they moved, which transfers less data
+    but finds edits that keep the counts (SL/TP, price, volume) up to that interval late.
+    A full cycle runs only when the signature differs from the one seen before the previous cycle,
+    or when full_cycle_interval_seconds passed without a cycle (target-side changes, failed actions
+    and orphan checks still need a regular pass).
+    """
+
+    def __init__(self, order_manager: OrderManager, logger: Optional[logging.Logger] = None,
+                 full_cycle_interval_seconds: float = 60, clock=time.monotonic,
+                 hash_check_interval_seconds: float = 0):
+        self.logger = logger or setup_logging()
+        self.order_manager = order_manager
+        self.full_cycle_interval_seconds = full_cycle_interval_seconds
+        self.hash_check_interval_seconds = hash_check_interval_seconds
+        self.clock = clock
+        self.last_signature = None
+        self.last_hash_at = None
+        self.last_cycle_at = None
+        self.last_changed = False  # Whether the last poll saw a source change
+        self.stats = {
+            'polls': 0,
+            'hash_polls': 0,
+            'poll_failures': 0,
+            'changes_detected': 0,
+            'cycles': 0,
+            'forced_cycles': 0,
+            'failed_cycles': 0,
+            'last_cycle_seconds': 0.0
+        }
+
+    def step(self) -> bool:
+        """Poll the source once and run a cycle if it changed or a full cycle is due; True when a cycle ran"""
+        self.stats['polls'] += 1
+        self.last_changed = False
+        now = self.clock()
+        signature = self._poll(now)
+
+        if signature is None:
+            # Source unreachable - the next poll reconnects
+            self.stats['poll_failures'] += 1
+            return False
+
+        changed = signature != self.last_signature
+        due = self.last_cycle_at is None or now - self.last_cycle_at >= self.full_cycle_interval_seconds
+        if not changed and not due:
+            return False
+
+        if changed and self.last_signature is not None:
+            self.last_changed = True
+            self.stats['changes_detected'] += 1
+            self.logger.info(f"Source changed ({signature[0]} orders, {signature[1]} positions), running cycle")
+        elif not changed:
+            self.stats['forced_cycles'] += 1
+            self.logger.debug("No source changes, running periodic full cycle")
+
+        # The signature is kept even when the cycle fails - failures are retried by the periodic full cycle
+        self.last_signature = signature
+        try:
+            success = self.order_manager.process_all_terminals()
+        except Exception as e:
+            self.logger.error(f"Error in watcher cycle: {format_error_message(e)}")
+            success = False
+
+        self.last_cycle_at = self.clock()
+        self.stats['cycles'] += 1
+        self.stats['last_cycle_seconds'] = self.last_cycle_at - now
+        if not success:
+            self.stats['failed_cycles'] += 1
+        return True
+
+    def _poll(self, now: float) -> Optional[Tuple[int, int, str]]:
+        """Get the source signature, reading only the counts while they match and no hash check is due"""
+        hash_due = self.last_hash_at is None or now - self.last_hash_at >= self.hash_check_interval_seconds
+        if self.last_signature is not None and not hash_due:
+            totals = self.order_manager.get_source_totals()
+            if totals is None:
+                return None
+            if totals == self.last_signature[:2]:
+                return self.last_signature
+
+        self.stats['hash_polls'] += 1
+        self.last_hash_at = now
+        return self.order_manager.get_source_signature()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get poll and cycle counters"""
+        return self.stats.copy()
@@ -0,0 +1,213 @@
+# MT5 Pending Order Copier System - Background State Writer
+# This module moves tracker persistence off the processing loop onto a debounced writer thread
+
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+from order_tracker import OrderTracker
+from utils import setup_logging, format_error_message
+
+def coalesce_save_jobs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge a burst of save jobs into the fewest writes with the same end result
+
+    A snapshot or a full store rewrite contains everything prepared before it, so earlier jobs
+    are dropped (their journal events move into the snapshot job, so a failed write can still
+    put them back). Consecutive journal appends become one append and consecutive store
+    writes one transaction.
+    """
+    merged = []
+    for job in jobs:
+        previous = merged[-1] if merged else None
+
+        if job['kind'] == 'snapshot':
+            dropped_events = [event for earlier in merged for event in earlier.get('events', [])]
+            merged = [dict(job, events=dropped_events + job['events'])]
+        elif job['kind'] == 'store' and job['full']:
+            merged = [dict(job, count=sum(earlier['count'] for earlier in merged) + job['count'])]
+        elif previous and previous['kind'] == job['kind'] == 'journal':
+            merged[-1] = dict(previous, events=previous['events'] + job['events'])
+        elif previous and previous['kind'] == job['kind'] == 'store':
+            # Later copies of a section replace earlier ones
+            sections = {(section, terminal_name): records
+                        for section, terminal_name, records in previous['sections'] + job['sections']}
+            merged[-1] = dict(previous, sections=[(section, terminal_name, records)
+                                                  for (section, terminal_name), records in sections.items()],
+                              last_run=job['last_run'], count=previous['count'] + job['count'])
+        else:
+            merged.append(job)
+
+    return merged
+
+class StateWriter:
+    """Writes tracker state on a background thread so the processing loop never waits for disk
+
+    request_save() runs the cheap prepare step of a save on the caller's thread and queues the
+    resulting job. The writer thread waits debounce_seconds after the first queued job, merges
+    everything that arrived in the meantime and writes it. flush() and stop() bypass the
+    debounce window; stop() is also registered with atexit as a last resort.
+    """
+
+    _FLUSH = 'flush'
+    _STOP = 'stop'
+
+    def __init__(self, tracker: OrderTracker, logger: Optional[logging.Logger] = None, debounce_seconds: float = 1.0):
+        self.logger = logger or setup_logging()
+        self.tracker = tracker
+        self.debounce_seconds = debounce_seconds
+        self.queue = queue.Queue()
+        self.thread = None
+        self.stopped = False
+        self.stats = {
+            'jobs_queued': 0,
+            'jobs_coalesced': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'max_queue_depth': 0,
+            'total_flush_seconds': 0.0,
+            'last_flush_seconds': 0.0
+        }
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the writer thread is alive"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        if self.is_running:
+            return
+
+        self.thread = threading.Thread(target=self._run, name="state-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def request_save(self) -> bool:
+        """Capture the current changes and queue them for writing"""
+        try:
+            job = self.tracker.prepare_save()
+        except Exception as e:
+            self.logger.error(f"Error preparing state save: {format_error_message(e)}")
+            return False
+
+        if job is None:
+            return True
+
+        if self.stopped:
+            # Late changes after shutdown are written directly
+            return self.tracker.write_save(job)
+
+        self.start()
+        self.queue.put((job['kind'], job))
+        self.stats['jobs_queued'] += 1
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue.qsize())
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write all queued jobs now and wait until they are on disk"""
+        if not self.is_running:
+            return True
+
+        self.queue.put((self._FLUSH, None))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.logger.warning("Timed out waiting for the state writer to flush")
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = 30) -> None:
+        """Queue the latest changes, write everything and stop the writer thread"""
+        self.request_save()
+        self.stopped = True
+        if not self.is_running:
+            return
+
+        self.queue.put((self._STOP, None))
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            self.logger.warning("State writer did not stop in time, unsaved changes may be lost")
+        atexit.unregister(self.stop)
+
+    def _run(self) -> None:
+        """Writer thread loop: wait for a job, debounce, merge and write"""
+        while True:
+            kind, job = self.queue.get()
+            received = 1
+            jobs = [job] if job is not None else []
+            stop = kind == self._STOP
+            urgent = kind in (self._FLUSH, self._STOP)
+
+            # Collect everything that arrives within the debounce window
+            deadline = time.monotonic() + self.debounce_seconds
+            while not urgent:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    kind, job = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                received += 1
+                if job is not None:
+                    jobs.append(job)
+                stop = kind == self._STOP
+                urgent = kind in (self._FLUSH, self._STOP)
+
+            # Anything queued behind a flush/stop marker is written in the same pass
+            while True:
+                try:
+                    kind, job = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                received += 1
+                if job is not None:
+                    jobs.append(job)
+                stop = stop or kind == self._STOP
+
+            try:
+                self._write(jobs)
+            finally:
+                for _ in range(received):
+                    self.queue.task_done()
+
+            if stop:
+                return
+
+    def _write(self, jobs: List[Dict[str, Any]]) -> None:
+        """Write a batch of jobs"""
+        if not jobs:
+            return
+
+        started = time.perf_counter()
+        merged = coalesce_save_jobs(jobs)
+        self.stats['jobs_coalesced'] += len(jobs) - len(merged)
+
+        success = True
+        for job in merged:
+            try:
+                success = self.tracker.write_save(job) and success
+            except Exception as e:
+                self.logger.error(f"Error writing state: {format_error_message(e)}")
+                success = False
+
+        elapsed = time.perf_counter() - started
+        self.stats['flushes'] += 1
+        self.stats['total_flush_seconds'] += elapsed
+        self.stats['last_flush_seconds'] = elapsed
+        if not success:
+            # write_save put the changes back - they go out with the next request
+            self.stats['failed_flushes'] += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get queue depth and flush latency"""
+        stats = self.stats.copy()
+        stats['queue_depth'] = self.queue.qsize()
+        stats['average_flush_seconds'] = stats['total_flush_seconds'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
@@ -0,0 +1,68 @@
+# MT5 Pending Order Copier System - Symbol Metadata Cache
+# This module caches symbol_info lookups per terminal with TTL-based invalidation
+
+import time
+from typing import Dict, Optional, Any, Tuple
+
+class SymbolInfoCache:
+    """TTL cache of raw MT5 symbol information for a single terminal
+
+    Missing symbols are cached as well (negative caching) with their own, usually
+    shorter, TTL so that unknown symbols are not looked up on every order.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, negative_ttl_seconds: Optional[float] = None, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds if negative_ttl_seconds is not None else min(ttl_seconds, 60)
+        self.clock = clock
+        self.entries = {}  # symbol -> (expires_at, symbol_info or None)
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'invalidations': 0
+        }
+
+    def get(self, symbol: str) -> Tuple[bool, Any]:
+        """Look up a symbol - returns (found, symbol_info) where symbol_info may be None for missing symbols"""
+        entry = self.entries.get(symbol)
+        if entry is None:
+            self.stats['misses'] += 1
+            return False, None
+
+        expires_at, symbol_info = entry
+        if self.clock() >= expires_at:
+            del self.entries[symbol]
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return False, None
+
+        if symbol_info is None:
+            self.stats['negative_hits'] += 1
+        else:
+            self.stats['hits'] += 1
+        return True, symbol_info
+
+    def put(self, symbol: str, symbol_info: Any) -> None:
+        """Store symbol information (None records a missing symbol)"""
+        ttl = self.ttl_seconds if symbol_info is not None else self.negative_ttl_seconds
+        if ttl <= 0:
+            return
+        self.entries[symbol] = (self.clock() + ttl, symbol_info)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop one symbol, or every symbol when none is given"""
+        if symbol is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(symbol, None)
+        self.stats['invalidations'] += 1
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get cache counters and current size"""
+        stats = self.stats.copy()
+        stats['size'] = len(self.entries)
+        lookups = stats['hits'] + stats['negative_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['negative_hits']) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,259 @@
+# MT5 Pending Order Copier System - Terminal Worker Pool
+# This module runs each target terminal in its own long-lived worker process
+
+import sys
+import time
+import atexit
+import signal
+import logging
+import importlib
+import multiprocessing
+from typing import Dict, List, Optional, Any, FrozenSet
+
+from source_snapshot import SourceSnapshot
+from reconciliation import ALL_TASKS
+from utils import setup_logging, format_error_message
+
+def _install_mt5_module(module_name: str) -> None:
+    """Replace the MetaTrader5 module used by this process (e.g. with a fake for testing)"""
+    module = importlib.import_module(module_name)
+    sys.modules['MetaTrader5'] = module
+
+    import mt5_connector
+    mt5_connector.mt5 = module
+
+def _run_worker_cycle(manager, terminal_name: str, terminal_config: Dict[str, Any],
+                      snapshot: SourceSnapshot, orphan_checks: Dict[int, int],
+                      tasks: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+    """Process one cycle for the worker's terminal and build the reply for the parent"""
+    for key in manager.stats:
+        manager.stats[key] = 0
+    timeouts_before = manager.call_supervisor.stats['timeouts'] if manager.call_supervisor else 0
+
+    manager.tracker.update_source_orders(snapshot.orders)
+    manager.tracker.update_source_positions(snapshot.positions)
+    manager.tracker.apply_terminal_state(terminal_name, {'orphan_checks': orphan_checks})
+
+    error = None
+    try:
+        success = manager._process_terminal(terminal_name, terminal_config, snapshot.orders, snapshot.positions,
+                                            snapshot.fingerprint, tasks if tasks is not None else ALL_TASKS)
+    except Exception as e:
+        success = False
+        error = format_error_message(e)
+        manager.terminal_reachable[terminal_name] = False
+
+    # A timed-out MT5 call means the terminal hung, even if the rest of its cycle went on
+    if manager.call_supervisor and manager.call_supervisor.stats['timeouts'] > timeouts_before:
+        manager.terminal_reachable[terminal_name] = False
+
+    return {
+        'terminal': terminal_name,
+        'success': success,
+        'error': error,
+        'reachable': manager.terminal_reachable.pop(terminal_name, None),
+        'stats': manager.stats.copy(),
+        'state': manager.tracker.get_terminal_state(terminal_name),
+        'sessions': manager.sessions.get_statistics(),
+        'symbol_cache': manager.connector.get_symbol_cache_statistics(),
+        'call_supervisor': manager.call_supervisor.get_statistics() if manager.call_supervisor else {}
+    }
+
+def _worker_main(terminal_name: str, terminal_config: Dict[str, Any], config: Dict[str, Any],
+                 conn, mt5_module: Optional[str], backend=None) -> None:
+    """Worker process entry point - owns the MT5 session for a single target terminal"""
+    # The parent process handles Ctrl+C and tells workers to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if mt5_module:
+        _install_mt5_module(mt5_module)
+
+    # Imported here so the MetaTrader5 module can be swapped first
+    from order_manager import OrderManager
+    from order_tracker import OrderTracker
+
+    logging_config = config.get('LOGGING_CONFIG', {})
+    logger = setup_logging(
+        log_level=logging_config.get('level', 'INFO'),
+        log_file=logging_config.get('file_path')
+    )
+
+    # Restrict the worker to its own terminal and never nest another pool
+    worker_config = dict(config)
+    worker_config['TARGET_TERMINALS'] = {terminal_name: terminal_config}
+    worker_config['PERFORMANCE_CONFIG'] = dict(config.get('PERFORMANCE_CONFIG', {}), parallel_terminals=False)
+    if mt5_module:
+        # The worker's own call supervisor loads the same MetaTrader5 module
+        worker_config['PERFORMANCE_CONFIG']['mt5_module'] = mt5_module
+
+    manager = OrderManager(worker_config, logger, tracker=OrderTracker(state_file=None, logger=logger),
+                           backend=backend)
+    logger.info(f"Worker for {terminal_name} started")
+
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+
+            command = message[0]
+            if command == 'stop':
+                break
+            elif command == 'process':
+                _, snapshot, orphan_checks, tasks = message
+                conn.send(_run_worker_cycle(manager, terminal_name, terminal_config, snapshot, orphan_checks, tasks))
+    finally:
+        manager.cleanup()
+        logger.info(f"Worker for {terminal_name} stopped")
+
+class TerminalWorkerPool:
+    """Long-lived worker processes, one per target terminal
+
+    The MetaTrader5 module keeps a single session per process, so each worker owns its
+    own MT5Connector. The parent broadcasts the source snapshot and collects results.
+    A backend object (e.g. SimulatedBroker) is copied into each worker, so every worker
+    works on its own copy of the backend state.
+
+    With supervise_mt5_calls enabled each worker runs its MT5 calls under its own call
+    supervisor, so a hung call fails that terminal's cycle after its call deadline. Workers
+    are therefore not daemon processes (those cannot start the call worker); the pool stops
+    them at interpreter exit if stop() was not called.
+    """
+
+    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None,
+                 mt5_module: Optional[str] = None, start_method: Optional[str] = None, backend=None):
+        self.logger = logger or setup_logging()
+        self.config = config
+        self.target_configs = config['TARGET_TERMINALS']
+
+        performance_config = config.get('PERFORMANCE_CONFIG', {})
+        self.worker_timeout = performance_config.get('worker_timeout_seconds', 120)
+        # Name of a module implementing the MetaTrader5 API to load in the workers
+        self.mt5_module = mt5_module or performance_config.get('mt5_module')
+        self.backend = backend
+
+        self.context = multiprocessing.get_context(start_method)
+        self.workers = {}  # terminal_name -> (process, connection)
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the worker processes have been started"""
+        return bool(self.workers)
+
+    def start(self) -> bool:
+        """Start one worker process per target terminal"""
+        try:
+            for terminal_name in self.target_configs:
+                self._spawn_worker(terminal_name)
+            atexit.register(self.stop)
+
+            self.logger.info(f"Started {len(self.workers)} terminal worker processes")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error starting terminal workers: {format_error_message(e)}")
+            self.stop()
+            return False
+
+    def _spawn_worker(self, terminal_name: str) -> None:
+        """Start (or restart) the worker process for a terminal"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(terminal_name, self.target_configs[terminal_name], self.config, child_conn, self.mt5_module,
+                  self.backend),
+            name=f"mt5-worker-{terminal_name}",
+            daemon=False  # Starts its own call worker process
+        )
+        process.start()
+        child_conn.close()
+        self.workers[terminal_name] = (process, parent_conn)
+
+    def _restart_worker(self, terminal_name: str) -> None:
+        """Kill a worker that died or stopped responding and start a fresh one"""
+        process, conn = self.workers.pop(terminal_name)
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=5)
+        conn.close()
+
+        self.logger.warning(f"Restarting worker for {terminal_name}")
+        self._spawn_worker(terminal_name)
+
+    def process_cycle(self, snapshot: SourceSnapshot, orphan_checks: Dict[str, Dict[int, int]],
+                      tasks: Optional[Dict[str, FrozenSet[str]]] = None,
+                      terminals: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Broadcast the source snapshot to the workers of the given terminals (all when None) and collect
+        per-terminal results (tasks per terminal, all when None)"""
+        results = {}
+        dispatched = []
+
+        # Step 1: Broadcast so all terminals are processed concurrently
+        for terminal_name in (list(self.workers) if terminals is None else [t for t in terminals if t in self.workers]):
+            process, conn = self.workers[terminal_name]
+            try:
+                if not process.is_alive():
+                    self._restart_worker(terminal_name)
+                    process, conn = self.workers[terminal_name]
+
+                terminal_tasks = tasks.get(terminal_name) if tasks else None
+                conn.send(('process', snapshot, orphan_checks.get(terminal_name, {}), terminal_tasks))
+                dispatched.append(terminal_name)
+            except Exception as e:
+                self.logger.error(f"Failed to dispatch cycle to {terminal_name}: {format_error_message(e)}")
+                results[terminal_name] = self._failed_result(terminal_name, format_error_message(e))
+
+        # Step 2: Collect results against a single deadline
+        deadline = time.monotonic() + self.worker_timeout
+        for terminal_name in dispatched:
+            process, conn = self.workers[terminal_name]
+            try:
+                remaining = max(0.0, deadline - time.monotonic())
+                if conn.poll(remaining):
+                    results[terminal_name] = conn.recv()
+                    continue
+
+                error = f"Worker timed out after {self.worker_timeout}s"
+            except (EOFError, OSError) as e:
+                error = f"Worker connection lost: {format_error_message(e)}"
+
+            self.logger.error(f"{terminal_name}: {error}")
+            results[terminal_name] = self._failed_result(terminal_name, error)
+            # A late reply would desynchronise the pipe, so always replace the worker
+            self._restart_worker(terminal_name)
+
+        return results
+
+    def _failed_result(self, terminal_name: str, error: str) -> Dict[str, Any]:
+        """Build a result for a terminal whose worker did not reply"""
+        return {
+            'terminal': terminal_name,
+            'success': False,
+            'error': error,
+            'reachable': False,
+            'stats': {},
+            'state': None,
+            'sessions': {},
+            'symbol_cache': {},
+            'call_supervisor': {}
+        }
+
+    def stop(self) -> None:
+        """Stop all worker processes"""
+        for terminal_name, (process, conn) in list(self.workers.items()):
+            try:
+                if process.is_alive():
+                    conn.send(('stop',))
+                process.join(timeout=10)
+                if process.is_alive():
+                    self.logger.warning(f"Worker for {terminal_name} did not stop, terminating")
+                    process.terminate()
+                    process.join(timeout=5)
+            except Exception as e:
+                self.logger.error(f"Error stopping worker for {terminal_name}: {format_error_message(e)}")
+            finally:
+                conn.close()
+
+        self.workers = {}
+        atexit.unregister(self.stop)
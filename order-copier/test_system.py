@@ -4,11 +4,16 @@
 
 import sys
 import os
+import time
+import threading
 import unittest
 from unittest.mock import Mock, patch, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta
 import tempfile
+import shutil
+import sqlite3
 import json
+import pickle
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,11 +23,30 @@ try:
     from utils import (
         setup_logging, calculate_lot_size, validate_lot_size,
         format_price, is_valid_order_type, safe_float_compare,
-        create_order_summary, format_error_message
+        create_order_summary, format_error_message, is_market_hours
     )
     from mt5_connector import MT5Connector
     from order_tracker import OrderTracker
     from order_manager import OrderManager
+    from source_snapshot import SourceSnapshot
+    from session_manager import SessionManager
+    from symbol_cache import SymbolInfoCache
+    from reconciliation import (
+        ReconciliationPlanner, ACTION_CREATE, ACTION_MODIFY,
+        ACTION_CANCEL, ACTION_CLOSE, ACTION_SLTP, TASK_COPY, TASK_ORPHANS
+    )
+    from fingerprints import TerminalFingerprints, compute_fingerprint
+    from simulated_broker import SimulatedBroker, TradeOrder, TradePosition
+    from records import OrderRecord, PositionRecord
+    from order_columns import numpy_available
+    from placement_journal import PlacementJournal
+    from state_writer import StateWriter
+    from source_watcher import SourceWatcher
+    from scheduler import DeadlineScheduler, JobScheduler, CronTrigger, TimeframeTrigger, IntervalTrigger, build_terminal_jobs
+    from cadence import AdaptiveCadence
+    from circuit_breaker import CircuitBreakers, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+    from call_supervisor import SupervisedMT5, MT5CallTimeout, get_call_class, CALL_CONNECT, CALL_FETCH, CALL_TRADE
+    from scheduling_utils import calculate_next_execution_time, get_timeframe_seconds
 except ImportError as e:
     print(f"Import error: {e}")
     print("Please ensure all required modules are available")
@@ -144,8 +168,8 @@ class TestOrderTracker(unittest.TestCase):
         
         self.tracker.update_source_orders(orders)
         self.assertEqual(len(self.tracker.state['source_orders']), 2)
-        self.assertIn('123', self.tracker.state['source_orders'])
-        self.assertIn('456', self.tracker.state['source_orders'])
+        self.assertIn(123, self.tracker.state['source_orders'])
+        self.assertIn(456, self.tracker.state['source_orders'])
     
     def test_update_target_orders(self):
         """Test target order updates"""
@@ -194,6 +218,12 @@ class TestOrderTracker(unittest.TestCase):
         orphans = self.tracker.detect_orphaned_orders('Terminal1')
         self.assertEqual(len(orphans), 1)
         self.assertEqual(orphans[0]['ticket'], 101)
+        
+        # The magic index follows record changes
+        self.assertEqual([order['ticket'] for order in self.tracker.get_matching_target_orders(123, 'Terminal1')], [789])
+        self.tracker.update_target_orders('Terminal1', target_orders[1:])
+        self.assertEqual(self.tracker.get_matching_target_orders(123, 'Terminal1'), [])
+        self.assertEqual(self.tracker._index('target_orders', 'Terminal1').lookup('symbol', 'GBPUSD'), {101})
     
     def test_orphan_check_management(self):
         """Test orphan check counter management"""
@@ -247,6 +277,295 @@ class TestOrderTracker(unittest.TestCase):
         self.assertEqual(len(new_tracker.state['source_orders']), 1)
         self.assertIn('Terminal1', new_tracker.state['target_orders'])
         self.assertIn('Terminal1', new_tracker.state['orphan_checks'])
+        
+        # Ticket keys come back as ints
+        self.assertIn(123, new_tracker.state['source_orders'])
+        self.assertEqual(new_tracker.get_orphan_check_count('Terminal1', 999), 1)
+        self.assertEqual(new_tracker.detect_orphaned_orders('Terminal1'), [])
+    
+    def test_save_only_when_changed(self):
+        """Test that unchanged state is not rewritten and only changed terminals are serialized"""
+        target_orders = [{
+            'ticket': 789, 'magic': 123, 'symbol': 'EURUSD', 'type_name': 'BUY',
+            'volume_initial': 1.0, 'price_open': 1.1234, 'sl': 1.1200, 'tp': 1.1300,
+            'time_setup': 1640995200, 'time_expiration': 0
+        }]
+        self.tracker.update_target_orders('Terminal1', target_orders)
+        self.tracker.update_target_orders('Terminal2', target_orders)
+        self.assertTrue(self.tracker.save_state())
+        serialized = self.tracker.get_save_statistics()['fragments_serialized']
+        
+        # Same orders seen again - nothing persisted changes
+        self.tracker.update_target_orders('Terminal1', target_orders)
+        self.assertTrue(self.tracker.save_state())
+        self.assertEqual(self.tracker.get_save_statistics()['skipped_saves'], 1)
+        
+        self.tracker.increment_orphan_check('Terminal2', 789)
+        self.assertTrue(self.tracker.save_state())
+        stats = self.tracker.get_save_statistics()
+        self.assertEqual(stats['saves'], 2)
+        self.assertEqual(stats['fragments_serialized'], serialized + 1)
+        
+        with open(self.state_file, 'r') as f:
+            self.assertEqual(json.load(f)['orphan_checks'], {'Terminal2': {'789': 1}})
+    
+    def test_failed_save_keeps_previous_file(self):
+        """Test that an interrupted save leaves the previous state file intact"""
+        self.tracker.increment_orphan_check('Terminal1', 999)
+        self.assertTrue(self.tracker.save_state())
+        
+        self.tracker.increment_orphan_check('Terminal1', 999)
+        with patch('order_tracker.os.replace', side_effect=OSError("disk full")):
+            self.assertFalse(self.tracker.save_state())
+        os.remove(self.state_file + '.tmp')
+        
+        with open(self.state_file, 'r') as f:
+            self.assertEqual(json.load(f)['orphan_checks'], {'Terminal1': {'999': 1}})
+
+class TestTrackerJournal(unittest.TestCase):
+    """Test the tracker event journal"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.temp_dir, 'test_state.json')
+        self.journal_file = self.state_file + '.journal'
+        self.tracker = OrderTracker(state_file=self.state_file, journal=True, compact_every_events=5)
+        self.target_orders = [{
+            'ticket': 789, 'magic': 123, 'symbol': 'EURUSD', 'type_name': 'BUY',
+            'volume_initial': 1.0, 'price_open': 1.1234, 'sl': 1.1200, 'tp': 1.1300,
+            'time_setup': 1640995200, 'time_expiration': 0
+        }]
+        # Initial snapshot
+        self.assertTrue(self.tracker.save_state())
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_changes_appended_and_replayed(self):
+        """Test that saves append events and a new tracker replays them over the snapshot"""
+        with open(self.state_file, 'r') as f:
+            snapshot = f.read()
+        
+        self.tracker.update_target_orders('Terminal1', self.target_orders)
+        self.tracker.increment_orphan_check('Terminal1', 789)
+        self.assertTrue(self.tracker.save_state())
+        
+        # Same orders seen again - nothing to append
+        self.tracker.update_target_orders('Terminal1', self.target_orders)
+        self.assertTrue(self.tracker.save_state())
+        
+        stats = self.tracker.get_save_statistics()
+        self.assertEqual(stats['events_written'], 2)
+        self.assertEqual(stats['skipped_saves'], 1)
+        with open(self.state_file, 'r') as f:
+            self.assertEqual(f.read(), snapshot)
+        
+        new_tracker = OrderTracker(state_file=self.state_file, journal=True)
+        self.assertEqual(new_tracker.state['target_orders'], self.tracker.state['target_orders'])
+        self.assertEqual(new_tracker.get_orphan_check_count('Terminal1', 789), 1)
+    
+    def test_compaction_and_stale_journal(self):
+        """Test that compaction truncates the journal and events already in the snapshot are skipped"""
+        for _ in range(5):
+            self.tracker.increment_orphan_check('Terminal1', 789)
+            self.assertTrue(self.tracker.save_state())
+        
+        self.assertEqual(self.tracker.get_save_statistics()['compactions'], 2)
+        self.assertEqual(os.path.getsize(self.journal_file), 0)
+        
+        # Simulate a crash between writing the snapshot and truncating the journal, with a torn last line
+        with open(self.journal_file, 'w') as f:
+            f.write(json.dumps({'seq': 1, 'op': 'remove', 'section': 'orphan_checks',
+                                'terminal': 'Terminal1', 'ticket': '789', 'value': None}) + "\n")
+            f.write('{"seq": 99, "op": "ups')
+        
+        new_tracker = OrderTracker(state_file=self.state_file, journal=True)
+        self.assertEqual(new_tracker.get_orphan_check_count('Terminal1', 789), 5)
+
+class TestStateWriter(unittest.TestCase):
+    """Test the background state writer"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.temp_dir, 'test_state.json')
+        self.tracker = OrderTracker(state_file=self.state_file, journal=True)
+        self.writer = StateWriter(self.tracker, debounce_seconds=60)
+        self.assertTrue(self.writer.request_save())  # Initial snapshot
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        self.writer.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_burst_is_coalesced_into_one_flush(self):
+        """Test that saves queued within the debounce window are written together on flush"""
+        for ticket in (101, 102, 103):
+            self.tracker.increment_orphan_check('Terminal1', ticket)
+            self.assertTrue(self.writer.request_save())
+        self.assertFalse(os.path.exists(self.state_file))
+        
+        self.assertTrue(self.writer.flush(timeout=10))
+        stats = self.writer.get_statistics()
+        self.assertEqual(stats['flushes'], 1)
+        # Initial snapshot plus one append for the three journal saves
+        self.assertEqual(stats['jobs_coalesced'], 2)
+        self.assertEqual(stats['queue_depth'], 0)
+        
+        self.tracker.increment_orphan_check('Terminal1', 104)
+        self.writer.stop()
+        new_tracker = OrderTracker(state_file=self.state_file, journal=True)
+        self.assertEqual(len(new_tracker.state['orphan_checks']['Terminal1']), 4)
+    
+    def test_failed_write_is_retried(self):
+        """Test that changes from a failed background write go out with the next save"""
+        self.assertTrue(self.writer.flush(timeout=10))
+        self.tracker.increment_orphan_check('Terminal1', 101)
+        self.assertTrue(self.writer.request_save())
+        with patch.object(self.tracker.journal, 'append', side_effect=OSError("disk full")):
+            self.assertTrue(self.writer.flush(timeout=10))
+        self.assertEqual(self.writer.get_statistics()['failed_flushes'], 1)
+        
+        self.assertTrue(self.writer.request_save())
+        self.assertTrue(self.writer.flush(timeout=10))
+        new_tracker = OrderTracker(state_file=self.state_file, journal=True)
+        self.assertEqual(new_tracker.get_orphan_check_count('Terminal1', 101), 1)
+
+class TestRecords(unittest.TestCase):
+    """Test the slotted order and position records"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.order = OrderRecord.from_mt5(TradeOrder(
+            ticket=123, time_setup=1640995200, time_expiration=0, type=2, type_time=0, state=1,
+            volume_initial=1.0, volume_current=1.0, price_open=1.1234, sl=1.12, tp=0.0,
+            symbol='EURUSD', comment='', magic=0, position_id=0
+        ))
+        self.position = PositionRecord.from_mt5(TradePosition(
+            ticket=456, time=1640995200, time_update=1640995200, type=1, volume=0.5, price_open=1.3,
+            price_current=1.31, sl=0.0, tp=0.0, symbol='GBPUSD', comment='', magic=123, identifier=456,
+            profit=-5.0, swap=0.0
+        ))
+    
+    def test_dictionary_access(self):
+        """Test that records read like the dictionaries they replace"""
+        self.assertEqual(self.order['ticket'], 123)
+        self.assertEqual(self.order['type_name'], 'BUY_LIMIT')
+        self.assertIsNone(self.order['time_expiration'])
+        self.assertEqual(self.position.get('type_name'), 'SELL')
+        self.assertEqual(self.position.get('missing', 0), 0)
+        with self.assertRaises(KeyError):
+            self.order['missing']
+        
+        # Fields absent from the source dictionary behave like missing keys
+        partial = OrderRecord.from_mapping({'ticket': 1, 'symbol': 'EURUSD'})
+        self.assertNotIn('sl', partial)
+        self.assertEqual(partial.get('sl', 0), 0)
+        self.assertEqual(partial.to_dict(), {'ticket': 1, 'symbol': 'EURUSD'})
+        self.assertFalse(hasattr(partial, '__dict__'))
+        
+        self.assertEqual(pickle.loads(pickle.dumps(self.order)), self.order)
+    
+    def test_tracker_ignores_market_fields(self):
+        """Test that tracked positions are not re-saved when only profit and price move"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            state_file = os.path.join(temp_dir, 'state.json')
+            tracker = OrderTracker(state_file=state_file)
+            tracker.update_target_positions('Terminal1', [self.position])
+            self.assertTrue(tracker.save_state())
+            
+            moved = PositionRecord.from_mapping(dict(self.position.to_dict(), price_current=1.35, profit=-50.0))
+            tracker.update_target_positions('Terminal1', [moved])
+            self.assertTrue(tracker.save_state())
+            self.assertEqual(tracker.get_save_statistics()['skipped_saves'], 1)
+            
+            with open(state_file) as f:
+                saved = json.load(f)['target_positions']['Terminal1']['456']
+            self.assertEqual(set(saved), set(PositionRecord.STATE_FIELDS))
+            self.assertIsInstance(OrderTracker(state_file=state_file).state['target_positions']['Terminal1'][456],
+                                  PositionRecord)
+        finally:
+            shutil.rmtree(temp_dir)
+
+class TestSQLiteTrackerStore(unittest.TestCase):
+    """Test the SQLite tracker backend"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.temp_dir, 'test_state.db')
+        self.tracker = OrderTracker(state_file=self.db_file, backend='sqlite')
+        self.target_orders = [
+            {
+                'ticket': 789, 'magic': 123, 'symbol': 'EURUSD', 'type_name': 'BUY',
+                'volume_initial': 1.0, 'price_open': 1.1234, 'sl': 1.1200, 'tp': 1.1300,
+                'time_setup': 1640995200, 'time_expiration': 0
+            },
+            {
+                'ticket': 790, 'magic': 456, 'symbol': 'GBPUSD', 'type_name': 'SELL_LIMIT',
+                'volume_initial': 0.5, 'price_open': 1.3456, 'sl': 1.3500, 'tp': 1.3400,
+                'time_setup': 1640995300, 'time_expiration': 0
+            }
+        ]
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        self.tracker.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_state_persistence(self):
+        """Test that state saved to the database is loaded by a new tracker"""
+        self.tracker.update_target_orders('Terminal1', self.target_orders)
+        self.tracker.increment_orphan_check('Terminal1', 999)
+        self.assertTrue(self.tracker.save_state())
+        self.tracker.close()
+        
+        new_tracker = OrderTracker(state_file=self.db_file, backend='sqlite')
+        try:
+            self.assertEqual(new_tracker.state['target_orders'], self.tracker.state['target_orders'])
+            self.assertEqual(new_tracker.get_orphan_check_count('Terminal1', 999), 1)
+            self.assertEqual(new_tracker.get_save_statistics()['backend'], 'sqlite')
+        finally:
+            new_tracker.close()
+    
+    def test_lookup_by_magic_matches_json_backend(self):
+        """Test that the indexed lookup returns the same records as the in-memory lookup"""
+        json_tracker = OrderTracker(state_file=os.path.join(self.temp_dir, 'test_state.json'))
+        orders = [dict(order, time_setup=datetime(2024, 1, 1, 12, 30)) for order in self.target_orders]
+        for tracker in (self.tracker, json_tracker):
+            tracker.update_target_orders('Terminal1', orders)
+            self.assertTrue(tracker.save_state())
+        
+        sqlite_matches = self.tracker.get_matching_target_orders(456, 'Terminal1')
+        json_matches = json_tracker.get_matching_target_orders(456, 'Terminal1')
+        self.assertEqual(sqlite_matches, json_matches)
+        self.assertIsInstance(sqlite_matches[0], OrderRecord)
+        self.assertEqual(sqlite_matches[0]['time_setup'], datetime(2024, 1, 1, 12, 30))
+    
+    def test_lookup_by_magic_and_commit_per_save(self):
+        """Test indexed magic lookups and that other readers only see committed cycles"""
+        self.tracker.update_target_orders('Terminal1', self.target_orders)
+        
+        matches = self.tracker.get_matching_target_orders(456, 'Terminal1')
+        self.assertEqual([order['ticket'] for order in matches], [790])
+        self.assertEqual(self.tracker.get_matching_target_orders(456, 'Terminal2'), [])
+        
+        reader = sqlite3.connect(self.db_file)
+        try:
+            count = "SELECT COUNT(*) FROM target_orders WHERE terminal = 'Terminal1'"
+            self.assertEqual(reader.execute(count).fetchall(), [(0,)])
+            self.assertTrue(self.tracker.save_state())
+            self.assertEqual(reader.execute(count).fetchall(), [(2,)])
+            
+            plan = reader.execute(
+                "EXPLAIN QUERY PLAN SELECT data FROM target_orders WHERE terminal = 'Terminal1' AND magic = 456"
+            ).fetchall()
+            self.assertIn('idx_target_orders_magic', str(plan))
+        finally:
+            reader.close()
 
 class TestConfiguration(unittest.TestCase):
     """Test configuration loading and validation"""
@@ -349,7 +668,7 @@ class TestMT5Connector(unittest.TestCase):
         result = self.connector.connect(terminal_config, 'Test')
         self.assertTrue(result)
         
-        mock_mt5.initialize.assert_called_once()
+        mock_mt5.initialize.assert_called_once_with(path=r'C:\test\path.exe', timeout=10000)
         mock_mt5.login.assert_called_once_with(123456, 'test', 'test-server')
     
     @patch('mt5_connector.mt5')
@@ -399,6 +718,1113 @@ class TestMT5Connector(unittest.TestCase):
         self.assertEqual(orders[0]['ticket'], 123456)
         self.assertEqual(orders[0]['symbol'], 'EURUSD')
         self.assertEqual(orders[0]['type_name'], 'BUY_LIMIT')
+    
+    @patch('mt5_connector.mt5')
+    def test_capture_snapshot(self, mock_mt5):
+        """Test capturing orders, positions and account state in one session"""
+        self.connector.is_connected = True
+        self.connector.current_terminal = 'Source'
+        
+        mock_mt5.orders_get.return_value = [
+            Mock(ticket=1, symbol='EURUSD', type=2, state=1, volume_initial=1.0, volume_current=1.0,
+                 price_open=1.1, sl=0.0, tp=0.0, magic=0, comment='', position_id=0,
+                 time_setup=1640995200, time_expiration=0)
+        ]
+        mock_mt5.positions_get.return_value = []
+        
+        snapshot = self.connector.capture_snapshot()
+        self.assertEqual(snapshot.order_count, 1)
+        self.assertEqual(snapshot.position_count, 0)
+        self.assertEqual(snapshot.terminal_name, 'Source')
+        self.assertIsNotNone(snapshot.account_info)
+        mock_mt5.orders_get.assert_called_once()
+        mock_mt5.positions_get.assert_called_once()
+
+class TestSymbolInfoCache(unittest.TestCase):
+    """Test symbol metadata caching"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 0.0
+        self.cache = SymbolInfoCache(ttl_seconds=10, negative_ttl_seconds=2, clock=lambda: self.now)
+    
+    def test_hit_and_expiry(self):
+        """Test cache hits within the TTL and misses after it"""
+        self.assertEqual(self.cache.get('EURUSD'), (False, None))
+        self.cache.put('EURUSD', 'info')
+        self.assertEqual(self.cache.get('EURUSD'), (True, 'info'))
+        
+        self.now = 11.0
+        self.assertEqual(self.cache.get('EURUSD'), (False, None))
+        
+        stats = self.cache.get_statistics()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['expired'], 1)
+    
+    def test_negative_caching(self):
+        """Test that missing symbols are cached with their own TTL"""
+        self.cache.put('MISSING', None)
+        self.assertEqual(self.cache.get('MISSING'), (True, None))
+        self.assertEqual(self.cache.get_statistics()['negative_hits'], 1)
+        
+        self.now = 3.0
+        self.assertEqual(self.cache.get('MISSING'), (False, None))
+    
+    @patch('mt5_connector.mt5')
+    def test_connector_uses_cache(self, mock_mt5):
+        """Test that placement-path lookups hit MT5 only once per symbol"""
+        connector = MT5Connector()
+        connector.is_connected = True
+        connector.current_terminal = 'Test'
+        mock_mt5.symbol_info.return_value = Mock(name='EURUSD', digits=5, point=0.00001, spread=10,
+                                                  volume_min=0.01, volume_max=100.0, volume_step=0.01,
+                                                  trade_mode=4, filling_mode=2)
+        
+        connector.get_symbol_info('EURUSD')
+        connector.get_symbol_filling_mode('EURUSD')
+        connector.get_symbol_filling_mode('EURUSD')
+        
+        mock_mt5.symbol_info.assert_called_once_with('EURUSD')
+        self.assertEqual(connector.get_symbol_cache_statistics()['Test']['hits'], 2)
+
+class TestSessionManager(unittest.TestCase):
+    """Test persistent terminal sessions"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.connector = Mock()
+        self.connector.connect.return_value = True
+        self.connector.check_connection.return_value = True
+        self.sessions = SessionManager(self.connector)
+    
+    def test_session_reused_across_cycles(self):
+        """Test that a live session is reused instead of reconnecting"""
+        for _ in range(3):
+            self.assertTrue(self.sessions.acquire({}, 'Source'))
+            self.sessions.release('Source')
+        
+        self.assertEqual(self.connector.connect.call_count, 1)
+        self.connector.disconnect.assert_not_called()
+        stats = self.sessions.get_statistics()['Source']
+        self.assertEqual(stats['reused'], 2)
+        self.assertEqual(stats['current_cycles'], 3)
+    
+    def test_failed_probe_reconnects(self):
+        """Test that a failed liveness probe re-establishes the session"""
+        self.sessions.acquire({}, 'Source')
+        self.connector.check_connection.return_value = False
+        self.assertTrue(self.sessions.acquire({}, 'Source'))
+        
+        self.assertEqual(self.connector.connect.call_count, 2)
+        self.assertEqual(self.sessions.get_statistics()['Source']['probe_failures'], 1)
+    
+    def test_switching_terminals_closes_previous_session(self):
+        """Test that only one session is open at a time"""
+        self.sessions.acquire({}, 'Source')
+        self.sessions.acquire({}, 'Target')
+        
+        self.connector.disconnect.assert_called_once()
+        self.assertEqual(self.sessions.active_terminal, 'Target')
+
+def build_fake_mt5_module(name):
+    """Build a minimal in-process stand-in for the MetaTrader5 module"""
+    import types
+    from types import SimpleNamespace
+    
+    module = types.ModuleType(name)
+    module.TRADE_ACTION_PENDING = 5
+    module.TRADE_ACTION_MODIFY = 7
+    module.TRADE_ACTION_REMOVE = 8
+    module.ORDER_TIME_GTC = 0
+    module.ORDER_TIME_SPECIFIED = 2
+    module.ORDER_FILLING_FOK = 0
+    module.ORDER_FILLING_IOC = 1
+    module.ORDER_FILLING_RETURN = 2
+    module.TRADE_RETCODE_DONE = 10009
+    module.initialize = lambda *args, **kwargs: True
+    module.login = lambda *args, **kwargs: True
+    module.shutdown = lambda: True
+    module.last_error = lambda: (0, 'OK')
+    module.account_info = lambda: SimpleNamespace(login=654321, balance=1000.0, server='test-server')
+    module.orders_get = lambda *args, **kwargs: []
+    module.positions_get = lambda *args, **kwargs: []
+    module.symbol_info = lambda symbol: SimpleNamespace(
+        name=symbol, digits=5, point=0.00001, spread=10, volume_min=0.01, volume_max=100.0,
+        volume_step=0.01, trade_mode=4, filling_mode=2)
+    module.order_send = lambda request: SimpleNamespace(retcode=10009, order=1000 + request.get('magic', 0), comment='Done')
+    return module
+
+class TestTerminalWorkerPool(unittest.TestCase):
+    """Test parallel target processing with one worker process per terminal"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        import multiprocessing
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest("fork start method required to share the fake MT5 module")
+        
+        sys.modules['fake_worker_mt5'] = build_fake_mt5_module('fake_worker_mt5')
+        self.temp_dir = tempfile.mkdtemp()
+        
+        terminal = {
+            'MT5_ACCOUNT': 654321,
+            'MT5_PASSWORD': 'test',
+            'MT5_SERVER': 'test-server',
+            'lot_multiplier': 1.0,
+            'allowed_order_types': ['BUY_LIMIT'],
+            'symbol_mapping': {}
+        }
+        self.config = {
+            'SOURCE_TERMINAL': {},
+            'TARGET_TERMINALS': {'Test1': dict(terminal), 'Test2': dict(terminal)},
+            'LOGGING_CONFIG': {'level': 'ERROR'},
+            'PERFORMANCE_CONFIG': {'parallel_terminals': True, 'worker_timeout_seconds': 30,
+                                   'placement_journal_dir': self.temp_dir}
+        }
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        sys.modules.pop('fake_worker_mt5', None)
+        shutil.rmtree(self.temp_dir)
+    
+    def test_process_cycle(self):
+        """Test that every worker processes the broadcast snapshot"""
+        from terminal_workers import TerminalWorkerPool
+        
+        source_order = {
+            'ticket': 42, 'symbol': 'EURUSD', 'type': 2, 'type_name': 'BUY_LIMIT',
+            'volume_initial': 1.0, 'price_open': 1.1, 'sl': 0.0, 'tp': 0.0,
+            'time_setup': datetime(2024, 1, 1), 'time_expiration': None, 'magic': 0
+        }
+        snapshot = SourceSnapshot([source_order], [])
+        
+        pool = TerminalWorkerPool(self.config, mt5_module='fake_worker_mt5', start_method='fork')
+        self.assertTrue(pool.start())
+        try:
+            results = pool.process_cycle(snapshot, {})
+        finally:
+            pool.stop()
+        
+        self.assertEqual(set(results.keys()), {'Test1', 'Test2'})
+        for result in results.values():
+            self.assertTrue(result['success'], result['error'])
+            self.assertEqual(result['stats']['orders_copied'], 1)
+            self.assertIn('target_orders', result['state'])
+    
+    def test_hung_call_in_worker_times_out(self):
+        """Test that a worker's hung MT5 call fails its terminal after the call deadline"""
+        from terminal_workers import TerminalWorkerPool
+        
+        sys.modules['fake_worker_mt5'].orders_get = lambda *args, **kwargs: time.sleep(10) or []
+        self.config['TARGET_TERMINALS'] = {'Test1': self.config['TARGET_TERMINALS']['Test1']}
+        self.config['SYSTEM_CONFIG'] = {'fetch_timeout': 0.5}
+        
+        pool = TerminalWorkerPool(self.config, mt5_module='fake_worker_mt5', start_method='fork')
+        self.assertTrue(pool.start())
+        started = time.monotonic()
+        try:
+            result = pool.process_cycle(SourceSnapshot([], []), {})['Test1']
+        finally:
+            pool.stop()
+        
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(result['success'])
+        self.assertFalse(result['reachable'])
+        self.assertEqual(result['call_supervisor']['timeouts'], 1)
+        self.assertEqual(result['call_supervisor']['recent_timeouts'][0]['call'], 'orders_get')
+        self.assertEqual(result['call_supervisor']['recent_timeouts'][0]['terminal'], 'Test1')
+    
+    def test_workers_keep_placement_journal(self):
+        """Test that workers journal placements next to the main process's tracker state"""
+        from terminal_workers import TerminalWorkerPool
+        
+        self.config['PERFORMANCE_CONFIG'] = {'parallel_terminals': True, 'worker_timeout_seconds': 30}
+        self.config['SYSTEM_CONFIG'] = {'supervise_mt5_calls': False}
+        # A relative state file, like the default one
+        state_file = os.path.relpath(os.path.join(self.temp_dir, 'state.json'))
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=state_file))
+        journal_dir = manager.worker_pool.config['PERFORMANCE_CONFIG']['placement_journal_dir']
+        self.assertEqual(journal_dir, os.path.abspath(os.path.join(self.temp_dir, 'placement_journal')))
+        
+        source_order = {
+            'ticket': 42, 'symbol': 'EURUSD', 'type': 2, 'type_name': 'BUY_LIMIT',
+            'volume_initial': 1.0, 'price_open': 1.1, 'sl': 0.0, 'tp': 0.0,
+            'time_setup': datetime(2024, 1, 1), 'time_expiration': None, 'magic': 0
+        }
+        pool = TerminalWorkerPool(manager.worker_pool.config, mt5_module='fake_worker_mt5', start_method='fork')
+        self.assertTrue(pool.start())
+        try:
+            results = pool.process_cycle(SourceSnapshot([source_order], []), {})
+        finally:
+            pool.stop()
+        
+        self.assertTrue(all(result['success'] for result in results.values()))
+        self.assertEqual(sorted(os.listdir(journal_dir)), ['Test1.jsonl', 'Test2.jsonl'])
+
+class TestRecordBasedTradeRequests(unittest.TestCase):
+    """Test trade requests built from already-fetched records"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.connector = MT5Connector(symbol_cache_ttl=0)
+        self.connector.is_connected = True
+        self.order = {
+            'ticket': 789, 'symbol': 'EURUSD', 'volume_initial': 1.0, 'price_open': 1.1,
+            'sl': 0.0, 'tp': 0.0, 'type_time': 0, 'time_expiration': None
+        }
+    
+    @patch('mt5_connector.mt5')
+    def test_modify_order_with_record_skips_lookup(self, mock_mt5):
+        """Test that a supplied order record avoids orders_get"""
+        mock_mt5.TRADE_RETCODE_DONE = 10009
+        mock_mt5.order_send.return_value = Mock(retcode=10009, comment='Done')
+        
+        success, _ = self.connector.modify_order(789, {'price': 1.2}, order=self.order)
+        
+        self.assertTrue(success)
+        mock_mt5.orders_get.assert_not_called()
+        self.assertEqual(mock_mt5.order_send.call_args[0][0]['price'], 1.2)
+    
+    @patch('mt5_connector.mt5')
+    def test_stale_record_is_refreshed(self, mock_mt5):
+        """Test that a stale-record retcode triggers one refresh and retry"""
+        mock_mt5.TRADE_RETCODE_DONE = 10009
+        mock_mt5.order_send.side_effect = [Mock(retcode=10013, comment='Invalid request'),
+                                           Mock(retcode=10009, comment='Done')]
+        mock_mt5.orders_get.return_value = [
+            Mock(ticket=789, symbol='EURUSD', type=2, type_time=0, state=1, volume_initial=1.0,
+                 volume_current=1.0, price_open=1.1, sl=0.0, tp=0.0, magic=0, comment='',
+                 position_id=0, time_setup=1640995200, time_expiration=0)
+        ]
+        
+        success, _ = self.connector.cancel_order(789, order=self.order)
+        
+        self.assertTrue(success)
+        mock_mt5.orders_get.assert_called_once_with(ticket=789)
+        self.assertEqual(mock_mt5.order_send.call_count, 2)
+    
+    @patch('mt5_connector.mt5')
+    def test_close_position_without_record_queries_broker(self, mock_mt5):
+        """Test that callers without a record still get a lookup"""
+        mock_mt5.positions_get.return_value = None
+        
+        success, message = self.connector.close_position(555)
+        
+        self.assertFalse(success)
+        self.assertIn('not found', message)
+        mock_mt5.order_send.assert_not_called()
+
+class TestReconciliationPlanner(unittest.TestCase):
+    """Test single-pass reconciliation planning"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.planner = ReconciliationPlanner()
+        self.terminal_config = {
+            'lot_multiplier': 1.0,
+            'min_lot_size': 0.01,
+            'max_lot_size': 100.0,
+            'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT'],
+            'symbol_mapping': {'EURUSD': 'EURUSD.m'},
+            'orphan_management': {
+                'kill_orphaned_orders': True,
+                'kill_orphaned_positions': True,
+                'max_orphan_checks': 2
+            }
+        }
+    
+    def make_order(self, ticket, magic=0, type_name='BUY_LIMIT', price=1.1):
+        """Build an order record"""
+        return {
+            'ticket': ticket, 'magic': magic, 'symbol': 'EURUSD', 'type': 2, 'type_name': type_name,
+            'volume_initial': 1.0, 'price_open': price, 'sl': 0.0, 'tp': 0.0, 'time_expiration': None
+        }
+    
+    def test_plan_actions(self):
+        """Test that each kind of difference produces the matching action"""
+        source_orders = [self.make_order(1), self.make_order(2, price=1.2), self.make_order(3, type_name='BUY_STOP')]
+        source_positions = [{'ticket': 10, 'magic': 0, 'sl': 1.0, 'tp': 2.0}]
+        target_orders = [self.make_order(101, magic=2, price=1.1), self.make_order(102, magic=99)]
+        target_positions = [{'ticket': 110, 'magic': 10, 'sl': 0.0, 'tp': 2.0},
+                            {'ticket': 111, 'magic': 98, 'sl': 0.0, 'tp': 0.0}]
+        
+        plan = self.planner.plan('Test1', self.terminal_config, source_orders, source_positions,
+                                 target_orders, target_positions,
+                                 orphan_check_count=lambda ticket: 1 if ticket == 102 else 0)
+        
+        creates = plan.get(ACTION_CREATE)
+        self.assertEqual([action.ticket for action in creates], [1])
+        self.assertEqual(creates[0].target_symbol, 'EURUSD.m')
+        self.assertEqual([action.ticket for action in plan.get(ACTION_MODIFY)], [101])
+        self.assertEqual([action.ticket for action in plan.get(ACTION_CANCEL)], [102])
+        self.assertEqual([action.ticket for action in plan.get(ACTION_SLTP)], [110])
+        # Orphaned position has not reached max_orphan_checks yet
+        self.assertEqual(plan.get(ACTION_CLOSE), [])
+        self.assertEqual([p['ticket'] for p in plan.orphaned_positions], [111])
+        self.assertEqual(plan.active_tickets, {101, 102, 110, 111})
+    
+    def test_max_pending_orders_blocks_creates(self):
+        """Test that the max_pending_orders constraint holds back new orders"""
+        self.terminal_config['max_pending_orders'] = {'enabled': True, 'max_orders': 1}
+        source_orders = [self.make_order(1), self.make_order(2)]
+        
+        plan = self.planner.plan('Test1', self.terminal_config, source_orders, [], [], [])
+        
+        self.assertEqual(len(plan), 0)
+        self.assertEqual(plan.creates_blocked, 2)
+    
+    def test_unmapped_symbols_counted_when_filtering(self):
+        """Test that orders skipped for a missing mapping are counted and warned about once"""
+        self.terminal_config['filter_target_records'] = True
+        source_orders = [self.make_order(1), dict(self.make_order(2), symbol='GBPUSD')]
+        
+        with self.assertLogs(self.planner.logger, 'WARNING') as logs:
+            for _ in range(2):
+                plan = self.planner.plan('Test1', self.terminal_config, source_orders, [], [], [])
+                self.assertEqual([action.ticket for action in plan.get(ACTION_CREATE)], [1])
+                self.assertEqual(plan.summary()['creates_unmapped'], 1)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('GBPUSD', logs.output[0])
+    
+    def test_orphans_ignored_when_killing_disabled(self):
+        """Test that orphans are not tracked when the policy is disabled"""
+        self.terminal_config['orphan_management'] = {}
+        
+        plan = self.planner.plan('Test1', self.terminal_config, [], [],
+                                 [self.make_order(101, magic=5)], [{'ticket': 110, 'magic': 6, 'sl': 0.0, 'tp': 0.0}])
+        
+        self.assertEqual(len(plan), 0)
+        self.assertEqual(plan.orphaned_orders, [])
+        self.assertEqual(plan.orphaned_positions, [])
+    
+    @unittest.skipUnless(numpy_available(), "NumPy is not installed")
+    def test_vectorized_plan_matches_per_pair_plan(self):
+        """Test that columnar comparison finds the same modifications as the per-pair path"""
+        self.terminal_config['lot_multiplier'] = 0.5
+        source_orders = [self.make_order(ticket, price=1.0 + ticket / 100) for ticket in range(1, 9)]
+        source_orders[5]['time_expiration'] = datetime(2030, 1, 1)
+        target_orders = []
+        for source_order in source_orders:
+            target_order = dict(self.make_order(source_order['ticket'] + 100, magic=source_order['ticket'],
+                                                price=source_order['price_open']), volume_initial=0.5)
+            target_orders.append(target_order)
+        target_orders[1]['price_open'] += 0.001   # Price moved
+        target_orders[2]['volume_initial'] = 1.0  # Lot not scaled
+        target_orders[3]['sl'] = 1.0              # SL removed on the source
+        target_orders[4]['tp'] = 1.0              # TP removed on the source
+        target_orders.append(self.make_order(200, magic=99))  # Orphan
+        
+        vectorized = ReconciliationPlanner(vectorize_min_orders=1)
+        plans = [planner.plan('Test1', self.terminal_config, source_orders, [], target_orders, [])
+                 for planner in (self.planner, vectorized)]
+        
+        for plan in plans:
+            self.assertEqual([action.ticket for action in plan.get(ACTION_MODIFY)], [102, 103, 104, 105, 106])
+            self.assertEqual([order['ticket'] for order in plan.orphaned_orders], [200])
+        
+        # Source columns are reused for the next terminal
+        source_columns = vectorized._source_columns[1]
+        vectorized.plan('Test2', self.terminal_config, source_orders, [], target_orders, [])
+        self.assertIs(vectorized._source_columns[1], source_columns)
+
+class TestTerminalFingerprints(unittest.TestCase):
+    """Test skipping of unchanged terminals"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.fingerprints = TerminalFingerprints(full_check_interval_seconds=60, clock=lambda: self.now)
+        self.positions = [{'ticket': 10, 'magic': 0, 'symbol': 'EURUSD', 'type': 0, 'volume': 1.0,
+                           'sl': 1.0, 'tp': 2.0, 'price_current': 1.5}]
+    
+    def test_fingerprint_ignores_market_fields(self):
+        """Test that only reconciliation-relevant fields change the fingerprint"""
+        base = compute_fingerprint([], self.positions)
+        moved = [dict(self.positions[0], price_current=1.6)]
+        modified = [dict(self.positions[0], sl=1.1)]
+        
+        self.assertEqual(base, compute_fingerprint([], moved))
+        self.assertNotEqual(base, compute_fingerprint([], modified))
+    
+    def test_skip_until_full_check_due(self):
+        """Test that a recorded terminal is skipped until the source changes or the interval passes"""
+        self.assertFalse(self.fingerprints.is_unchanged('Test1', 'abc'))
+        
+        self.fingerprints.record('Test1', 'abc', [], self.positions)
+        self.assertTrue(self.fingerprints.is_unchanged('Test1', 'abc'))
+        self.assertFalse(self.fingerprints.is_unchanged('Test1', 'def'))
+        self.assertTrue(self.fingerprints.matches_totals('Test1', 0, 1))
+        self.assertFalse(self.fingerprints.matches_totals('Test1', 1, 1))
+        
+        self.now += 60
+        self.assertFalse(self.fingerprints.is_unchanged('Test1', 'abc'))
+        self.assertEqual(self.fingerprints.get_statistics()['forced_checks'], 1)
+    
+    @patch('order_manager.MT5Connector')
+    def test_idle_cycle_skips_target_scan(self, mock_connector_class):
+        """Test that an idle second cycle only probes the target totals"""
+        mock_connector = Mock()
+        mock_connector.connect.return_value = True
+        mock_connector.get_pending_orders.return_value = []
+        mock_connector.get_positions.return_value = []
+        mock_connector.get_totals.return_value = (0, 0)
+        mock_connector.capture_snapshot.side_effect = lambda: SourceSnapshot([], [])
+        mock_connector.get_symbol_cache_statistics.return_value = {}
+        mock_connector_class.return_value = mock_connector
+        
+        config = {
+            'SOURCE_TERMINAL': {},
+            'TARGET_TERMINALS': {'Test1': {}},
+            'PERFORMANCE_CONFIG': {'skip_unchanged_terminals': True}
+        }
+        manager = OrderManager(config, tracker=OrderTracker(state_file=None))
+        
+        self.assertTrue(manager.process_all_terminals())
+        self.assertTrue(manager.process_all_terminals())
+        
+        self.assertEqual(mock_connector.get_pending_orders.call_count, 1)
+        mock_connector.get_totals.assert_called_once()
+        self.assertEqual(manager.stats['terminals_skipped'], 1)
+
+class TestSimulatedBroker(unittest.TestCase):
+    """Test full cycles against the in-memory simulated broker"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.sleeps = []
+        self.temp_dir = tempfile.mkdtemp()
+        self.broker = SimulatedBroker(latency={'order_send': 0.01}, sleep=self.sleeps.append)
+        self.broker.add_account(1001, 'source')
+        self.broker.add_account(2001, 'target')
+        self.broker.add_symbol('EURUSD')
+        self.source_ticket = self.broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT,
+                                                           0.5, 1.1, sl=1.09)
+        self.config = {
+            'SOURCE_TERMINAL': {'MT5_ACCOUNT': 1001, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+            'TARGET_TERMINALS': {
+                'Target1': {
+                    'MT5_ACCOUNT': 2001, 'MT5_PASSWORD': 'target', 'MT5_SERVER': 'Simulated-Server',
+                    'lot_multiplier': 2.0,
+                    'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT']
+                }
+            },
+            'PERFORMANCE_CONFIG': {'placement_journal_dir': self.temp_dir}
+        }
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_cycle_copies_and_updates_orders(self):
+        """Test that copies and modifications reach the simulated target account"""
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        
+        self.assertTrue(manager.process_all_terminals())
+        target_orders = list(self.broker.accounts[2001]['orders'].values())
+        self.assertEqual(len(target_orders), 1)
+        self.assertEqual(target_orders[0]['magic'], self.source_ticket)
+        self.assertEqual(target_orders[0]['volume_initial'], 1.0)
+        self.assertEqual(self.sleeps, [0.01])
+        
+        self.broker.update_pending_order(1001, self.source_ticket, price_open=1.105)
+        self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(target_orders[0]['price_open'], 1.105)
+        self.assertEqual(manager.stats['orders_updated'], 1)
+        self.assertTrue(manager.source_changed)
+        
+        self.assertTrue(manager.process_all_terminals())
+        self.assertFalse(manager.source_changed)
+    
+    def test_copy_cancelled_on_target_recreated(self):
+        """Test that a copy cancelled by hand is re-created in the next cycle while the source is unchanged"""
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.assertTrue(manager.process_all_terminals())
+        self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(manager.stats['terminals_skipped'], 0)
+        
+        self.broker.remove_pending_order(2001, next(iter(self.broker.accounts[2001]['orders'])))
+        self.assertTrue(manager.process_all_terminals())
+        
+        target_orders = list(self.broker.accounts[2001]['orders'].values())
+        self.assertEqual([order['magic'] for order in target_orders], [self.source_ticket])
+        self.assertEqual(manager.stats['orders_copied'], 2)
+        self.assertEqual(manager.fingerprints.get_statistics()['probe_mismatches'], 1)
+        
+        self.assertTrue(manager.process_all_terminals())
+        self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(manager.stats['terminals_skipped'], 1)
+    
+    def test_unreachable_terminal_connected_once_per_cycle(self):
+        """Test that a failed pre-skip probe marks the terminal unreachable without a second connect"""
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.assertTrue(manager.process_all_terminals())
+        self.assertTrue(manager.process_all_terminals())
+        
+        self.broker.accounts[2001]['password'] = 'changed'
+        self.broker.reset_call_counts()
+        self.assertFalse(manager.process_all_terminals())
+        
+        self.assertEqual(self.broker.call_counts['login'], 2)  # Source, then one attempt on the target
+        self.assertEqual(manager.breakers.get_statistics()['Target1']['consecutive_failures'], 1)
+        self.assertNotIn('Target1', manager.fingerprints.entries)
+    
+    def test_filtered_target_retrieval(self):
+        """Test that a filtering target only retrieves copies on mapped symbols"""
+        self.broker.add_symbol('GBPUSD')
+        self.broker.add_symbol('XAUUSD')
+        self.broker.add_pending_order(1001, 'GBPUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 0.5, 1.3)
+        manual_ticket = self.broker.add_pending_order(2001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 1.0, 1.0)
+        ea_ticket = self.broker.add_pending_order(2001, 'XAUUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 1.0, 1900.0,
+                                                  magic=777)
+        self.config['TARGET_TERMINALS']['Target1'].update({
+            'symbol_mapping': {'EURUSD': 'EURUSD'},
+            'filter_target_records': True,
+            'orphan_management': {'kill_orphaned_orders': True, 'max_orphan_checks': 1}
+        })
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        
+        self.assertTrue(manager.process_all_terminals())
+        self.assertTrue(manager.process_all_terminals())
+        
+        # Manual and foreign orders are left alone, the unmapped GBPUSD order is not copied
+        target_orders = self.broker.accounts[2001]['orders']
+        self.assertIn(manual_ticket, target_orders)
+        self.assertIn(ea_ticket, target_orders)
+        self.assertEqual(sorted(order['symbol'] for order in target_orders.values()), ['EURUSD', 'EURUSD', 'XAUUSD'])
+        self.assertEqual(manager.tracker.get_tracked_magics('Target1'), {self.source_ticket})
+        
+        # A copy whose source order is gone is still retrieved and cancelled as an orphan
+        self.broker.remove_pending_order(1001, self.source_ticket)
+        self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(set(target_orders), {manual_ticket, ea_ticket})
+    
+    def test_queued_retcode_rejects_request(self):
+        """Test that a queued retcode is returned by the next order_send"""
+        connector = MT5Connector(symbol_cache_ttl=0, backend=self.broker)
+        self.assertTrue(connector.connect(self.config['TARGET_TERMINALS']['Target1'], 'Target1'))
+        self.broker.queue_retcode(SimulatedBroker.TRADE_RETCODE_REJECT)
+        
+        request = {'symbol': 'EURUSD', 'volume': 0.1, 'type': SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 'price': 1.1}
+        success, _, message = connector.place_order(request)
+        self.assertFalse(success)
+        self.assertIn('10006', message)
+        
+        success, ticket, _ = connector.place_order(request)
+        self.assertTrue(success)
+        self.assertIn(ticket, self.broker.accounts[2001]['orders'])
+        self.assertEqual(self.broker.call_counts['order_send'], 2)
+    
+    def test_fill_keeps_ticket_and_magic(self):
+        """Test that a filled order becomes a position with the same ticket and magic"""
+        ticket = self.broker.add_pending_order(2001, 'EURUSD', SimulatedBroker.ORDER_TYPE_SELL_LIMIT, 1.0, 1.2,
+                                               magic=self.source_ticket)
+        self.broker.fill_order(2001, ticket)
+        
+        position = self.broker.accounts[2001]['positions'][ticket]
+        self.assertEqual(position['magic'], self.source_ticket)
+        self.assertEqual(position['type'], SimulatedBroker.ORDER_TYPE_SELL)
+        self.assertNotIn(ticket, self.broker.accounts[2001]['orders'])
+    
+    def test_filled_copy_not_copied_again(self):
+        """Test that a copy filled on the target is not placed a second time"""
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.assertTrue(manager.process_all_terminals())
+        target_ticket = next(iter(self.broker.accounts[2001]['orders']))
+        self.broker.fill_order(2001, target_ticket)
+        self.broker.reset_call_counts()
+        
+        # The source order stays pending while its copy is a position on the target
+        for _ in range(3):
+            self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(self.broker.accounts[2001]['orders'], {})
+        self.assertEqual(list(self.broker.accounts[2001]['positions']), [target_ticket])
+        self.assertEqual(manager.stats['orders_copied'], 1)
+        self.assertEqual(self.broker.call_counts['order_send'], 0)
+    
+    def test_placement_journal_next_to_tracker_state(self):
+        """Test that a relative journal directory is resolved next to the tracker state file"""
+        self.config['PERFORMANCE_CONFIG'] = {}
+        state_file = os.path.join(self.temp_dir, 'state.json')
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=state_file), backend=self.broker)
+        self.assertEqual(manager.placements.directory, os.path.join(self.temp_dir, 'placement_journal'))
+        
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.assertIsNone(manager.placements)
+    
+    def test_in_flight_placement_recovered_after_restart(self):
+        """Test that an intent without a result is settled from the target instead of sent again"""
+        journal = PlacementJournal(self.temp_dir)
+        journal.record_intent('Target1', self.source_ticket, 'EURUSD')
+        # The crashed process's order_send went through and the copy was filled
+        placed_ticket = self.broker.add_pending_order(2001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 1.0, 1.1,
+                                                      magic=self.source_ticket)
+        self.broker.fill_order(2001, placed_ticket)
+        
+        manager = OrderManager(self.config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.assertTrue(manager.process_all_terminals())
+        
+        self.assertEqual(self.broker.call_counts['order_send'], 0)
+        stats = manager.placements.get_statistics()
+        self.assertEqual(stats['recovered'], 1)
+        self.assertEqual(manager.stats['orders_copied'], 0)
+        self.assertEqual(manager.placements.get('Target1', self.source_ticket)['target_ticket'], placed_ticket)
+
+class TestSourceWatcher(unittest.TestCase):
+    """Test change-driven cycles in watcher mode"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.temp_dir = tempfile.mkdtemp()
+        self.broker = SimulatedBroker()
+        self.broker.add_account(1001, 'source')
+        self.broker.add_account(2001, 'target')
+        self.broker.add_symbol('EURUSD')
+        self.source_ticket = self.broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT,
+                                                           0.5, 1.1, sl=1.09)
+        config = {
+            'SOURCE_TERMINAL': {'MT5_ACCOUNT': 1001, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+            'TARGET_TERMINALS': {
+                'Target1': {'MT5_ACCOUNT': 2001, 'MT5_PASSWORD': 'target', 'MT5_SERVER': 'Simulated-Server',
+                            'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT']}
+            },
+            'PERFORMANCE_CONFIG': {'placement_journal_dir': self.temp_dir}
+        }
+        self.manager = OrderManager(config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.watcher = SourceWatcher(self.manager, full_cycle_interval_seconds=60, clock=lambda: self.now)
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_cycle_runs_only_on_source_change(self):
+        """Test that polls without a source change do not run a cycle until the full cycle is due"""
+        self.assertTrue(self.watcher.step())
+        self.assertEqual(len(self.broker.accounts[2001]['orders']), 1)
+        
+        self.broker.reset_call_counts()
+        self.assertFalse(self.watcher.step())
+        self.assertFalse(self.watcher.step())
+        self.assertEqual(self.broker.call_counts['order_send'], 0)
+        
+        self.broker.update_pending_order(1001, self.source_ticket, sl=1.08)
+        self.assertTrue(self.watcher.step())
+        target_order = next(iter(self.broker.accounts[2001]['orders'].values()))
+        self.assertEqual(target_order['sl'], 1.08)
+        
+        self.now += 60
+        self.assertTrue(self.watcher.step())
+        
+        stats = self.watcher.get_statistics()
+        self.assertEqual(stats['polls'], 5)
+        self.assertEqual(stats['cycles'], 3)
+        self.assertEqual(stats['changes_detected'], 1)
+        self.assertEqual(stats['forced_cycles'], 1)
+    
+    def test_source_session_kept_between_polls(self):
+        """Test that idle polls reuse the source session instead of logging in again"""
+        self.watcher.step()
+        self.broker.reset_call_counts()
+        
+        for _ in range(3):
+            self.watcher.step()
+        
+        self.assertEqual(self.broker.call_counts['login'], 1)  # Back from the target once
+        self.assertEqual(self.broker.call_counts['orders_get'], 3)
+    
+    def test_edit_with_unchanged_counts_detected_next_poll(self):
+        """Test that by default an SL edit that keeps the counts runs a cycle on the next poll"""
+        self.watcher.step()
+        
+        self.broker.update_pending_order(1001, self.source_ticket, sl=1.07)
+        self.now += 0.5
+        self.assertTrue(self.watcher.step())
+        target_order = next(iter(self.broker.accounts[2001]['orders'].values()))
+        self.assertEqual(target_order['sl'], 1.07)
+    
+    def test_counts_polled_between_hash_checks(self):
+        """Test that the full lists are only fetched when the counts move or a hash check is due"""
+        self.watcher.hash_check_interval_seconds = 5
+        self.watcher.step()
+        self.broker.reset_call_counts()
+        
+        self.broker.update_pending_order(1001, self.source_ticket, sl=1.08)
+        self.now += 1
+        self.assertFalse(self.watcher.step())
+        self.assertEqual(self.broker.call_counts['orders_get'], 0)
+        self.assertEqual(self.broker.call_counts['orders_total'], 1)
+        
+        # The modification is found by the next hash check
+        self.now += 4
+        self.assertTrue(self.watcher.step())
+        
+        # A new order changes the counts and is found without waiting for a hash check
+        self.broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_SELL_LIMIT, 0.5, 1.2)
+        self.now += 1
+        self.assertTrue(self.watcher.step())
+        self.assertEqual(len(self.broker.accounts[2001]['orders']), 2)
+        self.assertEqual(self.watcher.get_statistics()['hash_polls'], 3)
+
+class TestDeadlineScheduler(unittest.TestCase):
+    """Test monotonic deadline timing of the main loops"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.scheduler = DeadlineScheduler(clock=lambda: self.now)
+    
+    def test_lateness_and_skipped_ticks(self):
+        """Test that ticks stay on the interval grid and overrun ticks are skipped"""
+        self.now = 1000.25
+        self.assertTrue(self.scheduler.wait_until(1000.0))
+        self.assertEqual(self.scheduler.stats['last_lateness_seconds'], 0.25)
+        
+        # A short cycle keeps the grid, an overrunning one skips to the next deadline still ahead
+        self.assertEqual(self.scheduler.next_deadline(1000.0, 10), 1010.0)
+        self.now = 1035.0
+        self.assertEqual(self.scheduler.next_deadline(1010.0, 10), 1040.0)
+        
+        stats = self.scheduler.get_statistics()
+        self.assertEqual(stats['ticks'], 1)
+        self.assertEqual(stats['skipped_ticks'], 2)
+        self.assertEqual(stats['max_lateness_seconds'], 0.25)
+    
+    def test_stop_interrupts_wait(self):
+        """Test that stop() wakes a waiting loop immediately"""
+        scheduler = DeadlineScheduler()
+        timer = threading.Timer(0.05, scheduler.stop)
+        timer.start()
+        started = time.monotonic()
+        
+        self.assertFalse(scheduler.wait_until(scheduler.clock() + 30))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(scheduler.sleep(30))
+        timer.join()
+    
+    def test_schedule_from_single_time_reading(self):
+        """Test that the next candle-aligned execution is calculated from the given time"""
+        now = datetime(2026, 1, 5, 10, 7, 30)
+        self.assertEqual(calculate_next_execution_time('M5', 60, now), datetime(2026, 1, 5, 10, 11, 0))
+        self.assertEqual(calculate_next_execution_time('H1', 0, now), datetime(2026, 1, 5, 11, 0, 0))
+        self.assertEqual(get_timeframe_seconds('M15'), 900)
+        self.assertEqual(get_timeframe_seconds('H4'), 14400)
+
+class TestAdaptiveCadence(unittest.TestCase):
+    """Test the change- and market-hours-driven iteration delay"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.market_open = True
+        self.cadence = AdaptiveCadence(min_seconds=1, max_seconds=8, backoff_factor=2.0, closed_market_seconds=600,
+                                       market_open=lambda: self.market_open)
+    
+    def test_backoff_and_reset_on_change(self):
+        """Test that quiet iterations back off to the maximum and a change resets the delay"""
+        intervals = [self.cadence.next_interval(changed) for changed in (True, False, False, False, False, True)]
+        self.assertEqual(intervals, [1, 2, 4, 8, 8, 1])
+        self.assertEqual(self.cadence.get_statistics()['backoffs'], 3)
+    
+    def test_closed_market_sleeps_long(self):
+        """Test that the closed market uses the long delay and reopening starts fast"""
+        self.cadence.next_interval(False)
+        self.market_open = False
+        self.assertEqual(self.cadence.next_interval(True), 600)
+        self.market_open = True
+        self.assertEqual(self.cadence.next_interval(False), 1)
+        self.assertEqual(self.cadence.get_statistics()['closed_market_intervals'], 1)
+    
+    def test_market_hours(self):
+        """Test the weekend closing of the forex market"""
+        self.assertTrue(is_market_hours(now=datetime(2026, 1, 7, 3, 0)))     # Wednesday
+        self.assertFalse(is_market_hours(now=datetime(2026, 1, 9, 18, 0)))    # Friday evening
+        self.assertFalse(is_market_hours(now=datetime(2026, 1, 10, 10, 0)))   # Saturday
+        self.assertTrue(is_market_hours(now=datetime(2026, 1, 11, 17, 30)))   # Sunday evening
+
+class TestTaskSchedule(unittest.TestCase):
+    """Test running copying and orphan sweeps as separate tasks"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.temp_dir = tempfile.mkdtemp()
+        self.broker = SimulatedBroker()
+        self.broker.add_account(1001, 'source')
+        self.broker.add_account(2001, 'target')
+        self.broker.add_symbol('EURUSD')
+        self.broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 0.5, 1.1)
+        self.orphan_ticket = self.broker.add_pending_order(2001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT,
+                                                           0.5, 1.2, magic=999999)
+        self.terminal_config = {
+            'MT5_ACCOUNT': 2001, 'MT5_PASSWORD': 'target', 'MT5_SERVER': 'Simulated-Server',
+            'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT'],
+            'orphan_management': {'kill_orphaned_orders': True, 'max_orphan_checks': 2, 'orphan_check_interval': 60}
+        }
+        config = {
+            'SOURCE_TERMINAL': {'MT5_ACCOUNT': 1001, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+            'TARGET_TERMINALS': {'Target1': self.terminal_config},
+            'PERFORMANCE_CONFIG': {'placement_journal_dir': self.temp_dir, 'skip_unchanged_terminals': False}
+        }
+        self.manager = OrderManager(config, tracker=OrderTracker(state_file=None), backend=self.broker)
+        self.manager.clock = lambda: self.now
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_copy_task_leaves_orphans_alone(self):
+        """Test that a copy-only cycle copies orders without checking or cancelling orphans"""
+        self.assertTrue(self.manager.process_all_terminals([TASK_COPY]))
+        
+        target_orders = self.broker.accounts[2001]['orders']
+        self.assertEqual(len(target_orders), 2)
+        self.assertIn(self.orphan_ticket, target_orders)
+        self.assertEqual(self.manager.tracker.get_orphan_check_count('Target1', self.orphan_ticket), 0)
+        
+        self.broker.reset_call_counts()
+        self.assertTrue(self.manager.process_all_terminals([TASK_ORPHANS]))
+        self.assertTrue(self.manager.process_all_terminals([TASK_ORPHANS]))  # Not due yet
+        self.assertEqual(self.manager.tracker.get_orphan_check_count('Target1', self.orphan_ticket), 1)
+        self.assertEqual(self.broker.call_counts['order_send'], 0)
+    
+    def test_orphan_sweeps_follow_check_interval(self):
+        """Test that orphans are checked once per orphan_check_interval and cancelled after max checks"""
+        self.assertTrue(self.manager.process_all_terminals())
+        self.now += 30
+        self.assertTrue(self.manager.process_all_terminals())
+        self.assertEqual(self.manager.tracker.get_orphan_check_count('Target1', self.orphan_ticket), 1)
+        
+        # A sweep timer firing slightly late keeps the sweeps on the 60 second grid
+        self.now += 30.5
+        self.assertTrue(self.manager.process_all_terminals())
+        self.assertNotIn(self.orphan_ticket, self.broker.accounts[2001]['orders'])
+        self.assertEqual(self.manager.next_orphan_sweep['Target1'], 1120.0)
+
+class TestJobScheduler(unittest.TestCase):
+    """Test per-terminal triggers and the job priority queue"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.wall_now = datetime(2024, 1, 8, 10, 2, 30)  # Monday
+        self.deadlines = DeadlineScheduler(clock=lambda: self.now)
+        self.jobs = JobScheduler(self.deadlines, wall_clock=lambda: self.wall_now)
+    
+    def advance(self, seconds):
+        """Move both clocks forward"""
+        self.now += seconds
+        self.wall_now += timedelta(seconds=seconds)
+    
+    def test_triggers(self):
+        """Test next run times of timeframe, interval and cron triggers"""
+        self.assertEqual(TimeframeTrigger('M5', 60).next_after(self.wall_now), datetime(2024, 1, 8, 10, 6))
+        self.assertEqual(TimeframeTrigger('M5', 0).next_after(datetime(2024, 1, 8, 10, 5)), datetime(2024, 1, 8, 10, 10))
+        self.assertEqual(IntervalTrigger(30).next_after(self.wall_now), datetime(2024, 1, 8, 10, 3))
+        
+        cron = CronTrigger('*/15 8-17 * * 1-5')
+        self.assertEqual(cron.next_after(self.wall_now), datetime(2024, 1, 8, 10, 15))
+        self.assertEqual(cron.next_after(datetime(2024, 1, 12, 17, 45)), datetime(2024, 1, 15, 8, 0))  # Friday to Monday
+        self.assertEqual(CronTrigger('0 0 1 * *').next_after(datetime(2024, 12, 5)), datetime(2025, 1, 1))
+        self.assertRaises(ValueError, CronTrigger, '* * * *')
+        self.assertRaises(ValueError, CronTrigger, '0 24 * * *')
+    
+    def test_build_terminal_jobs_groups_schedules(self):
+        """Test that terminals sharing a schedule and priority share a job"""
+        jobs = build_terminal_jobs({
+            'Fast1': {'schedule': {'interval_seconds': 30}},
+            'Fast2': {'schedule': {'interval_seconds': 30}},
+            'Hourly': {'schedule': {'timeframe': 'H1', 'offset_seconds': 60}, 'priority': 5},
+            'Default': {}
+        }, 'M5', 60)
+        
+        self.assertEqual([job.terminals for job in jobs], [['Fast1', 'Fast2'], ['Hourly'], ['Default']])
+        self.assertIsInstance(jobs[2].trigger, TimeframeTrigger)
+        self.assertEqual(jobs[1].priority, 5)
+    
+    def test_due_jobs_pop_in_deadline_and_priority_order(self):
+        """Test that due jobs are popped by deadline, then priority, and rescheduled on their own triggers"""
+        for job in build_terminal_jobs({
+            'Slow': {'schedule': {'timeframe': 'M5', 'offset_seconds': 0}, 'priority': 9},
+            'Urgent': {'schedule': {'timeframe': 'M5', 'offset_seconds': 0}},
+            'Fast': {'schedule': {'interval_seconds': 150}}
+        }, 'M5'):
+            self.jobs.add(job)
+        
+        # The interval job runs at once, the M5 jobs at 10:05
+        due = self.jobs.wait_for_due()
+        self.assertEqual([job.terminals for job in due], [['Fast']])
+        self.jobs.reschedule(due)
+        self.assertEqual(self.jobs.peek().next_run, datetime(2024, 1, 8, 10, 5))
+        
+        self.advance(150)
+        due = self.jobs.wait_for_due()
+        self.assertEqual([job.terminals for job in due], [['Urgent'], ['Fast'], ['Slow']])
+        self.assertEqual(self.jobs.heap, [])
+        
+        self.jobs.reschedule(due)
+        self.assertEqual(self.jobs.peek().terminals, ['Fast'])
+        self.assertEqual(self.jobs.get_statistics()['job-2']['next_run'], datetime(2024, 1, 8, 10, 10))
+    
+    def test_overrun_skips_missed_runs(self):
+        """Test that run times passed during a long run are skipped and counted"""
+        self.jobs.add(build_terminal_jobs({'Fast': {'schedule': {'interval_seconds': 10}}}, 'M5')[0])
+        due = self.jobs.wait_for_due()
+        self.advance(35)
+        self.jobs.reschedule(due)
+        
+        self.assertEqual(due[0].skipped, 3)
+        self.assertEqual(due[0].next_run, datetime(2024, 1, 8, 10, 3, 10))
+        self.assertEqual(self.deadlines.stats['skipped_ticks'], 3)
+    
+    def test_cycle_limited_to_due_terminals(self):
+        """Test that a cycle for some terminals leaves the other terminals untouched"""
+        broker = SimulatedBroker()
+        broker.add_account(1001, 'source')
+        broker.add_symbol('EURUSD')
+        broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 0.5, 1.1)
+        targets = {}
+        for name, login in (('Fast', 2001), ('Hourly', 2002)):
+            broker.add_account(login, name.lower())
+            targets[name] = {'MT5_ACCOUNT': login, 'MT5_PASSWORD': name.lower(), 'MT5_SERVER': 'Simulated-Server',
+                             'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT']}
+        manager = OrderManager({
+            'SOURCE_TERMINAL': {'MT5_ACCOUNT': 1001, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+            'TARGET_TERMINALS': targets
+        }, tracker=OrderTracker(state_file=None), backend=broker)
+        
+        self.assertTrue(manager.process_all_terminals(terminals=['Fast']))
+        self.assertEqual(len(broker.accounts[2001]['orders']), 1)
+        self.assertEqual(len(broker.accounts[2002]['orders']), 0)
+        self.assertEqual(list(manager.last_cycle_results), ['Fast'])
+
+class TestCircuitBreakers(unittest.TestCase):
+    """Test skipping unreachable target terminals"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.now = 1000.0
+        self.breakers = CircuitBreakers(failure_threshold=2, cooldown_seconds=60, max_cooldown_seconds=100,
+                                        clock=lambda: self.now)
+    
+    def test_breaker_states(self):
+        """Test opening after the threshold, half-open trials and growing cooldowns"""
+        self.breakers.record_failure('Target1', "Connection failed")
+        self.assertEqual(self.breakers.get_state('Target1'), STATE_CLOSED)
+        self.breakers.record_failure('Target1', "Connection failed")
+        self.assertEqual(self.breakers.get_state('Target1'), STATE_OPEN)
+        self.assertFalse(self.breakers.allow('Target1'))
+        
+        # Failed trial doubles the cooldown (capped at 100s)
+        self.now += 60
+        self.assertTrue(self.breakers.allow('Target1'))
+        self.assertEqual(self.breakers.get_state('Target1'), STATE_HALF_OPEN)
+        self.breakers.record_failure('Target1')
+        self.now += 99
+        self.assertFalse(self.breakers.allow('Target1'))
+        self.now += 1
+        self.assertTrue(self.breakers.allow('Target1'))
+        
+        self.breakers.record_success('Target1')
+        stats = self.breakers.get_statistics()['Target1']
+        self.assertEqual(stats['state'], STATE_CLOSED)
+        self.assertEqual((stats['trips'], stats['skipped_cycles'], stats['cooldown_seconds']), (2, 2, 60))
+    
+    def test_open_terminal_is_skipped(self):
+        """Test that a terminal failing to connect is skipped while healthy terminals keep copying"""
+        broker = SimulatedBroker()
+        broker.add_account(1001, 'source')
+        broker.add_account(2001, 'healthy')
+        broker.add_account(2002, 'down')
+        broker.add_symbol('EURUSD')
+        broker.add_pending_order(1001, 'EURUSD', SimulatedBroker.ORDER_TYPE_BUY_LIMIT, 0.5, 1.1)
+        targets = {
+            'Healthy': {'MT5_ACCOUNT': 2001, 'MT5_PASSWORD': 'healthy', 'MT5_SERVER': 'Simulated-Server',
+                        'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT']},
+            'Down': {'MT5_ACCOUNT': 2002, 'MT5_PASSWORD': 'wrong', 'MT5_SERVER': 'Simulated-Server',
+                     'allowed_order_types': ['BUY_LIMIT', 'SELL_LIMIT']}
+        }
+        manager = OrderManager({
+            'SOURCE_TERMINAL': {'MT5_ACCOUNT': 1001, 'MT5_PASSWORD': 'source', 'MT5_SERVER': 'Simulated-Server'},
+            'TARGET_TERMINALS': targets,
+            'SYSTEM_CONFIG': {'circuit_breaker_failure_threshold': 2},
+            'PERFORMANCE_CONFIG': {'placement_journal_dir': None, 'skip_unchanged_terminals': False}
+        }, tracker=OrderTracker(state_file=None), backend=broker)
+        manager.breakers.clock = lambda: self.now
+        
+        for _ in range(2):
+            self.assertFalse(manager.process_all_terminals())
+        self.assertEqual(manager.breakers.get_state('Down'), STATE_OPEN)
+        
+        broker.reset_call_counts()
+        self.assertFalse(manager.process_all_terminals())
+        self.assertEqual(broker.call_counts['login'], 2)  # Source and Healthy only
+        self.assertEqual(manager.last_cycle_results['Down']['error'], "Circuit breaker open")
+        self.assertEqual(len(broker.accounts[2001]['orders']), 1)
+        self.assertEqual(manager.get_statistics()['circuit_breaker_stats']['Down']['skipped_cycles'], 1)
+        
+        # The terminal is back after the cooldown
+        targets['Down']['MT5_PASSWORD'] = 'down'
+        self.now += 60
+        self.assertTrue(manager.process_all_terminals())
+        self.assertEqual(manager.breakers.get_state('Down'), STATE_CLOSED)
+        self.assertEqual(len(broker.accounts[2002]['orders']), 1)
+
+class TestCallSupervisor(unittest.TestCase):
+    """Test running MT5 calls in a supervised worker process"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.broker = SimulatedBroker(latency={'order_send': 5.0})
+        self.broker.add_account(2001, 'target')
+        self.broker.add_symbol('EURUSD')
+        self.restarts = []
+        self.supervisor = SupervisedMT5({CALL_CONNECT: 5, CALL_FETCH: 5, CALL_TRADE: 0.2}, backend=self.broker,
+                                        on_restart=lambda: self.restarts.append(True))
+    
+    def tearDown(self):
+        """Clean up test environment"""
+        self.supervisor.stop()
+    
+    def test_call_classes(self):
+        """Test the deadline class of MT5 functions"""
+        self.assertEqual(get_call_class('login'), CALL_CONNECT)
+        self.assertEqual(get_call_class('positions_get'), CALL_FETCH)
+        self.assertEqual(get_call_class('order_send'), CALL_TRADE)
+    
+    def test_calls_run_in_worker(self):
+        """Test that functions, results and constants come from the call worker"""
+        connector = MT5Connector(backend=self.supervisor)
+        self.assertTrue(connector.connect({'MT5_ACCOUNT': 2001, 'MT5_PASSWORD': 'target',
+                                           'MT5_SERVER': 'Simulated-Server', 'timeout': 10000}, 'Target1'))
+        
+        self.assertEqual(self.supervisor.terminal_name, 'Target1')
+        self.assertEqual(self.supervisor.account_info().login, 2001)
+        self.assertEqual(self.supervisor.TRADE_ACTION_PENDING, SimulatedBroker.TRADE_ACTION_PENDING)
+        self.assertEqual(connector.get_pending_orders(), [])
+        self.assertEqual(self.broker.call_counts['login'], 0)  # The parent's broker was never called
+    
+    def test_hung_call_restarts_worker(self):
+        """Test that a call missing its deadline is recorded and the worker replaced"""
+        self.supervisor.initialize()
+        self.supervisor.login(2001, 'target', 'Simulated-Server')
+        self.supervisor.terminal_name = 'Target1'
+        first_worker = self.supervisor.process
+        
+        started = time.monotonic()
+        with self.assertRaises(MT5CallTimeout):
+            self.supervisor.order_send({'action': SimulatedBroker.TRADE_ACTION_PENDING})
+        self.assertLess(time.monotonic() - started, 4)
+        
+        self.assertFalse(first_worker.is_alive())
+        self.assertTrue(self.supervisor.is_running)
+        self.assertEqual(self.restarts, [True])
+        stats = self.supervisor.get_statistics()
+        self.assertEqual((stats['timeouts'], stats['restarts'], stats['timeouts_by_class'][CALL_TRADE]), (1, 1, 1))
+        self.assertEqual(stats['recent_timeouts'][0]['terminal'], 'Target1')
+        self.assertEqual(stats['recent_timeouts'][0]['call'], 'order_send')
+        
+        # The new worker has no session
+        self.assertIsNone(self.supervisor.account_info())
 
 class TestSystemIntegration(unittest.TestCase):
     """Test system integration"""
@@ -454,10 +1880,15 @@ class TestSystemIntegration(unittest.TestCase):
         import shutil
         shutil.rmtree(self.temp_dir)
     
+    def create_manager(self):
+        """Create an order manager whose tracker state and journals live in the temp directory"""
+        tracker = OrderTracker(state_file=self.test_config['SYSTEM_CONFIG']['state_file_path'], journal=True)
+        return OrderManager(self.test_config, tracker=tracker)
+    
     def test_order_manager_initialization(self):
         """Test order manager initialization"""
         try:
-            manager = OrderManager(self.test_config)
+            manager = self.create_manager()
             self.assertIsNotNone(manager)
             self.assertIsNotNone(manager.connector)
             self.assertIsNotNone(manager.tracker)
@@ -475,7 +1906,7 @@ class TestSystemIntegration(unittest.TestCase):
         mock_connector_class.return_value = mock_connector
         
         # Create order manager
-        manager = OrderManager(self.test_config)
+        manager = self.create_manager()
         
         # Test processing (should not fail with empty orders)
         try:
@@ -485,6 +1916,23 @@ class TestSystemIntegration(unittest.TestCase):
             self.assertIsInstance(result, bool)
         except Exception as e:
             self.fail(f"Order processing failed: {e}")
+    
+    @patch('order_manager.MT5Connector')
+    def test_source_single_login_per_cycle(self, mock_connector_class):
+        """Test that the source terminal is logged into once per cycle"""
+        mock_connector = Mock()
+        mock_connector.connect.return_value = True
+        mock_connector.get_pending_orders.return_value = []
+        mock_connector.get_positions.return_value = []
+        mock_connector.capture_snapshot.return_value = SourceSnapshot([], [])
+        mock_connector_class.return_value = mock_connector
+        
+        manager = self.create_manager()
+        manager.process_all_terminals()
+        
+        source_connects = [c for c in mock_connector.connect.call_args_list if c.args[1] == 'Source']
+        self.assertEqual(len(source_connects), 1)
+        mock_connector.capture_snapshot.assert_called_once()
 
 def run_system_tests():
     """Run all system tests"""
@@ -497,8 +1945,26 @@ def run_system_tests():
     # Add test cases
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestUtils))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestOrderTracker))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestTrackerJournal))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestStateWriter))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSQLiteTrackerStore))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestRecords))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestConfiguration))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestMT5Connector))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestRecordBasedTradeRequests))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestReconciliationPlanner))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestTerminalFingerprints))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSimulatedBroker))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSourceWatcher))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestDeadlineScheduler))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestAdaptiveCadence))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestTaskSchedule))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestJobScheduler))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestCircuitBreakers))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestCallSupervisor))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSymbolInfoCache))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSessionManager))
+    test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestTerminalWorkerPool))
     test_suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestSystemIntegration))
     
     # Run tests
@@ -0,0 +1,74 @@
+# MT5 Pending Order Copier System - Tracker Event Journal
+# This module appends tracker mutations to a write-ahead log between state snapshots
+
+import os
+import json
+import logging
+from typing import Dict, List, Optional, Any
+
+from records import json_default
+from utils import setup_logging, format_error_message
+
+# Event operations
+EVENT_UPSERT = 'upsert'                  # Record added or changed (value = record or orphan check count)
+EVENT_REMOVE = 'remove'                  # Record removed
+EVENT_DROP_TERMINAL = 'drop_terminal'    # All records of a terminal removed from a section
+
+class TrackerJournal:
+    """Append-only log of tracker events, one JSON object per line
+
+    Every event carries a sequence number. A snapshot stores the sequence number of the last
+    event it contains, so replaying the journal on top of it skips events that are already
+    included - even when the process died between writing the snapshot and truncating the
+    journal. An incomplete last line (crash during append) is ignored on replay.
+    """
+
+    def __init__(self, journal_file: str, logger: Optional[logging.Logger] = None):
+        self.logger = logger or setup_logging()
+        self.journal_file = journal_file
+
+    def append(self, events: List[Dict[str, Any]]) -> int:
+        """Append events and flush them to disk, returning the number of bytes written"""
+        data = "".join(json.dumps(event, default=json_default, separators=(',', ':')) + "\n" for event in events).encode('utf-8')
+        with open(self.journal_file, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+    def read(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """Read the events with a sequence number above after_seq"""
+        events = []
+        if not os.path.exists(self.journal_file):
+            return events
+
+        with open(self.journal_file, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError as e:
+                    self.logger.warning(
+                        f"Ignoring unreadable journal entry at line {line_number} of {self.journal_file}: "
+                        f"{format_error_message(e)}"
+                    )
+                    continue
+                if event.get('seq', 0) > after_seq:
+                    events.append(event)
+
+        return events
+
+    def reset(self) -> None:
+        """Discard all events (after they were compacted into a snapshot)"""
+        with open(self.journal_file, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def size(self) -> int:
+        """Get the journal size in bytes"""
+        try:
+            return os.path.getsize(self.journal_file)
+        except OSError:
+            return 0
@@ -0,0 +1,204 @@
+# MT5 Pending Order Copier System - SQLite Tracker Store
+# This module persists OrderTracker state in an indexed SQLite database
+
+import os
+import json
+import sqlite3
+import logging
+from typing import Dict, List, Optional, Any
+
+from records import json_default
+from utils import setup_logging, format_error_message, ensure_directory_exists
+
+TABLES = ('source_orders', 'source_positions', 'target_orders', 'target_positions', 'orphan_checks')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS source_orders (
+    ticket INTEGER PRIMARY KEY,
+    symbol TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source_positions (
+    ticket INTEGER PRIMARY KEY,
+    magic INTEGER,
+    symbol TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS target_orders (
+    terminal TEXT NOT NULL,
+    ticket INTEGER NOT NULL,
+    magic INTEGER,
+    symbol TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (terminal, ticket)
+);
+CREATE TABLE IF NOT EXISTS target_positions (
+    terminal TEXT NOT NULL,
+    ticket INTEGER NOT NULL,
+    magic INTEGER,
+    symbol TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (terminal, ticket)
+);
+CREATE TABLE IF NOT EXISTS orphan_checks (
+    terminal TEXT NOT NULL,
+    ticket INTEGER NOT NULL,
+    check_count INTEGER NOT NULL,
+    PRIMARY KEY (terminal, ticket)
+);
+CREATE INDEX IF NOT EXISTS idx_target_orders_magic ON target_orders (terminal, magic);
+CREATE INDEX IF NOT EXISTS idx_target_positions_magic ON target_positions (terminal, magic);
+"""
+
+class SQLiteTrackerStore:
+    """SQLite storage for the tracker state sections
+
+    Target records are keyed by (terminal, ticket) and indexed on (terminal, magic). Writes
+    go into the connection's open transaction and become visible to other readers (e.g. ops
+    tools querying the database while the copier runs) when commit() is called. The
+    database uses WAL journaling so readers never block the copier.
+    """
+
+    def __init__(self, db_file: str, logger: Optional[logging.Logger] = None):
+        self.logger = logger or setup_logging()
+        self.db_file = db_file
+        self.connection = None
+
+    def open(self) -> bool:
+        """Open the database and create missing tables and indexes"""
+        try:
+            if self.connection is not None:
+                return True
+
+            db_dir = os.path.dirname(self.db_file)
+            if db_dir and not ensure_directory_exists(db_dir):
+                self.logger.error(f"Failed to create state directory: {db_dir}")
+                return False
+
+            # Saves may be committed from a background writer thread; the tracker serializes access
+            self.connection = sqlite3.connect(self.db_file, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error opening tracker database {self.db_file}: {format_error_message(e)}")
+            self.connection = None
+            return False
+
+    def close(self) -> None:
+        """Commit pending writes and close the database"""
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def commit(self) -> None:
+        """Commit the writes of the current cycle as one transaction"""
+        self.connection.commit()
+
+    def rollback(self) -> None:
+        """Discard uncommitted writes"""
+        self.connection.rollback()
+
+    def load(self) -> Dict[str, Any]:
+        """Read all sections into the tracker's dictionary layout"""
+        state = {
+            'orphan_checks': {},
+            'last_run': None,
+            'source_orders': {},
+            'target_orders': {},
+            'source_positions': {},
+            'target_positions': {}
+        }
+
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'last_run'").fetchone()
+        if row:
+            state['last_run'] = row[0]
+
+        for section in ('source_orders', 'source_positions'):
+            for ticket, data in self.connection.execute(f"SELECT ticket, data FROM {section}"):
+                state[section][ticket] = json.loads(data)
+
+        for section in ('target_orders', 'target_positions'):
+            for terminal, ticket, data in self.connection.execute(f"SELECT terminal, ticket, data FROM {section}"):
+                state[section].setdefault(terminal, {})[ticket] = json.loads(data)
+
+        for terminal, ticket, check_count in self.connection.execute("SELECT terminal, ticket, check_count FROM orphan_checks"):
+            state['orphan_checks'].setdefault(terminal, {})[ticket] = check_count
+
+        return state
+
+    def write_last_run(self, last_run: Optional[str]) -> None:
+        """Store the last run timestamp"""
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_run', ?)", (last_run,))
+
+    def write_section(self, section: str, records: Dict[str, Any], terminal_name: Optional[str] = None) -> int:
+        """Replace the rows of a source section, or of one terminal in a terminal section"""
+        if section == 'source_orders':
+            self.connection.execute("DELETE FROM source_orders")
+            rows = [(record['ticket'], record.get('symbol'), json.dumps(record, default=json_default))
+                    for record in records.values()]
+            self.connection.executemany("INSERT INTO source_orders (ticket, symbol, data) VALUES (?, ?, ?)", rows)
+        elif section == 'source_positions':
+            self.connection.execute("DELETE FROM source_positions")
+            rows = [(record['ticket'], record.get('magic'), record.get('symbol'), json.dumps(record, default=json_default))
+                    for record in records.values()]
+            self.connection.executemany(
+                "INSERT INTO source_positions (ticket, magic, symbol, data) VALUES (?, ?, ?, ?)", rows
+            )
+        elif section in ('target_orders', 'target_positions'):
+            self.connection.execute(f"DELETE FROM {section} WHERE terminal = ?", (terminal_name,))
+            rows = [(terminal_name, record['ticket'], record.get('magic'), record.get('symbol'),
+                     json.dumps(record, default=json_default))
+                    for record in records.values()]
+            self.connection.executemany(
+                f"INSERT INTO {section} (terminal, ticket, magic, symbol, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        elif section == 'orphan_checks':
+            self.connection.execute("DELETE FROM orphan_checks WHERE terminal = ?", (terminal_name,))
+            rows = [(terminal_name, int(ticket), count) for ticket, count in records.items()]
+            self.connection.executemany(
+                "INSERT INTO orphan_checks (terminal, ticket, check_count) VALUES (?, ?, ?)", rows
+            )
+        else:
+            raise ValueError(f"Unknown tracker section: {section}")
+
+        return len(rows)
+
+    def delete_terminal(self, section: str, terminal_name: str) -> None:
+        """Remove all rows of one terminal from a terminal section"""
+        self.connection.execute(f"DELETE FROM {section} WHERE terminal = ?", (terminal_name,))
+
+    def clear_section(self, section: str) -> None:
+        """Remove all rows of a section"""
+        if section not in TABLES:
+            raise ValueError(f"Unknown tracker section: {section}")
+        self.connection.execute(f"DELETE FROM {section}")
+
+    def find_target_orders_by_magic(self, terminal_name: str, magic: int) -> List[Dict[str, Any]]:
+        """Look up a terminal's target orders copied from a source ticket using the (terminal, magic) index"""
+        rows = self.connection.execute(
+            "SELECT data FROM target_orders WHERE terminal = ? AND magic = ? ORDER BY ticket",
+            (terminal_name, magic)
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def find_target_order(self, terminal_name: str, ticket: int) -> Optional[Dict[str, Any]]:
+        """Look up a single target order by (terminal, ticket)"""
+        row = self.connection.execute(
+            "SELECT data FROM target_orders WHERE terminal = ? AND ticket = ?", (terminal_name, ticket)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_row_counts(self) -> Dict[str, int]:
+        """Count the rows of each table"""
+        counts = {}
+        for table in TABLES:
+            counts[table] = self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return counts
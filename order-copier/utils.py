@@ -5,7 +5,7 @@ import logging
 import time
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterable
 
 # Logging setup
 def setup_logging(log_level: str = 'INFO', log_file: str = 'mt5_copier.log') -> logging.Logger:
@@ -169,14 +169,18 @@ def validate_symbol_mapping(symbol: str, mapping: Dict[str, str]) -> str:
     """Get mapped symbol or return original if no mapping exists"""
     return mapping.get(symbol, symbol)
 
+def build_symbol_group(symbols: Iterable[str]) -> str:
+    """Build an orders_get/positions_get group filter matching exactly the given symbols"""
+    return ",".join(sorted(set(symbols)))
+
 def clean_symbol_name(symbol: str) -> str:
     """Clean and standardize symbol name"""
     return symbol.upper().strip().replace(' ', '')
 
-def is_market_hours(symbol: str = None) -> bool:
+def is_market_hours(symbol: str = None, now: Optional[datetime] = None) -> bool:
     """Basic market hours check (can be enhanced with specific symbol logic)"""
     # This is a basic implementation - can be enhanced with specific market hours
-    current_time = datetime.now()
+    current_time = now or datetime.now()
     weekday = current_time.weekday()
     
     # Basic forex market hours (Sunday 5 PM EST to Friday 5 PM EST)
@@ -184,8 +188,10 @@ def is_market_hours(symbol: str = None) -> bool:
     if weekday == 6:  # Sunday
         return current_time.hour >= 17
     elif weekday == 5:  # Saturday
+        return False
+    elif weekday == 4:  # Friday
         return current_time.hour < 17
-    else:  # Monday to Friday
+    else:  # Monday to Thursday
         return True
 
 def format_volume(volume: float) -> str: